@@ -1,21 +1,57 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from typing import NamedTuple
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import jwt
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.dj import DJ
+from app.core import token_versions
 from app.core.config import settings
+from app.core.logging_config import bind_log_context
+from app.core.security import decode_access_token
+from app.crud.projections import CurrentDJ, get_current_dj_row, get_current_dj_row_async
 
 security = HTTPBearer()
 
-def get_current_dj(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> DJ:
-    token = credentials.credentials
+def client_ip(request: Request) -> str | None:
+    """
+    IP reale del client dietro TRUSTED_PROXY_HOPS proxy (throttle del login, sessioni).
     
+    Ogni proxy aggiunge in coda a X-Forwarded-For l'indirizzo da cui riceve la
+    richiesta: si legge la voce scritta dal proxy più esterno, mai quelle più a
+    sinistra (le può inviare il client). Senza header: l'indirizzo della connessione.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if settings.TRUSTED_PROXY_HOPS and forwarded:
+        hosts = [host.strip() for host in forwarded.split(",") if host.strip()]
+        if hosts:
+            return hosts[max(len(hosts) - settings.TRUSTED_PROXY_HOPS, 0)]
+    return request.client.host if request.client else None
+
+def require_maintenance_token(x_maintenance_token: str | None = Header(None)):
+    """Endpoint di manutenzione (cron): header X-Maintenance-Token uguale a MAINTENANCE_TOKEN"""
+    if not settings.MAINTENANCE_TOKEN or not secrets.compare_digest(
+        (x_maintenance_token or "").encode(), settings.MAINTENANCE_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token di manutenzione non valido"
+        )
+
+class TokenClaims(NamedTuple):
+    dj_id: int
+    token_version: int  # claim "tv": 0 per i token emessi prima della revoca
+
+def decode_dj_token(token: str) -> TokenClaims:
+    """
+    Valida il JWT e ritorna dj_id e versione (401 se non valido, scaduto o
+    già noto come revocato: nessuna query per i token revocati).
+    Firma verificata una volta per token (cache dei claims in security.py).
+    """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token)
         dj_id: int = payload.get("dj_id")
         if dj_id is None:
             raise HTTPException(
@@ -33,11 +69,63 @@ def get_current_dj(
             detail="Token non valido"
         )
     
-    dj = db.query(DJ).filter(DJ.id == dj_id).first()
+    claims = TokenClaims(dj_id, payload.get("tv", 0))
+    if token_versions.is_revoked(*claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revocato"
+        )
+    
+    bind_log_context(dj_id=dj_id)
+    return claims
+
+def _check_token_version(claims: TokenClaims, dj) -> None:
+    """Confronto con la riga appena letta: fonte di verità, anche per le revoche fatte da altri worker"""
     if dj is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="DJ non trovato"
         )
     
-    return dj
\ No newline at end of file
+    token_versions.remember(dj.id, dj.token_version)
+    if claims.token_version < dj.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revocato"
+        )
+
+def get_current_dj(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> CurrentDJ:
+    """DJ autenticato come proiezione in sola lettura (niente password_hash/token)"""
+    claims = decode_dj_token(credentials.credentials)
+    
+    dj = get_current_dj_row(db, claims.dj_id)
+    _check_token_version(claims, dj)
+    
+    return dj
+
+def get_current_dj_model(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> DJ:
+    """Entità ORM del DJ autenticato, per gli endpoint che modificano il profilo"""
+    claims = decode_dj_token(credentials.credentials)
+    
+    dj = db.query(DJ).filter(DJ.id == claims.dj_id).first()
+    _check_token_version(claims, dj)
+    
+    return dj
+
+async def get_current_dj_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentDJ:
+    """Come get_current_dj, per gli endpoint async (AsyncSession)"""
+    claims = decode_dj_token(credentials.credentials)
+    
+    dj = await get_current_dj_row_async(db, claims.dj_id)
+    _check_token_version(claims, dj)
+    
+    return dj
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.dj import DJ
 from app.schemas.dj import DJRegister, DJLogin, DJUpdate, PasswordChange, TokenResponse, DJResponse, PasswordResetRequest, PasswordReset 
-from app.core.security import verify_password, get_password_hash, create_access_token, generate_qr_code_id
+from app.core import catalog_cache, login_throttle, token_versions
+from app.core.security import DUMMY_PASSWORD_HASH, verify_password, get_password_hash, create_access_token, generate_qr_code_id
 from app.core.email_service import generate_verification_token, send_verification_email, send_reset_password_email, send_admin_registration_notification, send_admin_password_reset_notification
-from app.api.deps import get_current_dj
+from app.api.deps import client_ip, get_current_dj, get_current_dj_model
+from app.crud.projections import CurrentDJ
+from app.crud.versions import bump_dj_version, bump_token_version
+from app.core.etag import etag_headers, make_etag, not_modified
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
+def revoke_tokens(db: Session, dj_id: int) -> int:
+    """Revoca i JWT del DJ (commit incluso) e aggiorna la cache del worker. Ritorna la nuova versione"""
+    token_version = db.execute(bump_token_version(dj_id)).scalar_one()
+    db.commit()
+    token_versions.remember(dj_id, token_version)
+    return token_version
+
 @router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
 def register(dj_data: DJRegister, request: Request, db: Session = Depends(get_db)):
     # Verifica se email esiste già 
@@ -69,14 +80,28 @@ def register(dj_data: DJRegister, request: Request, db: Session = Depends(get_db
     }
 
 @router.post("/login", response_model=TokenResponse)
-def login(credentials: DJLogin, db: Session = Depends(get_db)):
+def login(credentials: DJLogin, request: Request, db: Session = Depends(get_db)):
+    # 🛡️ Throttle per email e IP prima di query e bcrypt (vedi app/core/login_throttle.py)
+    ip = client_ip(request)
+    retry_after = login_throttle.check(credentials.email, ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Troppi tentativi di accesso. Riprova più tardi.",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
     dj = db.query(DJ).filter(DJ.email == credentials.email).first()
     
-    if not dj or not verify_password(credentials.password, dj.password_hash):
+    # Email inesistente: bcrypt su un hash fittizio, stesso costo di una password sbagliata
+    password_ok = verify_password(credentials.password, dj.password_hash if dj else DUMMY_PASSWORD_HASH)
+    if not dj or not password_ok:
+        login_throttle.record_failure(credentials.email, ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenziali non valide"
         )
+    login_throttle.record_success(credentials.email)
     
     # 🆕 Controlla se email è verificata
     if not dj.email_verified:
@@ -85,7 +110,8 @@ def login(credentials: DJLogin, db: Session = Depends(get_db)):
             detail="Email non ancora verificata. Controlla la tua posta."
         )
     
-    token = create_access_token({"dj_id": dj.id})
+    # "tv": versione per la revoca lato server (app/core/token_versions.py)
+    token = create_access_token({"dj_id": dj.id, "tv": dj.token_version})
     
     return {
         "token": token,
@@ -102,22 +128,24 @@ def login(credentials: DJLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/logout")
-def logout(current_dj: DJ = Depends(get_current_dj)):
+def logout(current_dj: CurrentDJ = Depends(get_current_dj), db: Session = Depends(get_db)):
     """
     Logout del DJ corrente.
-    Invalida il token JWT lato client.
+    Invalida il token JWT anche lato server.
     
     Args:
         current_dj: DJ autenticato (per validare token)
-        
+    
     Returns:
         dict: Messaggio di conferma logout
-        
+    
     Note:
-        - JWT stateless: invalidazione gestita dal frontend
-        - Frontend deve rimuovere token da localStorage
-        - Endpoint utile per conferma logout e logging
+        - 🔒 token_version incrementato: i token emessi finora (tutti i
+          dispositivi del DJ) vengono respinti con 401
+        - Frontend deve comunque rimuovere token da localStorage
     """
+    revoke_tokens(db, current_dj.id)
+    
     return {
         "message": "Logout completato con successo",
         "dj_id": current_dj.id,
@@ -138,6 +166,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     # Attiva l'account
     dj.email_verified = True
     dj.email_verification_token = None
+    db.execute(bump_dj_version(dj.id))
     db.commit()
     
     # Crea token JWT
@@ -209,38 +238,36 @@ def reset_password(
     dj.password_hash = get_password_hash(reset_data.new_password)
     dj.password_reset_token = None
     dj.password_reset_expires = None
-    db.commit()
+    # 🔒 Le sessioni aperte con la vecchia password non valgono più
+    revoke_tokens(db, dj.id)
     
     return {"message": "Password resettata con successo"}
 
 # ========== NUOVI ENDPOINT PROFILO ==========
 @router.get("/me", response_model=DJResponse)
-def get_current_dj_info(current_dj: DJ = Depends(get_current_dj)):
+def get_current_dj_info(request: Request, response: Response, current_dj: CurrentDJ = Depends(get_current_dj)):
     """
     Ottieni informazioni del DJ corrente autenticato.
     
     Returns:
         DJResponse: Dati completi del profilo DJ
-        
+    
     Note:
-        - Non include password_hash per sicurezza
+        - Non include password_hash per sicurezza (non viene nemmeno letto)
         - Mostra QR code ID per condivisione
+        - 🏷️ ETag dalla versione del DJ: 304 se il profilo non è cambiato
     """
-    return DJResponse(
-        id=current_dj.id,
-        full_name=current_dj.full_name,
-        stage_name=current_dj.stage_name,
-        email=current_dj.email,
-        phone=current_dj.phone,
-        qr_code_id=current_dj.qr_code_id,
-        email_verified=current_dj.email_verified,
-        max_bookings_per_user=current_dj.max_bookings_per_user
-    )
+    etag = make_etag("me", current_dj.id, current_dj.version)
+    if (cached := not_modified(request, etag)):
+        return cached
+    response.headers.update(etag_headers(etag))
+    
+    return DJResponse(**current_dj._asdict())
 
 @router.put("/me", response_model=DJResponse)
 def update_current_dj(
     dj_update: DJUpdate,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: DJ = Depends(get_current_dj_model),
     db: Session = Depends(get_db)
 ):
     """
@@ -250,13 +277,13 @@ def update_current_dj(
         dj_update: Dati da aggiornare (solo campi forniti)
         current_dj: DJ autenticato
         db: Database session
-        
+    
     Returns:
         DJResponse: Dati aggiornati del DJ
-        
+    
     Raises:
         HTTPException: 400 se email già esistente
-        
+    
     Note:
         - Email deve rimanere univoca
         - QR code ID non modificabile
@@ -287,6 +314,7 @@ def update_current_dj(
     if dj_update.max_bookings_per_user is not None:
         current_dj.max_bookings_per_user = dj_update.max_bookings_per_user
     
+    db.execute(bump_dj_version(current_dj.id))
     db.commit()
     db.refresh(current_dj)
     
@@ -304,7 +332,7 @@ def update_current_dj(
 @router.put("/change-password")
 def change_password(
     password_data: PasswordChange,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: DJ = Depends(get_current_dj_model),
     db: Session = Depends(get_db)
 ):
     """
@@ -314,16 +342,18 @@ def change_password(
         password_data: Password attuale e nuova
         current_dj: DJ autenticato
         db: Database session
-        
+    
     Returns:
         dict: Messaggio di conferma
-        
+    
     Raises:
         HTTPException: 400 se password attuale errata
-        
+    
     Note:
         - Richiede conferma password attuale
         - Nuova password viene hashata con bcrypt
+        - 🔒 I token emessi prima vengono revocati: la risposta contiene il
+          nuovo token per questo dispositivo
     """
     # Verifica password attuale
     if not verify_password(password_data.current_password, current_dj.password_hash):
@@ -334,9 +364,12 @@ def change_password(
     
     # Aggiorna con nuova password
     current_dj.password_hash = get_password_hash(password_data.new_password)
-    db.commit()
+    token_version = revoke_tokens(db, current_dj.id)
     
-    return {"message": "Password modificata con successo"}
+    return {
+        "message": "Password modificata con successo",
+        "token": create_access_token({"dj_id": current_dj.id, "tv": token_version})
+    }
 
 @router.post("/resend-verification")
 def resend_verification(
@@ -369,14 +402,14 @@ def resend_verification(
 # ):
 #     """
 #     Elimina definitivamente l'account del DJ corrente.
-    
+
 #     Args:
 #         current_dj: DJ autenticato
 #         db: Database session
-        
+
 #     Returns:
 #         dict: Messaggio di conferma eliminazione
-        
+
 #     Note:
 #         - Eliminazione a cascata di venue, songs, bookings, sessions
 #         - IRREVERSIBILE: tutti i dati vengono persi
@@ -385,11 +418,11 @@ def resend_verification(
 #     # Salva dati per response
 #     dj_id = current_dj.id
 #     stage_name = current_dj.stage_name
-    
+
 #     # Elimina DJ (cascade eliminerà tutto il resto)
 #     db.delete(current_dj)
 #     db.commit()
-    
+
 #     return {
 #         "message": "Account eliminato definitivamente",
 #         "deleted_dj_id": dj_id,
@@ -400,7 +433,7 @@ def resend_verification(
 @router.delete("/delete-account")
 def delete_account(
     request: Request,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: DJ = Depends(get_current_dj_model),
     db: Session = Depends(get_db)
 ):
     """
@@ -410,10 +443,10 @@ def delete_account(
         current_dj: DJ autenticato
         request: HTTP request per email URL dinamici
         db: Database session
-        
+    
     Returns:
         dict: Messaggio di conferma eliminazione
-        
+    
     Note:
         - Eliminazione a cascata di venue, songs, bookings, sessions
         - IRREVERSIBILE: tutti i dati vengono persi
@@ -430,6 +463,8 @@ def delete_account(
     # Elimina DJ (cascade eliminerà tutto il resto)
     db.delete(current_dj)
     db.commit()
+    token_versions.forget(dj_id)
+    catalog_cache.forget(dj_id)
     
     # 🆕 Invia email di conferma
     send_account_deletion_email(dj_email, stage_name, full_name, request)
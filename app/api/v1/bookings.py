@@ -1,83 +1,172 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from datetime import datetime
 import uuid
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.booking import Booking
 from app.models.venue import Venue
-from app.models.dj import DJ
 from app.models.session import Session
 from app.schemas.booking import BookingCreate, BookingResponse, BookingWithVenue
-from app.api.deps import get_current_dj
+from app.api.deps import get_current_dj_async
+from app.crud.projections import (
+    CurrentDJ, find_song, get_active_venue, get_booking_rules, get_max_bookings_per_user, get_session_bookings,
+    get_venue_status
+)
+from app.crud.versions import bump_bookings_version
 
+from app.core import catalog_cache, clock
+from app.core.etag import etag_headers, make_etag, not_modified
 from app.core.config import settings
-from sqlalchemy import func
+from app.core.logging_config import bind_log_context
+from sqlalchemy import func, select, update, delete, case
 
 router = APIRouter()
 
+# ==================== HELPER FUNCTIONS ====================
+
+def release_session_slots(*booking_filters):
+    """
+    Decrementa booking_count delle sessioni per le prenotazioni che stanno per essere eliminate.
+    
+    Una sola istruzione set-based, senza caricare le sessioni:
+        UPDATE sessions SET booking_count = max(booking_count - n, 0)
+        FROM (SELECT session_id, count(*) AS n FROM bookings WHERE ... GROUP BY session_id)
+    Ritorna lo statement: va eseguito PRIMA del DELETE, nella stessa transazione.
+    """
+    released = select(
+        Booking.session_id.label("session_id"),
+        func.count(Booking.id).label("released")
+    ).where(
+        *booking_filters,
+        Booking.session_id.isnot(None)
+    ).group_by(Booking.session_id).subquery()
+    
+    remaining = Session.booking_count - released.c.released
+    
+    return (
+        update(Session)
+        .where(Session.id == released.c.session_id)
+        .values(booking_count=case((remaining > 0, remaining), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+def reset_session_slots(*booking_filters):
+    """
+    Azzera booking_count delle sessioni che hanno prenotazioni nei filtri dati.
+    
+    Per quando si eliminano tutte le prenotazioni delle sessioni coinvolte:
+        UPDATE sessions SET booking_count = 0
+        WHERE id IN (SELECT session_id FROM bookings WHERE ...)
+    Ritorna lo statement: va eseguito PRIMA del DELETE, nella stessa transazione.
+    """
+    return (
+        update(Session)
+        .where(Session.id.in_(
+            select(Booking.session_id).where(
+                *booking_filters,
+                Booking.session_id.isnot(None)
+            )
+        ))
+        .values(booking_count=0)
+        .execution_options(synchronize_session=False)
+    )
+
 # ==================== DJ ENDPOINTS ====================
 
-@router.get("", response_model=List[BookingWithVenue])
-def get_bookings(
+@router.get("", response_model=List[BookingWithVenue], response_class=ORJSONResponse)
+async def get_bookings(
+    request: Request,
     venue_id: int = Query(..., description="ID del locale"),
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ottieni tutte le prenotazioni per un locale specifico (DJ view).
     Include sia prenotazioni utenti che quelle manuali del DJ.
+    
+    ⚡ Lista potenzialmente lunga (polling del DJ): solo le colonne necessarie,
+    righe → dict → JSON con orjson, senza oggetti ORM né validazione Pydantic.
+    response_model resta per la documentazione OpenAPI.
+    
+    🏷️ ETag dalla versione prenotazioni del locale: se il DJ ha già l'ultima
+    lista risponde 304 senza leggere le prenotazioni.
     """
     # Verifica che il locale appartenga al DJ
-    venue = db.query(Venue).filter(
+    venue = (await db.execute(select(Venue.name, Venue.bookings_version).where(
         Venue.id == venue_id,
         Venue.dj_id == current_dj.id
-    ).first()
+    ))).first()
     
-    if not venue:
+    if venue is None:
         raise HTTPException(status_code=404, detail="Locale non trovato")
     
+    venue_name, bookings_version = venue
+    etag = make_etag("bookings", venue_id, bookings_version)
+    if (cached := not_modified(request, etag)):
+        return cached
+    
     # Ottieni TUTTE le prenotazioni del locale
-    bookings = db.query(Booking).filter(
+    rows = (await db.execute(select(
+        Booking.id, Booking.user_name, Booking.song, Booking.song_id, Booking.key,
+        Booking.status, Booking.session_id, Booking.created_at
+    ).where(
         Booking.venue_id == venue_id
-    ).order_by(Booking.created_at.desc()).all()
-    
-    return [
-        BookingWithVenue(
-            id=b.id,
-            user_name=b.user_name,
-            song=b.song,
-            key=b.key,
-            status=b.status,
-            venue_name=venue.name,
-            session_id=b.session_id,  # ✅ Incluso
-            created_at=b.created_at
-        )
-        for b in bookings
-    ]
+    ).order_by(Booking.created_at.desc()))).all()
+    
+    return ORJSONResponse([
+        {
+            "id": booking_id,
+            "user_name": user_name,
+            "song": song,
+            "song_id": song_id,
+            "key": key,
+            "status": booking_status,
+            "venue_name": venue_name,
+            # asyncpg ritorna il suo tipo UUID, che orjson non serializza
+            "session_id": str(session_id) if session_id else None,  # ✅ Incluso
+            "created_at": created_at
+        }
+        for booking_id, user_name, song, song_id, key, booking_status, session_id, created_at in rows
+    ], headers=etag_headers(etag))
 
 @router.post("", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
-def create_booking(
+async def create_booking(
     booking_data: BookingCreate,
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Crea una prenotazione manuale (dal DJ).
     session_id sarà NULL per prenotazioni DJ.
+    
+    Il DJ può prenotare anche canzoni fuori catalogo: song_id resta NULL se il
+    titolo non è nel catalogo, mentre un song_id inesistente è un 404.
     """
-    venue = db.query(Venue).filter(
+    if booking_data.song_id is None and not booking_data.song:
+        raise HTTPException(
+            status_code=422,
+            detail="Indica la canzone (song_id o song)"
+        )
+    
+    venue = await db.scalar(select(Venue).where(
         Venue.id == booking_data.venue_id,
         Venue.dj_id == current_dj.id
-    ).first()
+    ))
     
     if not venue:
         raise HTTPException(status_code=404, detail="Locale non trovato")
     
+    catalog_song = await find_song(db, current_dj.id, song_id=booking_data.song_id, file_name=booking_data.song)
+    
+    if booking_data.song_id is not None and not catalog_song:
+        raise HTTPException(status_code=404, detail="Canzone non trovata nel catalogo")
+    
     new_booking = Booking(
         user_name=booking_data.user_name,
-        song=booking_data.song,
+        song=catalog_song.file_name if catalog_song else booking_data.song,
+        song_id=catalog_song.id if catalog_song else None,
         key=booking_data.key,
         status="pending",
         venue_id=venue.id,
@@ -85,81 +174,77 @@ def create_booking(
     )
     
     db.add(new_booking)
-    db.commit()
-    db.refresh(new_booking)
+    await db.execute(bump_bookings_version(Venue.id == venue.id))
+    await db.commit()
+    await db.refresh(new_booking)
     
     return new_booking
 
 @router.post("/{booking_id}/accept")
-def accept_booking(
+async def accept_booking(
     booking_id: int,
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Accetta una prenotazione"""
-    booking = db.query(Booking).join(Venue).filter(
+    booking = await db.scalar(select(Booking).join(Venue).where(
         Booking.id == booking_id,
         Venue.dj_id == current_dj.id
-    ).first()
+    ))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Prenotazione non trovata")
     
     booking.status = "accepted"
-    db.commit()
+    await db.execute(bump_bookings_version(Venue.id == booking.venue_id))
+    await db.commit()
     
     return {"message": "Prenotazione accettata", "status": "accepted"}
 
 @router.post("/{booking_id}/reject")
-def reject_booking(
+async def reject_booking(
     booking_id: int,
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Rifiuta una prenotazione"""
-    booking = db.query(Booking).join(Venue).filter(
+    booking = await db.scalar(select(Booking).join(Venue).where(
         Booking.id == booking_id,
         Venue.dj_id == current_dj.id
-    ).first()
+    ))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Prenotazione non trovata")
     
     booking.status = "rejected"
-    db.commit()
+    await db.execute(bump_bookings_version(Venue.id == booking.venue_id))
+    await db.commit()
     
     return {"message": "Prenotazione rifiutata", "status": "rejected"}
 
 @router.delete("/all")
-def delete_all_bookings(
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+async def delete_all_bookings(
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Elimina TUTTE le prenotazioni di TUTTI i locali del DJ.
     """
     # Prima recupera gli ID dei venue del DJ
-    venue_ids = db.query(Venue.id).filter(
-        Venue.dj_id == current_dj.id
-    ).subquery()
+    venue_ids = select(Venue.id).where(Venue.dj_id == current_dj.id)
     
-    # Resetta tutti i contatori delle sessioni degli utenti
-    sessions_to_reset = db.query(Session).join(
-        Booking, Session.id == Booking.session_id
-    ).filter(
-        Booking.venue_id.in_(venue_ids),
-        Booking.session_id.isnot(None)
-    ).distinct().all()
-    
-    for session in sessions_to_reset:
-        session.booking_count = 0
+    # Resetta tutti i contatori delle sessioni degli utenti (un solo UPDATE)
+    await db.execute(reset_session_slots(Booking.venue_id.in_(venue_ids)))
     
     # Poi cancella le prenotazioni
-    deleted_count = db.query(Booking).filter(
-        Booking.venue_id.in_(venue_ids)
-    ).delete(synchronize_session=False)
+    deleted_count = (await db.execute(
+        delete(Booking)
+        .where(Booking.venue_id.in_(venue_ids))
+        .execution_options(synchronize_session=False)
+    )).rowcount
     
-    db.commit()
+    await db.execute(bump_bookings_version(Venue.dj_id == current_dj.id))
+    await db.commit()
     
     return {
         "message": "Tutte le prenotazioni dei vari locali sono state eliminate",
@@ -168,61 +253,57 @@ def delete_all_bookings(
     }
 
 @router.delete("/{booking_id}")
-def delete_booking(
+async def delete_booking(
     booking_id: int,
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Elimina una prenotazione"""
-    booking = db.query(Booking).join(Venue).filter(
+    booking = await db.scalar(select(Booking).join(Venue).where(
         Booking.id == booking_id,
         Venue.dj_id == current_dj.id
-    ).first()
+    ))
     
     if not booking:
         raise HTTPException(status_code=404, detail="Prenotazione non trovata")
     
     # Se la prenotazione ha una sessione (utente), decrementa il contatore
     if booking.session_id:
-        session = db.query(Session).filter(Session.id == booking.session_id).first()
+        session = await db.get(Session, booking.session_id)
         if session:
             session.booking_count = max(0, session.booking_count - 1)
     
-    db.delete(booking)
-    db.commit()
+    await db.execute(bump_bookings_version(Venue.id == booking.venue_id))
+    await db.delete(booking)
+    await db.commit()
     
     return {"message": "Prenotazione eliminata con successo"}
 
 @router.delete("/venue/{venue_id}")
-def delete_venue_bookings(
+async def delete_venue_bookings(
     venue_id: int,
-    current_dj: DJ = Depends(get_current_dj),
-    db: DBSession = Depends(get_db)
+    current_dj: CurrentDJ = Depends(get_current_dj_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Elimina TUTTE le prenotazioni di un locale"""
-    venue = db.query(Venue).filter(
+    venue = await db.scalar(select(Venue).where(
         Venue.id == venue_id,
         Venue.dj_id == current_dj.id
-    ).first()
+    ))
     
     if not venue:
         raise HTTPException(status_code=404, detail="Locale non trovato")
     
-    # Aggiorna contatori sessioni prima di cancellare
-    sessions_to_update = db.query(Session.id, func.count(Booking.id).label('count')).join(
-        Booking, Session.id == Booking.session_id
-    ).filter(
-        Booking.venue_id == venue_id,
-        Booking.session_id.isnot(None)
-    ).group_by(Session.id).all()
+    # Aggiorna contatori sessioni prima di cancellare (un solo UPDATE ... FROM)
+    await db.execute(release_session_slots(Booking.venue_id == venue_id))
     
-    for session_id, booking_count in sessions_to_update:
-        session = db.query(Session).filter(Session.id == session_id).first()
-        if session:
-            session.booking_count = max(0, session.booking_count - booking_count)
-    
-    deleted_count = db.query(Booking).filter(Booking.venue_id == venue_id).delete()
-    db.commit()
+    deleted_count = (await db.execute(
+        delete(Booking)
+        .where(Booking.venue_id == venue_id)
+        .execution_options(synchronize_session=False)
+    )).rowcount
+    await db.execute(bump_bookings_version(Venue.id == venue_id))
+    await db.commit()
     
     return {
         "message": "Tutte le prenotazioni eliminate",
@@ -241,7 +322,7 @@ def get_session_from_cookie(request: Request) -> uuid.UUID | None:
     except ValueError:
         return None
 
-def get_current_session(request: Request, db: DBSession = Depends(get_db)) -> Session:
+async def get_current_session(request: Request, db: AsyncSession = Depends(get_async_db)) -> Session:
     """Dependency per validare sessione utente"""
     session_id = get_session_from_cookie(request)
     if not session_id:
@@ -250,7 +331,10 @@ def get_current_session(request: Request, db: DBSession = Depends(get_db)) -> Se
             detail="Sessione non trovata. Scansiona il QR code."
         )
     
-    session = db.query(Session).filter(Session.id == session_id).first()
+    session = await db.scalar(select(Session).where(
+        Session.id == session_id,
+        Session.created_within_lifetime()
+    ))
     
     if not session or session.is_expired:
         raise HTTPException(
@@ -258,40 +342,51 @@ def get_current_session(request: Request, db: DBSession = Depends(get_db)) -> Se
             detail="Sessione scaduta. Scansiona nuovamente il QR code."
         )
     
+    bind_log_context(dj_id=session.dj_id, venue_id=session.venue_id)
+    
     # Aggiorna last_activity
-    session.last_activity = datetime.utcnow()
-    db.commit()
+    session.last_activity = clock.utcnow()
+    await db.commit()
     
     return session
 
 @router.post("/user", status_code=status.HTTP_201_CREATED)
-def create_user_booking(
+async def create_user_booking(
     user_name: str,
-    song: str,
+    song: str | None = None,
     key: str = "0",
+    song_id: int | None = None,
     session: Session = Depends(get_current_session),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Crea una prenotazione da parte di un utente via bot assistant.
     Richiede sessione valida e venue attivo.
     
+    La canzone si indica con song_id (id dal catalogo pubblico, ?with_ids=true)
+    oppure con il titolo esatto in song: la prenotazione salva entrambi.
+    
     Validazioni:
     1. Rate limiting dinamico: basato su impostazioni DJ
     2. Venue della sessione ancora attivo
     3. Canzone esistente nel catalogo del DJ
     4. Sessione non scaduta
     """
-    # 1. Rate limiting dinamico basato su impostazioni DJ
-    dj = db.query(DJ).filter(DJ.id == session.dj_id).first()
-    max_bookings = dj.max_bookings_per_user if dj else 999
+    if song_id is None and not song:
+        raise HTTPException(
+            status_code=422,
+            detail="Indica la canzone (song_id o song)"
+        )
+    
+    # 1. Rate limiting dinamico basato su impostazioni DJ (con la versione del catalogo in cache)
+    max_bookings, catalog_version = await get_booking_rules(db, session.dj_id)
     
     # Solo applica il limite se non è "nessun limite" (999)
     if max_bookings < 999 and session.booking_count >= max_bookings:
         raise HTTPException(status_code=429, detail="Limite prenotazioni raggiunto")
     
     # 2. Verifica che il venue della sessione sia ancora attivo
-    venue = db.query(Venue).filter(Venue.id == session.venue_id).first()
+    venue = await get_venue_status(db, session.venue_id)
     
     if not venue or not venue.active:
         raise HTTPException(
@@ -299,20 +394,17 @@ def create_user_booking(
             detail="Il locale della tua sessione non è più attivo. Il DJ ha cambiato locale. Scansiona nuovamente il QR code."
         )
     
-    # 3. Verifica canzone nel catalogo
-    from app.models.song import Song
-    song_exists = db.query(Song).filter(
-        Song.dj_id == session.dj_id,
-        Song.file_name == song
-    ).first()
+    # 3. Verifica canzone nel catalogo (in memoria finché catalog_version non cambia)
+    catalog_song = await catalog_cache.find(db, session.dj_id, catalog_version, song_id=song_id, file_name=song)
     
-    if not song_exists:
+    if not catalog_song:
         raise HTTPException(status_code=404, detail="Canzone non trovata nel catalogo")
     
     # 4. Crea prenotazione per il venue della sessione
     new_booking = Booking(
         user_name=user_name,
-        song=song,
+        song=catalog_song.file_name,
+        song_id=catalog_song.id,
         key=key,
         status="pending",
         venue_id=session.venue_id,
@@ -321,8 +413,9 @@ def create_user_booking(
     
     db.add(new_booking)
     session.booking_count += 1
-    db.commit()
-    db.refresh(new_booking)
+    await db.execute(bump_bookings_version(Venue.id == session.venue_id))
+    await db.commit()
+    await db.refresh(new_booking)
     
     # Calcola remaining_bookings (se nessun limite, mostra 999)
     remaining_bookings = max_bookings - session.booking_count if max_bookings < 999 else 999
@@ -331,6 +424,7 @@ def create_user_booking(
         "id": new_booking.id,
         "user_name": new_booking.user_name,
         "song": new_booking.song,
+        "song_id": new_booking.song_id,
         "key": new_booking.key,
         "status": "pending",
         "venue_name": venue.name,
@@ -342,23 +436,24 @@ def create_user_booking(
     }
 
 @router.get("/user/my-bookings")
-def get_user_bookings(
+async def get_user_bookings(
+    request: Request,
+    response: Response,
     session: Session = Depends(get_current_session),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ottieni le prenotazioni dell'utente nella sessione corrente.
     Utilizza session_id per filtrare solo le prenotazioni dell'utente.
+    
+    🏷️ ETag da sessione, locale attivo, versione prenotazioni e limite: 304
+    senza leggere le prenotazioni se non è cambiato nulla.
     """
     # Rate limiting dinamico basato su impostazioni DJ
-    dj = db.query(DJ).filter(DJ.id == session.dj_id).first()
-    max_bookings = dj.max_bookings_per_user if dj else 999
+    max_bookings = await get_max_bookings_per_user(db, session.dj_id)
     
     # Recupera venue attivo
-    active_venue = db.query(Venue).filter(
-        Venue.dj_id == session.dj_id,
-        Venue.active == True
-    ).first()
+    active_venue = await get_active_venue(db, session.dj_id)
     
     # Calcola remaining_slots (se nessun limite, mostra 999)
     remaining_slots = max_bookings - session.booking_count if max_bookings < 999 else 999
@@ -370,11 +465,17 @@ def get_user_bookings(
             "message": "Nessun locale attivo"
         }
     
-    # Filtra per session_id invece che per created_at
-    bookings = db.query(Booking).filter(
-        Booking.session_id == session.id,
-        Booking.venue_id == active_venue.id
-    ).order_by(Booking.created_at.desc()).all()
+    # La sessione è nell'ETag: un nuovo QR sullo stesso browser non riusa la lista della precedente
+    etag = make_etag(
+        "my-bookings", session.id.hex[:12], active_venue.id, active_venue.bookings_version,
+        max_bookings, session.booking_count
+    )
+    if (cached := not_modified(request, etag)):
+        return cached
+    response.headers.update(etag_headers(etag))
+    
+    # Filtra per session_id invece che per created_at (proiezione, niente entità Booking)
+    bookings = await get_session_bookings(db, session, active_venue.id)
     
     return {
         "bookings": [
@@ -382,6 +483,7 @@ def get_user_bookings(
                 "id": b.id,
                 "user_name": b.user_name,
                 "song": b.song,
+                "song_id": b.song_id,
                 "key": b.key,
                 "status": b.status,
                 "created_at": b.created_at,
@@ -394,10 +496,10 @@ def get_user_bookings(
     }
 
 @router.delete("/user/{booking_id}")
-def delete_user_booking(
+async def delete_user_booking(
     booking_id: int,
     session: Session = Depends(get_current_session),
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Permette all'utente di cancellare una sua prenotazione.
@@ -411,21 +513,20 @@ def delete_user_booking(
         booking_id: ID della prenotazione da cancellare
         session: Sessione utente validata
         db: Database session
-        
+    
     Returns:
         dict: Messaggio di conferma + booking_count aggiornato
-        
+    
     Raises:
         HTTPException:
             - 404: Prenotazione non trovata o non appartiene all'utente
             - 400: Venue non più attivo
     """
     # Rate limiting dinamico basato su impostazioni DJ
-    dj = db.query(DJ).filter(DJ.id == session.dj_id).first()
-    max_bookings = dj.max_bookings_per_user if dj else 999
+    max_bookings = await get_max_bookings_per_user(db, session.dj_id)
     
     # Verifica venue ancora attivo
-    venue = db.query(Venue).filter(Venue.id == session.venue_id).first()
+    venue = await get_venue_status(db, session.venue_id)
     if not venue or not venue.active:
         raise HTTPException(
             status_code=400,
@@ -433,10 +534,11 @@ def delete_user_booking(
         )
     
     # Trova prenotazione della sessione corrente
-    booking = db.query(Booking).filter(
+    booking = await db.scalar(select(Booking).where(
         Booking.id == booking_id,
-        Booking.session_id == session.id
-    ).first()
+        Booking.session_id == session.id,
+        Booking.created_at >= session.created_at
+    ))
     
     if not booking:
         raise HTTPException(
@@ -445,12 +547,13 @@ def delete_user_booking(
         )
     
     # Elimina prenotazione
-    db.delete(booking)
+    await db.delete(booking)
+    await db.execute(bump_bookings_version(Venue.id == booking.venue_id))
     
     # Decrementa contatore sessione
     session.booking_count = max(0, session.booking_count - 1)
     
-    db.commit()
+    await db.commit()
     
     # Calcola remaining_bookings (se nessun limite, mostra 999)
     remaining_bookings = max_bookings - session.booking_count if max_bookings < 999 else 999
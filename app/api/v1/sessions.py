@@ -1,20 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.responses import RedirectResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session as DBSession
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
 from typing import Optional
 import uuid
 
-from app.database import get_db
-from app.models.dj import DJ
-from app.models.venue import Venue
+from app.database import get_db, get_async_db
+from app.api.deps import client_ip, require_maintenance_token
+from app.models.booking import Booking
 from app.models.session import Session
+from app.models.venue import Venue
 from app.schemas.session import SessionCreate, SessionResponse, SessionValidation
+from app.core import clock
+from app.core.config import settings
+from app.core.logging_config import bind_log_context
+from app.core.partitioning import apply_retention, ensure_partitions, is_partitioned
+from app.crud.projections import get_active_venue, get_public_dj, get_public_dj_by_id, get_venue_status
+from app.crud.versions import bump_bookings_version
 
 router = APIRouter()
 
 # Configurazione durata sessione
-SESSION_DURATION_HOURS = 6
+SESSION_DURATION_HOURS = settings.SESSION_DURATION_HOURS
 
 # ==================== HELPER FUNCTIONS ====================
 
@@ -44,39 +53,39 @@ def get_session_from_cookie(request: Request) -> Optional[uuid.UUID]:
 # ==================== ENDPOINTS ====================
 
 @router.get("/qr-flow/{qr_code_id}")
-def qr_flow(qr_code_id: str, request: Request, db: DBSession = Depends(get_db)):
+async def qr_flow(qr_code_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint unificato per gestione flusso QR.
     Decide se redirect, welcome o error.
     """
-    # 1. Verifica DJ esiste
-    dj = db.query(DJ).filter(DJ.qr_code_id == qr_code_id).first()
+    # 1. Verifica DJ esiste (solo id, stage_name, qr_code_id)
+    dj = await get_public_dj(db, qr_code_id)
     if not dj:
         return {"action": "error", "error_type": "qr_not_found"}
     
     # 2. Verifica venue attivo
-    active_venue = db.query(Venue).filter(
-        Venue.dj_id == dj.id,
-        Venue.active == True
-    ).first()
+    active_venue = await get_active_venue(db, dj.id)
     
     if not active_venue:
         return {"action": "error", "error_type": "no_active_venue"}
     
+    bind_log_context(dj_id=dj.id, venue_id=active_venue.id)
+    
     # 3. Controlla sessione esistente
     session_id = get_session_from_cookie(request)
     
     if session_id:
-        session = db.query(Session).filter(
+        session = await db.scalar(select(Session).where(
             Session.id == session_id,
             Session.dj_id == dj.id,
             Session.venue_id == active_venue.id,
-            Session.expires_at > datetime.utcnow()
-        ).first()
+            Session.expires_at > clock.utcnow(),
+            Session.created_within_lifetime()
+        ))
         
         if session:
-            session.last_activity = datetime.utcnow()
-            db.commit()
+            session.last_activity = clock.utcnow()
+            await db.commit()
             return {"action": "redirect", "session_id": str(session.id)}
     
     # 4. Nessuna sessione valida → Welcome
@@ -97,40 +106,39 @@ def qr_flow(qr_code_id: str, request: Request, db: DBSession = Depends(get_db)):
     }
 
 @router.post("/create/{qr_code_id}")
-def create_session(
+async def create_session(
     qr_code_id: str, 
     request: Request, 
     response: Response,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Crea nuova sessione dopo accettazione utente.
     """
     # Verifica DJ e venue (stesso codice del qr-flow)
-    dj = db.query(DJ).filter(DJ.qr_code_id == qr_code_id).first()
+    dj = await get_public_dj(db, qr_code_id)
     if not dj:
         raise HTTPException(status_code=404, detail="DJ non trovato")
     
-    active_venue = db.query(Venue).filter(
-        Venue.dj_id == dj.id,
-        Venue.active == True
-    ).first()
+    active_venue = await get_active_venue(db, dj.id)
     
     if not active_venue:
         raise HTTPException(status_code=400, detail="Nessun locale attivo")
     
+    bind_log_context(dj_id=dj.id, venue_id=active_venue.id)
+    
     # Crea nuova sessione
     new_session = Session(
         dj_id=dj.id,
         venue_id=active_venue.id,
-        expires_at=datetime.utcnow() + timedelta(hours=SESSION_DURATION_HOURS),
+        expires_at=clock.utcnow() + timedelta(hours=SESSION_DURATION_HOURS),
         user_agent=request.headers.get("user-agent"),
-        ip_address=request.client.host if request.client else None
+        ip_address=client_ip(request)
     )
     
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.commit()
+    await db.refresh(new_session)
     
     # Setta cookie
     set_session_cookie(response, new_session.id)
@@ -138,20 +146,20 @@ def create_session(
     return {"session_id": str(new_session.id)}
 
 @router.get("/validate")
-def validate_session(request: Request, db: DBSession = Depends(get_db)):
+async def validate_session(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Valida una sessione esistente.
     Usato dal bot assistant per verificare l'accesso.
     
     Validazioni:
     1. Presenza cookie session_id
-    2. Esistenza sessione in database
-    3. Sessione non scaduta (< 6 ore)
+    2. Esistenza sessione in database, creata da meno di 6 ore
+    3. Sessione non scaduta
     4. Venue della sessione ancora attivo
     
     Returns:
         dict: Dati sessione valida con info DJ e venue
-        
+    
     Raises:
         HTTPException: 401 per sessioni invalide/scadute, 400 per venue inattivo
     """
@@ -163,23 +171,22 @@ def validate_session(request: Request, db: DBSession = Depends(get_db)):
             detail="Sessione non trovata. Scansiona il QR code del DJ"
         )
     
-    session = db.query(Session).filter(Session.id == session_id).first()
+    # Filtro su created_at: sulle tabelle partizionate legge solo le partizioni recenti
+    session = await db.scalar(select(Session).where(
+        Session.id == session_id,
+        Session.created_within_lifetime()
+    ))
     
-    if not session:
+    if not session or session.is_expired:
         raise HTTPException(
             status_code=401,
-            detail="Sessione non trovata. Scansiona il QR code."
+            detail="Sessione scaduta o non trovata (6 ore). Scansiona nuovamente il QR code."
         )
     
-    # Verifica scadenza
-    if session.is_expired:
-        raise HTTPException(
-            status_code=401,
-            detail="Sessione scaduta (6 ore). Scansiona nuovamente il QR code."
-        )
+    bind_log_context(dj_id=session.dj_id, venue_id=session.venue_id)
     
     # Verifica che il venue della sessione sia ancora attivo
-    venue = db.query(Venue).filter(Venue.id == session.venue_id).first()
+    venue = await get_venue_status(db, session.venue_id)
     
     if not venue or not venue.active:
         raise HTTPException(
@@ -188,10 +195,10 @@ def validate_session(request: Request, db: DBSession = Depends(get_db)):
         )
     
     # Aggiorna last_activity
-    session.last_activity = datetime.utcnow()
-    db.commit()
+    session.last_activity = clock.utcnow()
+    await db.commit()
     
-    dj = db.query(DJ).filter(DJ.id == session.dj_id).first()
+    dj = await get_public_dj_by_id(db, session.dj_id)
     
     # Ritorna dati sessione valida
     return {
@@ -211,19 +218,41 @@ def validate_session(request: Request, db: DBSession = Depends(get_db)):
         "remaining_minutes": session.remaining_minutes
     }
 
-@router.get("/cleanup")
+@router.get("/cleanup", dependencies=[Depends(require_maintenance_token)])
 def cleanup_expired_sessions(db: DBSession = Depends(get_db)):
     """
     Endpoint per cleanup manuale delle sessioni scadute.
-    In produzione dovrebbe essere chiamato da un cronjob.
+    In produzione viene chiamato dal cron (.github/workflows/cleanup-sessions.yml)
+    con l'header X-Maintenance-Token: esegue DDL sulle partizioni, non è pubblico.
+    
+    Applica anche la retention di bookings/sessions (DATA_RETENTION_MONTHS):
+    su PostgreSQL partizionato le sessioni scadute restano nella loro partizione
+    mensile e vengono eliminate con il DROP della partizione, senza DELETE.
+    Crea anche le partizioni dei prossimi mesi (non più all'avvio dell'app).
     """
+    ensure_partitions(db.get_bind())
+    
+    conn = db.connection()
+    
+    deleted_count = 0
+    venue_ids = set()
+    if not is_partitioned(conn, "sessions"):
+        expired = Session.expires_at < clock.utcnow()
+        venue_ids.update(db.scalars(
+            select(Booking.venue_id).where(Booking.session_id.in_(select(Session.id).where(expired))).distinct()
+        ))
+        deleted_count = db.query(Session).filter(expired).delete()
+    
+    retention = apply_retention(conn)
+    venue_ids.update(retention["venue_ids"])
     
-    deleted_count = db.query(Session).filter(
-        Session.expires_at < datetime.utcnow()
-    ).delete()
+    # Prenotazioni eliminate o senza più sessione: invalida gli ETag delle liste dei soli locali coinvolti
+    if venue_ids:
+        db.execute(bump_bookings_version(Venue.id.in_(venue_ids)))
     db.commit()
     
     return {
         "message": f"{deleted_count} sessioni scadute eliminate",
-        "deleted": deleted_count
+        "deleted": deleted_count,
+        "dropped_partitions": retention["dropped_partitions"]
     }
\ No newline at end of file
@@ -1,35 +1,65 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, func, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app.models.booking import Booking
 from app.models.song import Song
-from app.models.dj import DJ
+from app.models.venue import Venue
 from app.models.session import Session
 from app.schemas.song import SongCreate, SongBulkCreate, SongResponse, SongListResponse
 from app.api.deps import get_current_dj
+from app.crud.projections import CurrentDJ, count_songs, get_public_dj, search_song_names, search_songs
+from app.crud.versions import bump_bookings_version, bump_catalog_version
+from app.core import clock
 
 from fastapi import Request, Query
-from datetime import datetime
 import uuid
 
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from io import BytesIO
 import pandas as pd
 
 router = APIRouter()
 
-@router.get("", response_model=SongListResponse)
+# ==================== HELPER FUNCTIONS ====================
+
+def unlink_bookings(*booking_filters):
+    """
+    Prenotazioni delle canzoni che stanno per essere eliminate: song_id a NULL,
+    il titolo resta. Su PostgreSQL lo fa già la FK (ON DELETE SET NULL), su
+    SQLite le FK non sono applicate: l'id potrebbe poi finire a un'altra canzone.
+    Va eseguito con bump_bookings_version dei locali del DJ: le liste
+    prenotazioni (con ETag) mostrano song_id.
+    """
+    return (
+        update(Booking)
+        .where(*booking_filters)
+        .values(song_id=None)
+        .execution_options(synchronize_session=False)
+    )
+
+# ==================== CATALOGO DJ ====================
+
+@router.get("", response_model=SongListResponse, response_class=ORJSONResponse)
 def get_songs(
     search: Optional[str] = Query(None, description="Cerca nel nome della canzone"),
     page: int = Query(1, ge=1, description="Numero pagina"),
     per_page: int = Query(50, ge=1, le=1000, description="Canzoni per pagina"),
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
-    """Ottieni tutte le canzoni del catalogo con paginazione e ricerca"""
+    """
+    Ottieni tutte le canzoni del catalogo con paginazione e ricerca.
+    
+    ⚡ Pagine fino a 1000 canzoni: solo (id, file_name), serializzate
+    direttamente con orjson senza oggetti ORM né validazione Pydantic.
+    """
     
     # Query base con ordinamento alfabetico
-    query = db.query(Song).filter(Song.dj_id == current_dj.id).order_by(Song.file_name)
+    query = db.query(Song.id, Song.file_name).filter(Song.dj_id == current_dj.id).order_by(Song.file_name)
     
     # Applica filtro ricerca se presente
     if search:
@@ -40,15 +70,15 @@ def get_songs(
         # Per ricerche: limita count per performance
         max_search_results = 1000
         
-        # Conta fino a max_search_results + 1 per sapere se ci sono di più
-        count_query = query.limit(max_search_results + 1)
-        limited_results = count_query.all()
+        # Conta fino a max_search_results + 1 per sapere se ci sono di più (COUNT nel DB, nessuna riga caricata)
+        matches = query.with_entities(Song.id).order_by(None).limit(max_search_results + 1).subquery()
+        found = db.query(func.count()).select_from(matches).scalar()
         
-        if len(limited_results) > max_search_results:
+        if found > max_search_results:
             total = max_search_results
             limited = True
         else:
-            total = len(limited_results) 
+            total = found
             limited = False
     else:
         # Catalogo completo: count normale (veloce su indice dj_id)
@@ -62,20 +92,20 @@ def get_songs(
     max_page = min(page, pages) if pages > 0 else 1
     
     # Recupera solo la pagina richiesta
-    songs = query.offset((max_page - 1) * per_page).limit(per_page).all()
+    rows = query.offset((max_page - 1) * per_page).limit(per_page).all()
     
-    return {
-        "songs": songs,
+    return ORJSONResponse({
+        "songs": [{"id": song_id, "file_name": file_name} for song_id, file_name in rows],
         "total": total,
         "pages": pages,
         "current_page": max_page,
         "limited": limited
-    }
+    })
 
 @router.post("", response_model=SongResponse, status_code=status.HTTP_201_CREATED)
 def add_song(
     song_data: SongCreate,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Aggiungi una singola canzone al catalogo"""
@@ -85,7 +115,16 @@ def add_song(
     )
     
     db.add(new_song)
-    db.commit()
+    db.execute(bump_catalog_version(current_dj.id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Indice uq_songs_dj_file_name: un titolo per DJ
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Canzone già presente nel catalogo"
+        )
     db.refresh(new_song)
     
     return new_song
@@ -93,23 +132,33 @@ def add_song(
 @router.post("/bulk", status_code=status.HTTP_201_CREATED)
 def bulk_add_songs(
     bulk_data: SongBulkCreate,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
-    """Aggiungi multiple canzoni in una volta (importazione massiva)"""
-    songs = [Song(file_name=song, dj_id=current_dj.id) for song in bulk_data.songs]
+    """
+    Aggiungi multiple canzoni in una volta (importazione massiva).
+    
+    I titoli già nel catalogo o ripetuti nella lista vengono saltati
+    (indice uq_songs_dj_file_name): count sono le canzoni aggiunte davvero.
+    """
+    existing = {name for (name,) in db.query(Song.file_name).filter(Song.dj_id == current_dj.id)}
+    new_names = [name for name in dict.fromkeys(bulk_data.songs) if name not in existing]
+    
+    songs = [Song(file_name=song, dj_id=current_dj.id) for song in new_names]
     db.bulk_save_objects(songs)
+    db.execute(bump_catalog_version(current_dj.id))
     db.commit()
     
     return {
-        "message": f"{len(bulk_data.songs)} canzoni aggiunte con successo",
-        "count": len(bulk_data.songs)
+        "message": f"{len(new_names)} canzoni aggiunte con successo",
+        "count": len(new_names),
+        "skipped": len(bulk_data.songs) - len(new_names)
     }
 
 @router.delete("/{song_id}")
 def delete_song(
     song_id: int,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Elimina una canzone dal catalogo"""
@@ -121,18 +170,24 @@ def delete_song(
     if not song:
         raise HTTPException(status_code=404, detail="Canzone non trovata")
     
+    db.execute(unlink_bookings(Booking.song_id == song.id))
+    db.execute(bump_bookings_version(Venue.dj_id == current_dj.id))
     db.delete(song)
+    db.execute(bump_catalog_version(current_dj.id))
     db.commit()
     
     return {"message": "Canzone eliminata con successo"}
 
 @router.delete("")
 def clear_catalog(
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Elimina TUTTE le canzoni dal catalogo"""
+    db.execute(unlink_bookings(Booking.song_id.in_(select(Song.id).where(Song.dj_id == current_dj.id))))
+    db.execute(bump_bookings_version(Venue.dj_id == current_dj.id))
     deleted_count = db.query(Song).filter(Song.dj_id == current_dj.id).delete()
+    db.execute(bump_catalog_version(current_dj.id))
     db.commit()
     
     return {
@@ -141,12 +196,13 @@ def clear_catalog(
     }
 
 @router.get("/public/{qr_code_id}")
-def get_public_catalog(
+async def get_public_catalog(
     qr_code_id: str,
     search: Optional[str] = None,
     limit: int = Query(50, le=1000),
+    with_ids: bool = False,  # canzoni come {id, file_name}: l'id va passato a POST /bookings/user
     request: Request = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ottieni il catalogo pubblico di un DJ (per bot assistant).
@@ -158,16 +214,15 @@ def get_public_catalog(
     
     # 1. Valida sessione (opzionale ma consigliato per sicurezza)
     session_id_str = request.cookies.get("session_id") if request else None
-
-    print(session_id_str)
     
     if session_id_str:
         try:
             session_id = uuid.UUID(session_id_str)
-            session = db.query(Session).filter(
+            session = await db.scalar(select(Session.id).where(
                 Session.id == session_id,
-                Session.expires_at > datetime.utcnow()
-            ).first()
+                Session.expires_at > clock.utcnow(),
+                Session.created_within_lifetime()
+            ))
             
             if not session:
                 raise HTTPException(
@@ -178,29 +233,27 @@ def get_public_catalog(
             raise HTTPException(status_code=401, detail="Session ID non valido")
     
     # 2. Trova DJ
-    dj = db.query(DJ).filter(DJ.qr_code_id == qr_code_id).first()
+    dj = await get_public_dj(db, qr_code_id)
     if not dj:
         raise HTTPException(status_code=404, detail="DJ non trovato")
     
-    # 3. Query canzoni
-    query = db.query(Song).filter(Song.dj_id == dj.id)
-    
-    if search:
-        query = query.filter(Song.file_name.ilike(f"%{search}%"))
-    
-    songs = query.limit(limit).all()
+    # 3. Query canzoni: solo file_name (e id con with_ids), niente entità Song
+    # 4. Ritorna i nomi dei file, con gli ID solo se richiesti
+    if with_ids:
+        songs = [{"id": song_id, "file_name": file_name} for song_id, file_name in await search_songs(db, dj.id, search, limit)]
+    else:
+        songs = await search_song_names(db, dj.id, search, limit)
     
-    # 4. Ritorna solo i nomi dei file (non gli ID)
     return {
-        "songs": [song.file_name for song in songs],
-        "total": db.query(Song).filter(Song.dj_id == dj.id).count(),
+        "songs": songs,
+        "total": await count_songs(db, dj.id),
         "dj_name": dj.stage_name
     }
 
 @router.post("/generate-excel")
 async def generate_excel_from_song_list(
     songs: dict,  # {"songs": ["song1.mp3", "song2.mp3", ...]}
-    current_dj: DJ = Depends(get_current_dj)
+    current_dj: CurrentDJ = Depends(get_current_dj)
 ):
     """
     Genera file Excel da lista di canzoni.
@@ -2,6 +2,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
 from app.core.email_service import send_email
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -50,6 +53,6 @@ async def send_suggestion(suggestion: SuggestionRequest):
         else:
             raise HTTPException(status_code=500, detail="Errore nell'invio dell'email")
             
-    except Exception as e:
-        print(f"Errore invio suggerimento: {e}")
+    except Exception:
+        logger.exception("Errore invio suggerimento")
         raise HTTPException(status_code=500, detail="Errore interno del server")
\ No newline at end of file
@@ -1,20 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
 from app.models.venue import Venue
-from app.models.dj import DJ
 from app.schemas.venue import VenueCreate, VenueUpdate, VenueResponse
 from app.api.deps import get_current_dj
+from app.crud.projections import CurrentDJ
+from app.crud.versions import bump_bookings_version, bump_dj_version
+from app.core.etag import etag_headers, make_etag, not_modified
 
 router = APIRouter()
 
 @router.get("", response_model=List[VenueResponse])
 def get_venues(
-    current_dj: DJ = Depends(get_current_dj),
+    request: Request,
+    response: Response,
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
-    """Ottieni tutti i locali del DJ"""
+    """
+    Ottieni tutti i locali del DJ.
+    
+    🏷️ ETag dalla versione del DJ (già letta dall'autenticazione): 304 senza query sui locali.
+    """
+    etag = make_etag("venues", current_dj.id, current_dj.version)
+    if (cached := not_modified(request, etag)):
+        return cached
+    response.headers.update(etag_headers(etag))
+    
     # venues = db.query(Venue).filter(Venue.dj_id == current_dj.id).all()
     venues = db.query(Venue).filter(
         Venue.dj_id == current_dj.id
@@ -27,7 +40,7 @@ def get_venues(
 @router.post("", response_model=VenueResponse, status_code=status.HTTP_201_CREATED)
 def create_venue(
     venue_data: VenueCreate,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Crea un nuovo locale"""
@@ -40,6 +53,7 @@ def create_venue(
     )
     
     db.add(new_venue)
+    db.execute(bump_dj_version(current_dj.id))
     db.commit()
     db.refresh(new_venue)
     
@@ -49,7 +63,7 @@ def create_venue(
 def update_venue(
     venue_id: int,
     venue_data: VenueUpdate,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Aggiorna un locale"""
@@ -63,6 +77,8 @@ def update_venue(
     
     if venue_data.name is not None:
         venue.name = venue_data.name
+        # Il nome è nelle liste prenotazioni (venue_name): invalida i loro ETag
+        db.execute(bump_bookings_version(Venue.id == venue.id))
     if venue_data.address is not None:
         venue.address = venue_data.address
     if venue_data.capacity is not None:
@@ -70,6 +86,7 @@ def update_venue(
     if venue_data.notes is not None:
         venue.notes = venue_data.notes
     
+    db.execute(bump_dj_version(current_dj.id))
     db.commit()
     db.refresh(venue)
     
@@ -78,7 +95,7 @@ def update_venue(
 @router.post("/{venue_id}/toggle")
 def toggle_venue(
     venue_id: int,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Attiva/Disattiva un locale (serata)"""
@@ -95,6 +112,7 @@ def toggle_venue(
         db.query(Venue).filter(Venue.dj_id == current_dj.id).update({"active": False})
     
     venue.active = not venue.active
+    db.execute(bump_dj_version(current_dj.id))
     db.commit()
     
     return {"active": venue.active, "message": "Serata attivata" if venue.active else "Serata disattivata"}
@@ -102,7 +120,7 @@ def toggle_venue(
 @router.delete("/{venue_id}")
 def delete_venue(
     venue_id: int,
-    current_dj: DJ = Depends(get_current_dj),
+    current_dj: CurrentDJ = Depends(get_current_dj),
     db: Session = Depends(get_db)
 ):
     """Elimina un locale"""
@@ -115,6 +133,7 @@ def delete_venue(
         raise HTTPException(status_code=404, detail="Locale non trovato")
     
     db.delete(venue)
+    db.execute(bump_dj_version(current_dj.id))
     db.commit()
     
     return {"message": "Locale eliminato con successo"}
\ No newline at end of file
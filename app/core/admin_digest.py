@@ -0,0 +1,132 @@
+"""
+Notifiche admin a digest: una email ogni ADMIN_DIGEST_WINDOW_SECONDS invece di
+una per evento.
+
+Registrazione, reset password ed eliminazione account accodano un evento in
+memoria (nessuna chiamata esterna durante la richiesta): ogni azione utente
+costa al massimo una chiamata all'API email, quella verso l'utente. Un task
+per worker, avviato nel lifespan, invia gli eventi accodati in un'unica email
+a ogni finestra e allo shutdown.
+
+    notify("registration", dj_email, stage_name, full_name, link=verification_url)
+
+- ADMIN_DIGEST_WINDOW_SECONDS=0: niente digest, una email per evento (come prima)
+- ADMIN_DIGEST_MAX_EVENTS: eventi tenuti in coda; oltre si scartano i più vecchi
+- invio fallito (anche in background, dopo i ritentativi del trasporto): gli
+  eventi tornano in coda per la finestra successiva tramite on_failure
+
+La coda è per worker e in memoria: un kill -9 perde gli eventi non ancora inviati.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple
+
+from app.core import clock, health
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdminEvent(NamedTuple):
+    kind: str  # registration | password_reset | account_deletion
+    at: datetime
+    dj_email: str
+    stage_name: str
+    full_name: str = ""
+    link: str = ""
+
+
+_events: deque[AdminEvent] = deque(maxlen=settings.ADMIN_DIGEST_MAX_EVENTS)
+# Gli endpoint sync accodano dal threadpool, il flush svuota dal task del worker
+_lock = threading.Lock()
+
+_task: asyncio.Task | None = None
+_stop: asyncio.Event | None = None
+
+
+def enabled() -> bool:
+    return settings.ADMIN_DIGEST_WINDOW_SECONDS > 0
+
+def notify(kind: str, dj_email: str, stage_name: str, full_name: str = "", link: str = ""):
+    """Accoda una notifica admin per il prossimo digest"""
+    with _lock:
+        _events.append(AdminEvent(kind, clock.utcnow(), dj_email, stage_name, full_name, link))
+
+def pending() -> int:
+    return len(_events)
+
+def clear():
+    with _lock:
+        _events.clear()
+
+def flush() -> int:
+    """
+    Invia gli eventi accodati in un'unica email (bloccante solo se il thread di invio non c'è).
+    Ritorna il numero di eventi passati al trasporto: se la consegna fallisce tornano in coda.
+    """
+    # Import locale: email_service importa questo modulo
+    from app.core import email_service
+    from app.core.email_templates import admin_digest_template
+    
+    with _lock:
+        events = list(_events)
+        _events.clear()
+    if not events:
+        return 0
+    
+    subject, html_body, text_body = admin_digest_template(events)
+    accepted = email_service.send_email(
+        settings.EMAIL_FROM, subject, html_body, text_body,
+        on_failure=lambda message: _requeue(events)
+    )
+    return len(events) if accepted else 0
+
+def _requeue(events: list[AdminEvent]):
+    """API email non disponibile: si riprova alla prossima finestra (maxlen scarta i più vecchi)"""
+    with _lock:
+        newer = list(_events)
+        _events.clear()
+        _events.extend(events + newer)
+    logger.warning("Digest admin non inviato, eventi rimessi in coda", extra={"events": len(events)})
+
+
+# ==================== TASK DEL WORKER ====================
+
+async def _run(stop: asyncio.Event, window: float):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=window)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            # Ultimo giro dopo stop: svuota la coda prima che il worker termini
+            await asyncio.to_thread(flush)
+        except Exception:
+            logger.exception("Errore invio digest admin")
+        health.heartbeat("admin_digest")
+
+def start():
+    """Avvia il task del digest (lifespan). No-op se il digest è disattivato"""
+    global _task, _stop
+    if not enabled() or _task is not None:
+        return
+    
+    window = settings.ADMIN_DIGEST_WINDOW_SECONDS
+    health.register_queue("admin_digest", pending, max_backlog=settings.ADMIN_DIGEST_MAX_EVENTS)
+    health.register_heartbeat("admin_digest", max_age_seconds=window * 3)
+    _stop = asyncio.Event()
+    _task = asyncio.create_task(_run(_stop, window))
+
+async def stop():
+    """Ferma il task dopo un ultimo flush (shutdown del worker)"""
+    global _task, _stop
+    if _task is None:
+        return
+    
+    _stop.set()
+    await _task
+    _task = _stop = None
+    health.unregister("admin_digest")
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Catalogo del DJ in memoria per la verifica della canzone in prenotazione.
+
+Ogni prenotazione controllava con una query su songs che la canzone fosse nel
+catalogo del DJ. Il worker tiene invece le canzoni di ogni DJ in memoria
+(titolo → id e id → titolo), valide finché DJ.catalog_version non cambia:
+    
+    rules = await get_booking_rules(db, dj_id)  # la query che la prenotazione fa già
+    song = await catalog_cache.find(db, dj_id, rules.catalog_version, song_id=song_id)  # SongRef | None
+
+- ogni scrittura sul catalogo (app/api/v1/songs.py) incrementa catalog_version
+  nella stessa transazione (bump_catalog_version): la versione è letta insieme
+  al limite prenotazioni, quindi anche gli altri worker ricaricano i titoli
+  alla prima prenotazione dopo la modifica
+- dizionari esatti e non filtro di Bloom: nessun falso positivo da ricontrollare
+  sul database, e l'id della canzone per bookings.song_id
+- memoria: circa 220 byte per titolo (due dizionari più stringhe e interi),
+  cioè ~11 MB per un catalogo da 50.000 titoli. Il limite vero è
+  CATALOG_CACHE_MAX_TOTAL_SONGS, titoli in memoria per worker sommando tutti i
+  DJ: 200.000 ≈ 45 MB per worker (moltiplicare per i worker di gunicorn)
+- escono i cataloghi caricati meno di recente quando si supera il totale o
+  CATALOG_CACHE_MAX_DJS; oltre CATALOG_CACHE_MAX_SONGS titoli il catalogo di
+  un DJ non viene tenuto in memoria e la verifica resta una ricerca
+  sull'indice uq_songs_dj_file_name
+"""
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.projections import SongRef, find_song, get_catalog
+
+
+class _Catalog(NamedTuple):
+    version: int
+    by_name: dict[str, int] | None  # None: catalogo troppo grande, si interroga l'indice
+    by_id: dict[int, str] | None
+    
+    @property
+    def songs(self) -> int:
+        return len(self.by_name) if self.by_name is not None else 0
+
+_catalogs: OrderedDict[int, _Catalog] = OrderedDict()
+_cached_songs = 0
+_lock = threading.Lock()
+
+
+async def find(db: AsyncSession, dj_id: int, catalog_version: int, song_id: int | None = None, file_name: str | None = None) -> SongRef | None:
+    """Canzone del catalogo del DJ per id o per titolo: query solo se la versione è cambiata"""
+    catalog = _catalogs.get(dj_id)
+    if catalog is None or catalog.version != catalog_version:
+        songs = await get_catalog(db, dj_id, limit=settings.CATALOG_CACHE_MAX_SONGS + 1)
+        if len(songs) > settings.CATALOG_CACHE_MAX_SONGS:
+            catalog = _Catalog(catalog_version, None, None)
+        else:
+            catalog = _Catalog(
+                catalog_version,
+                {song.file_name: song.id for song in songs},
+                {song.id: song.file_name for song in songs}
+            )
+        _remember(dj_id, catalog)
+    
+    if catalog.by_name is None:
+        return await find_song(db, dj_id, song_id=song_id, file_name=file_name)
+    if song_id is not None:
+        name = catalog.by_id.get(song_id)
+        return SongRef(song_id, name) if name is not None else None
+    found = catalog.by_name.get(file_name)
+    return SongRef(found, file_name) if found is not None else None
+
+def _remember(dj_id: int, catalog: _Catalog):
+    global _cached_songs
+    with _lock:
+        previous = _catalogs.pop(dj_id, None)
+        if previous is not None:
+            _cached_songs -= previous.songs
+        _catalogs[dj_id] = catalog
+        _cached_songs += catalog.songs
+        # Oltre i limiti si scartano i cataloghi caricati meno di recente (vengono ricaricati alla prossima prenotazione)
+        while len(_catalogs) > 1 and (
+            len(_catalogs) > settings.CATALOG_CACHE_MAX_DJS
+            or _cached_songs > settings.CATALOG_CACHE_MAX_TOTAL_SONGS
+        ):
+            _, evicted = _catalogs.popitem(last=False)
+            _cached_songs -= evicted.songs
+
+def cached_songs() -> int:
+    """Titoli in memoria nel worker, tutti i DJ"""
+    return _cached_songs
+
+def forget(dj_id: int):
+    """Account eliminato: l'id può essere riusato (SQLite) con catalog_version ripartito da 0"""
+    global _cached_songs
+    with _lock:
+        catalog = _catalogs.pop(dj_id, None)
+        if catalog is not None:
+            _cached_songs -= catalog.songs
+
+def clear():
+    global _cached_songs
+    with _lock:
+        _catalogs.clear()
+        _cached_songs = 0
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+Orologio dell'applicazione (UTC naive, come le colonne DateTime dei modelli).
+
+Scadenza delle sessioni e timestamp di sessioni/prenotazioni passano da qui:
+nei test il tempo si sposta in avanti senza time.sleep.
+
+    clock.advance(hours=6, minutes=1)  # la sessione è scaduta
+    clock.reset()
+"""
+from datetime import datetime, timedelta
+
+_offset = timedelta(0)
+
+
+def utcnow() -> datetime:
+    return datetime.utcnow() + _offset
+
+def advance(**delta):
+    """Sposta l'orologio in avanti (argomenti di timedelta)"""
+    global _offset
+    _offset += timedelta(**delta)
+
+def reset():
+    global _offset
+    _offset = timedelta(0)
\ No newline at end of file
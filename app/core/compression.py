@@ -0,0 +1,122 @@
+"""
+Compressione delle risposte (brotli / gzip) per catalogo e liste prenotazioni.
+
+Il JSON di catalogo (fino a 1000 canzoni) e prenotazioni è molto ripetitivo e
+va a telefoni su Wi-Fi del locale o rete mobile: compresso è 8-30 volte più
+piccolo. CompressionMiddleware (ASGI puro) comprime solo se:
+- il client accetta br o gzip (br preferito),
+- la risposta è testuale (JSON, text/*, ...) e non è già codificata,
+- il corpo arriva in un solo messaggio (niente streaming: file statici, SSE)
+  ed è almeno COMPRESSION_MIN_SIZE byte.
+
+Livelli: COMPRESSION_GZIP_LEVEL (1-9) e COMPRESSION_BROTLI_QUALITY (0-11).
+Default gzip 1 / brotli 4 (benchmarks/micro/test_compression.py): gzip 6-9 costa
+2-6 volte la CPU per pochi byte in meno, brotli oltre 4 non comprime meglio questi payload.
+"""
+import gzip
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Stati senza corpo: nessuna codifica da dichiarare
+_NO_BODY_STATUS = {204, 304}
+
+
+def accepted_encoding(accept_encoding: str) -> str | None:
+    """Codifica scelta dall'header Accept-Encoding: "br", "gzip" o None (q=0 esclude)"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    
+    for encoding in ("br", "gzip"):
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, mode=brotli.MODE_TEXT, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI: comprime le risposte testuali complete oltre la soglia"""
+    
+    def __init__(self, app, minimum_size: int | None = None, gzip_level: int | None = None,
+                 brotli_quality: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start = None
+        passthrough = False
+        
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            # Primo (e di solito unico) messaggio del corpo: si decide qui
+            passthrough = True
+            start["headers"] = list(start.get("headers", []))
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            
+            if start["status"] in _NO_BODY_STATUS or not _compressible(headers):
+                await send(start)
+                await send(message)
+                return
+            
+            headers.add_vary_header("Accept-Encoding")
+            
+            # Streaming o corpo piccolo: così com'è
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(start)
+                await send(message)
+                return
+            
+            body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, send_wrapper)
\ No newline at end of file
@@ -9,16 +9,81 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Karaokati API"
     VERSION: str = "1.0.0"
     API_V1_PREFIX: str = "/api/v1"
+    STATIC_DIR: str = os.getenv("STATIC_DIR", "static")
     
     # === DATABASE ===
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
-    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
-    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Pool: 0 / -1 = calcolati da WEB_CONCURRENCY e DB_MAX_CONNECTIONS (vedi app/core/db_pool.py)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "0"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "-1"))
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+    DB_RESERVED_CONNECTIONS: int = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_IDLE_TIMEOUT: int = int(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+    DB_SLOW_CHECKOUT_MS: int = int(os.getenv("DB_SLOW_CHECKOUT_MS", "100"))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    
+    # === HEALTH / READINESS ===
+    HEALTH_DB_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "2"))
+    HEALTH_CACHE_SECONDS: float = float(os.getenv("HEALTH_CACHE_SECONDS", "2"))
+    HEALTH_POOL_SATURATION: float = float(os.getenv("HEALTH_POOL_SATURATION", "0.9"))
+    
+    # === METRICHE (Prometheus, /metrics) ===
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    # Log delle richieste oltre il budget di query SQL e degli statement ripetuti (N+1)
+    QUERY_BUDGET_PER_REQUEST: int = int(os.getenv("QUERY_BUDGET_PER_REQUEST", "10"))
+    QUERY_REPEAT_THRESHOLD: int = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+    
+    # === LOGGING (app/core/logging_config.py) ===
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "")  # json | text (default: json in produzione)
+    LOG_ACCESS_SAMPLE_RATE: float = float(os.getenv("LOG_ACCESS_SAMPLE_RATE", "1.0"))
+    LOG_HIGH_VOLUME_SAMPLE_RATE: float = float(os.getenv("LOG_HIGH_VOLUME_SAMPLE_RATE", "0.05"))
+    LOG_SLOW_REQUEST_MS: float = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+    LOG_HIGH_VOLUME_ROUTES: str = os.getenv(
+        "LOG_HIGH_VOLUME_ROUTES",
+        "/livez,/readyz,/health,/metrics,"
+        "/api/v1/sessions/validate,/api/v1/songs/public/{qr_code_id},"
+        "/api/v1/bookings/user/my-bookings,/api/v1/bookings"
+    )
+    
+    # === COMPRESSIONE RISPOSTE (app/core/compression.py) ===
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # byte
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "1"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    
+    # === RETENTION / PARTIZIONAMENTO (bookings, sessions) ===
+    DATA_RETENTION_MONTHS: int = int(os.getenv("DATA_RETENTION_MONTHS", "6"))
+    PARTITION_PREMAKE_MONTHS: int = int(os.getenv("PARTITION_PREMAKE_MONTHS", "2"))
+    # Header X-Maintenance-Token di /sessions/cleanup (DDL sulle partizioni): vuoto = endpoint disabilitato
+    MAINTENANCE_TOKEN: str = os.getenv("MAINTENANCE_TOKEN", "")
+    
+    # === SESSIONI UTENTE ===
+    SESSION_DURATION_HOURS: int = int(os.getenv("SESSION_DURATION_HOURS", "6"))
+    # Cataloghi in memoria per la verifica delle prenotazioni (app/core/catalog_cache.py)
+    # ~220 byte per titolo: 200.000 titoli in totale ≈ 45 MB per worker
+    CATALOG_CACHE_MAX_DJS: int = int(os.getenv("CATALOG_CACHE_MAX_DJS", "128"))
+    CATALOG_CACHE_MAX_SONGS: int = int(os.getenv("CATALOG_CACHE_MAX_SONGS", "50000"))
+    CATALOG_CACHE_MAX_TOTAL_SONGS: int = int(os.getenv("CATALOG_CACHE_MAX_TOTAL_SONGS", "200000"))
     
     # === JWT AUTHENTICATION ===
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_DAYS: int = 2
+    # Revoca dei token (app/core/token_versions.py): DJ tenuti nella cache delle versioni
+    TOKEN_VERSION_CACHE_SIZE: int = int(os.getenv("TOKEN_VERSION_CACHE_SIZE", "10000"))
+    # Claims dei JWT già verificati (app/core/security.py): 0 = verifica della firma a ogni richiesta
+    TOKEN_CLAIMS_CACHE_SIZE: int = int(os.getenv("TOKEN_CLAIMS_CACHE_SIZE", "1024"))
+    # Throttle del login (app/core/login_throttle.py): login falliti per email e per IP nella finestra
+    LOGIN_THROTTLE_ENABLED: bool = os.getenv("LOGIN_THROTTLE_ENABLED", "True").lower() == "true"
+    LOGIN_THROTTLE_STORE: str = os.getenv("LOGIN_THROTTLE_STORE", "memory")  # memory | database
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = int(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS", "900"))
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_EMAIL", "5"))
+    LOGIN_MAX_FAILURES_PER_IP: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "30"))
+    LOGIN_THROTTLE_MAX_KEYS: int = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "10000"))
+    # Proxy davanti all'app che aggiungono il client a X-Forwarded-For (Railway: 1, 0 = app esposta direttamente)
+    TRUSTED_PROXY_HOPS: int = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
     
     # === EMAIL CONFIGURATION ===
     # SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.zoho.eu")
@@ -31,6 +96,19 @@ class Settings(BaseSettings):
     RESEND_API_KEY: str = os.getenv("RESEND_API_KEY", "")
     EMAIL_FROM: str = os.getenv("EMAIL_FROM", "admin@karaokati.com")
     EMAIL_FROM_NAME: str = os.getenv("EMAIL_FROM_NAME", "Karaokati")
+    # Trasporto HTTP verso Resend (app/core/email_transport.py): client con pool, invio in background
+    RESEND_API_URL: str = os.getenv("RESEND_API_URL", "https://api.resend.com")
+    EMAIL_TIMEOUT_SECONDS: float = float(os.getenv("EMAIL_TIMEOUT_SECONDS", "10"))
+    EMAIL_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("EMAIL_CONNECT_TIMEOUT_SECONDS", "3"))
+    EMAIL_BACKGROUND_SEND: bool = os.getenv("EMAIL_BACKGROUND_SEND", "True").lower() == "true"
+    EMAIL_QUEUE_MAX: int = int(os.getenv("EMAIL_QUEUE_MAX", "500"))
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", "100"))  # massimo dell'endpoint batch
+    EMAIL_MAX_ATTEMPTS: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))  # errori transitori: tentativi per batch
+    EMAIL_BREAKER_FAILURES: int = int(os.getenv("EMAIL_BREAKER_FAILURES", "5"))
+    EMAIL_BREAKER_RESET_SECONDS: float = float(os.getenv("EMAIL_BREAKER_RESET_SECONDS", "30"))
+    # Notifiche admin a digest (app/core/admin_digest.py): 0 = una email per evento
+    ADMIN_DIGEST_WINDOW_SECONDS: int = int(os.getenv("ADMIN_DIGEST_WINDOW_SECONDS", "300"))
+    ADMIN_DIGEST_MAX_EVENTS: int = int(os.getenv("ADMIN_DIGEST_MAX_EVENTS", "1000"))
     
     # === ENVIRONMENT ===
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
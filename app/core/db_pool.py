@@ -0,0 +1,169 @@
+"""
+Strumentazione e dimensionamento del connection pool SQLAlchemy.
+
+- Metriche raccolte tramite sottoclasse del pool + eventi del pool:
+  tempo di attesa al checkout, connessioni in uso / overflow, riconnessioni.
+- Liveness senza pre-ping: una connessione rimasta inattiva più di
+  DB_POOL_IDLE_TIMEOUT secondi viene scartata al checkout (DisconnectionError
+  → il pool ne apre una nuova), invece di un "SELECT 1" a ogni checkout.
+- Dimensione del pool calcolata da WEB_CONCURRENCY e DB_MAX_CONNECTIONS
+  (se DB_POOL_SIZE / DB_MAX_OVERFLOW non sono impostati esplicitamente).
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.pool")
+
+# Engine per processo: sync (psycopg2) + async (asyncpg)
+ENGINES_PER_WORKER = 2
+
+
+# ==================== DIMENSIONAMENTO ====================
+
+def pool_sizing() -> tuple[int, int]:
+    """
+    Ritorna (pool_size, max_overflow) per ciascun engine.
+    
+    Budget = (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) / (worker × engine).
+    Metà del budget resta aperta nel pool, l'altra metà è overflow per i picchi.
+    """
+    budget = (settings.DB_MAX_CONNECTIONS - settings.DB_RESERVED_CONNECTIONS) // (
+        max(1, settings.WEB_CONCURRENCY) * ENGINES_PER_WORKER
+    )
+    budget = max(2, budget)
+    
+    pool_size = settings.DB_POOL_SIZE or min(20, max(1, budget // 2))
+    max_overflow = settings.DB_MAX_OVERFLOW if settings.DB_MAX_OVERFLOW >= 0 else max(0, budget - pool_size)
+    return pool_size, max_overflow
+
+
+# ==================== METRICHE ====================
+
+class PoolMetrics:
+    """Contatori del pool (thread-safe) di un singolo engine"""
+    
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.slow_checkouts = 0
+        self.connects = 0
+        self.idle_recycles = 0
+        self.invalidations = 0
+    
+    def record_checkout(self, elapsed: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += elapsed
+            if elapsed > self.wait_seconds_max:
+                self.wait_seconds_max = elapsed
+            slow = elapsed * 1000 >= settings.DB_SLOW_CHECKOUT_MS
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning(
+                "Attesa checkout pool %s: %.0f ms (in uso %s, overflow %s)",
+                self.name, elapsed * 1000, self.in_use(), self.overflow()
+            )
+    
+    @property
+    def pool(self) -> Pool:
+        # engine.dispose() sostituisce il pool: si legge sempre quello corrente
+        return self.engine.pool
+    
+    def in_use(self) -> int:
+        return self.pool.checkedout() if isinstance(self.pool, QueuePool) else 0
+    
+    def overflow(self) -> int:
+        return max(0, self.pool.overflow()) if isinstance(self.pool, QueuePool) else 0
+    
+    def snapshot(self) -> dict:
+        size = self.pool.size() if isinstance(self.pool, QueuePool) else 0
+        with self._lock:
+            return {
+                "pool_size": size,
+                "max_overflow": self.pool._max_overflow if isinstance(self.pool, QueuePool) else 0,
+                "in_use": self.in_use(),
+                "overflow": self.overflow(),
+                "checkouts": self.checkouts,
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                "slow_checkouts": self.slow_checkouts,
+                "connects": self.connects,
+                "idle_recycles": self.idle_recycles,
+                "invalidations": self.invalidations,
+            }
+
+_metrics: dict[str, PoolMetrics] = {}
+
+def pool_stats() -> dict:
+    """Snapshot delle metriche di tutti gli engine strumentati"""
+    return {name: metrics.snapshot() for name, metrics in _metrics.items()}
+
+
+# ==================== POOL STRUMENTATI ====================
+
+class _TimedCheckout:
+    """Misura il tempo di checkout (attesa in coda + eventuale nuova connessione)"""
+    _metrics: PoolMetrics | None = None
+    
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            if self._metrics is not None:
+                self._metrics.record_checkout(time.perf_counter() - start)
+    
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        return pool
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Registra metriche ed eventi di liveness sul pool dell'engine (sync_engine per gli async)"""
+    metrics = PoolMetrics(name, engine)
+    if isinstance(engine.pool, _TimedCheckout):
+        engine.pool._metrics = metrics
+    _metrics[name] = metrics
+    
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # Connessione appena aperta: nessun last_checkin, non viene mai riciclata al primo checkout
+        connection_record.info.pop("last_checkin", None)
+        metrics.connects += 1
+    
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+    
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        last = connection_record.info.get("last_checkin")
+        if last is not None and time.monotonic() - last > settings.DB_POOL_IDLE_TIMEOUT:
+            # Connessione inattiva troppo a lungo (possibile timeout lato server/proxy):
+            # il pool la scarta e ne apre una nuova
+            metrics.idle_recycles += 1
+            raise exc.DisconnectionError("Connessione inattiva oltre DB_POOL_IDLE_TIMEOUT")
+    
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        if not isinstance(exception, exc.DisconnectionError):
+            metrics.invalidations += 1
@@ -0,0 +1,148 @@
+"""
+Motore dei template email: ogni template è compilato UNA volta all'import.
+
+Alla compilazione l'HTML viene minificato (commenti e indentazione via) e
+diviso in parti statiche + campi; dallo stesso HTML si genera la versione
+testo semplice (alternativa text/plain). Al render si concatenano solo le
+parti già pronte con i valori (escape HTML nella versione HTML):
+    
+    _WELCOME = EmailTemplate("Benvenuto", "<p>Ciao {name}</p>")
+    subject, html_body, text_body = _WELCOME.render(name="Mario")
+
+Un Fragment (es. righe di tabella già renderizzate) si inserisce senza escape.
+
+I campi usano la sintassi di str.format ({nome}); le graffe letterali vanno
+raddoppiate ({{ }}). Ogni parte è compilata in una lista di letterali con
+un posto per campo: al render restano solo escape dei valori e "".join.
+"""
+import html
+import re
+from html.parser import HTMLParser
+from string import Formatter
+from typing import NamedTuple
+
+_COMMENTS = re.compile(r"<!--.*?-->", re.DOTALL)
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html_body: str
+    text_body: str
+
+
+class Fragment(NamedTuple):
+    """Pezzo già renderizzato (con escape): come valore di un campo va inserito così com'è"""
+    html: str
+    text: str
+    
+    @classmethod
+    def join(cls, rendered) -> "Fragment":
+        """Concatena più RenderedEmail (es. righe di una tabella) in un unico frammento"""
+        rendered = list(rendered)
+        return cls("\n".join(r.html_body for r in rendered), "".join(r.text_body for r in rendered))
+
+
+def minify_html(source: str) -> str:
+    """Toglie commenti, indentazione e righe vuote (le righe restano corte per SMTP)"""
+    lines = (line.strip() for line in _COMMENTS.sub("", source).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class _TextExtractor(HTMLParser):
+    """HTML → testo semplice: blocchi su righe separate, link come "testo (url)" """
+    
+    BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "tr", "table", "ul", "li", "br"}
+    SKIP_TAGS = {"head", "style", "script"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+        self.links = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n- " if tag == "li" else "\n")
+        elif tag == "td":
+            self.parts.append(" ")
+        elif tag == "a":
+            self.links.append((dict(attrs).get("href"), len(self.parts)))
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip -= 1
+        elif tag in self.BLOCK_TAGS and tag != "li":
+            self.parts.append("\n")
+        elif tag == "a" and self.links:
+            href, start = self.links.pop()
+            label = "".join(self.parts[start:]).strip()
+            if href and href != label:
+                self.parts.append(f" ({href})")
+    
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(_SPACES.sub(" ", data.replace("\n", " ")))
+    
+    def text(self) -> str:
+        lines = (_SPACES.sub(" ", line).strip() for line in "".join(self.parts).splitlines())
+        return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def html_to_text(source: str) -> str:
+    extractor = _TextExtractor()
+    extractor.feed(source)
+    extractor.close()
+    return extractor.text()
+
+
+def _compile(source: str):
+    """
+    Sorgente con campi {nome} → funzione values -> str preparata una volta:
+    lista delle parti statiche con un posto vuoto per campo, riempito al render
+    (nessun parsing al render).
+    """
+    parts, fields = [], []
+    for literal, field, _, _ in Formatter().parse(source):
+        if literal:
+            parts.append(literal)
+        if field is not None:
+            if not field.isidentifier():
+                raise ValueError(f"Campo non valido nel template: {field!r}")
+            fields.append((len(parts), field))
+            parts.append("")
+    
+    def render(values: dict) -> str:
+        out = parts.copy()
+        for index, field in fields:
+            out[index] = str(values[field])
+        return "".join(out)
+    
+    return render
+
+def _fields(source: str) -> set[str]:
+    return {field for _, field, _, _ in Formatter().parse(source) if field is not None}
+
+
+class EmailTemplate:
+    """Template email precompilato: oggetto, HTML minificato e testo semplice"""
+    __slots__ = ("subject", "fields", "_html", "_text")
+    
+    def __init__(self, subject: str, source: str):
+        source = minify_html(source)
+        self.subject = subject
+        self.fields = _fields(source)
+        self._html = _compile(source)
+        self._text = _compile(html_to_text(source))
+    
+    def render(self, **values) -> RenderedEmail:
+        html_values, text_values = {}, {}
+        for name, value in values.items():
+            if isinstance(value, Fragment):
+                html_values[name], text_values[name] = value
+            else:
+                html_values[name], text_values[name] = html.escape(str(value)), value
+        return RenderedEmail(self.subject, self._html(html_values), self._text(text_values))
\ No newline at end of file
@@ -1,8 +1,10 @@
 import secrets
 import os
-import resend
 from datetime import datetime
 
+from app.core import admin_digest, email_transport
+from app.core.email_transport import EmailMessage
+
 # 🆕 Import dei template (mantieni gli stessi)
 from app.core.email_templates import (
     verification_email_template,
@@ -28,83 +30,78 @@ def get_frontend_url(request=None, path=""):
     
     return f"{settings.FRONTEND_URL}{path}"
 
-def send_email(to_email: str, subject: str, html_body: str):
-    """🚀 NUOVA FUNZIONE con RESEND libreria ufficiale"""
-    from app.core.config import settings
-    
-    try:
-        # Configura API key
-        resend.api_key = settings.RESEND_API_KEY
-        
-        # Parametri email
-        params = {
-            "from": f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>",
-            "to": [to_email],
-            "subject": subject,
-            "html": html_body
-        }
-        
-        # Invio email con libreria ufficiale
-        result = resend.Emails.send(params)
-        
-        print(f"✅ Email inviata con successo a {to_email} - ID: {result.get('id', 'N/A')}")
-        return True
-            
-    except Exception as e:
-        print(f"❌ Errore invio email a {to_email}: {e}")
-        return False
+def send_email(to_email: str, subject: str, html_body: str, text_body: str | None = None, on_failure=None):
+    """
+    🚀 Invio tramite il trasporto HTTP con pool (vedi email_transport.py)
+    text_body: alternativa text/plain (i template la generano già, vedi email_render.py)
+    Ritorna True se l'email è stata accodata, non consegnata: l'invio vero avviene in
+    background, con ritentativi. Se alla fine non parte viene chiamato on_failure(message).
+    """
+    return email_transport.submit(EmailMessage(to_email, subject, html_body, text_body), on_failure=on_failure)
 
 def send_verification_email(email: str, token: str, request=None):
     """Invia email di verifica"""
     verification_url = get_frontend_url(request, f"/verify-email/{token}")
     terms_url = get_frontend_url(request, "/terms")
-    subject, html_body = verification_email_template(verification_url, terms_url)
-    return send_email(email, subject, html_body)
+    subject, html_body, text_body = verification_email_template(verification_url, terms_url)
+    return send_email(email, subject, html_body, text_body)
 
 def send_reset_password_email(email: str, token: str, request=None):
     """Invia email di reset password"""
     reset_url = get_frontend_url(request, f"/reset-password/{token}")
     terms_url = get_frontend_url(request, "/terms")
-    subject, html_body = reset_password_email_template(reset_url, terms_url)
-    return send_email(email, subject, html_body)
+    subject, html_body, text_body = reset_password_email_template(reset_url, terms_url)
+    return send_email(email, subject, html_body, text_body)
 
 def send_account_deletion_email(email: str, stage_name: str, full_name: str, request=None):
     """Invia email di conferma cancellazione account all'utente"""
     terms_url = get_frontend_url(request, "/terms")
-    subject, html_body = account_deletion_email_template(stage_name, full_name, terms_url)
-    return send_email(email, subject, html_body)
+    subject, html_body, text_body = account_deletion_email_template(stage_name, full_name, terms_url)
+    return send_email(email, subject, html_body, text_body)
 
 def send_admin_registration_notification(dj_email: str, stage_name: str, full_name: str, verification_token: str, request=None):
-    """Invia notifica admin per nuova registrazione"""
+    """Notifica admin per nuova registrazione (accodata nel digest se attivo)"""
     from app.core.config import settings
     
     verification_url = get_frontend_url(request, f"/verify-email/{verification_token}")
-    subject, html_body = admin_registration_notification_template(
+    if admin_digest.enabled():
+        admin_digest.notify("registration", dj_email, stage_name, full_name, link=verification_url)
+        return True
+    
+    subject, html_body, text_body = admin_registration_notification_template(
         dj_email, stage_name, full_name, verification_token, verification_url
     )
     
     admin_email = settings.EMAIL_FROM  # ← Cambia da SMTP_USER a EMAIL_FROM
-    return send_email(admin_email, subject, html_body)
+    return send_email(admin_email, subject, html_body, text_body)
 
 def send_admin_password_reset_notification(dj_email: str, stage_name: str, reset_token: str, request=None):
-    """Invia notifica admin per reset password"""
+    """Notifica admin per reset password (accodata nel digest se attivo)"""
     from app.core.config import settings
     
     reset_url = get_frontend_url(request, f"/reset-password/{reset_token}")
-    subject, html_body = admin_password_reset_notification_template(
+    if admin_digest.enabled():
+        admin_digest.notify("password_reset", dj_email, stage_name, link=reset_url)
+        return True
+    
+    subject, html_body, text_body = admin_password_reset_notification_template(
         dj_email, stage_name, reset_token, reset_url
     )
     
     admin_email = settings.EMAIL_FROM  # ← Cambia da SMTP_USER a EMAIL_FROM
-    return send_email(admin_email, subject, html_body)
+    return send_email(admin_email, subject, html_body, text_body)
 
 def send_admin_account_deletion_notification(dj_email: str, stage_name: str, full_name: str, request=None):
-    """Invia notifica admin per cancellazione account"""
+    """Notifica admin per cancellazione account (accodata nel digest se attivo)"""
     from app.core.config import settings
     
-    subject, html_body = admin_account_deletion_notification_template(
+    if admin_digest.enabled():
+        admin_digest.notify("account_deletion", dj_email, stage_name, full_name)
+        return True
+    
+    subject, html_body, text_body = admin_account_deletion_notification_template(
         dj_email, stage_name, full_name
     )
     
     admin_email = settings.EMAIL_FROM  # ← Cambia da SMTP_USER a EMAIL_FROM
-    return send_email(admin_email, subject, html_body)
\ No newline at end of file
+    return send_email(admin_email, subject, html_body, text_body)
\ No newline at end of file
@@ -1,14 +1,18 @@
 from datetime import datetime
-import uuid
+import secrets
 
-def verification_email_template(verification_url: str, terms_url: str) -> tuple[str, str]:
-    """Template email di verifica account con correzione per il clipping di Gmail"""
-    
-    # Generiamo un ID breve e univoco per ogni invio
-    unique_id = str(uuid.uuid4())[:8]
-    
-    subject = "🚀 Benvenuto in Karaokati - Completa la registrazione"
-    html_body = f"""
+from app.core.email_render import EmailTemplate, Fragment, RenderedEmail
+
+# Template compilati una volta all'import (app/core/email_render.py): al render
+# si inseriscono solo i campi, con escape HTML e versione testo semplice.
+
+def _unique_id() -> str:
+    """ID breve e univoco per ogni invio (anti-clipping di Gmail): 8 caratteri esadecimali"""
+    return secrets.token_hex(4)
+
+_VERIFICATION_EMAIL = EmailTemplate(
+    "🚀 Benvenuto in Karaokati - Completa la registrazione",
+    """
     <!DOCTYPE html>
     <html lang="it">
     <head>
@@ -17,7 +21,7 @@ def verification_email_template(verification_url: str, terms_url: str) -> tuple[
     <title>Verifica Email - Karaokati</title>
     </head>
     <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #111827;">
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background: linear-gradient(135deg, #9333ea, #ec4899); padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -41,7 +45,7 @@ def verification_email_template(verification_url: str, terms_url: str) -> tuple[
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background: linear-gradient(180deg, rgba(88, 28, 135, 0.3), rgba(17, 24, 39, 0.9)); padding: 40px 20px;">
     <tr>
     <td align="center">
@@ -92,7 +96,7 @@ def verification_email_template(verification_url: str, terms_url: str) -> tuple[
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: rgba(17, 24, 39, 0.9); padding: 20px;">
     <tr>
     <td align="center">
@@ -100,7 +104,7 @@ def verification_email_template(verification_url: str, terms_url: str) -> tuple[
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: rgba(17, 24, 39, 0.9); padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -120,7 +124,7 @@ def verification_email_template(verification_url: str, terms_url: str) -> tuple[
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: #111827; padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -138,17 +142,23 @@ def verification_email_template(verification_url: str, terms_url: str) -> tuple[
     </td>
     </tr>
     </table>
-
+    
     </body>
     </html>
     """
-    return subject, html_body
+)
 
-def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str, str]:
-    """Template email reset password con anti-clipping"""
-    unique_id = str(uuid.uuid4())[:8]
-    subject = "🔐 Reset della tua password Karaokati"
-    html_body = f"""
+def verification_email_template(verification_url: str, terms_url: str) -> RenderedEmail:
+    """Template email di verifica account con correzione per il clipping di Gmail"""
+    return _VERIFICATION_EMAIL.render(
+        verification_url=verification_url,
+        terms_url=terms_url,
+        unique_id=_unique_id()
+    )
+
+_RESET_PASSWORD_EMAIL = EmailTemplate(
+    "🔐 Reset della tua password Karaokati",
+    """
     <!DOCTYPE html>
     <html lang="it">
     <head>
@@ -157,7 +167,7 @@ def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str,
     <title>Reset Password - Karaokati</title>
     </head>
     <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #111827;">
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background: linear-gradient(135deg, #9333ea, #ec4899); padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -181,7 +191,7 @@ def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str,
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background: linear-gradient(180deg, rgba(88, 28, 135, 0.3), rgba(17, 24, 39, 0.9)); padding: 40px 20px;">
     <tr>
     <td align="center">
@@ -221,7 +231,7 @@ def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str,
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: rgba(17, 24, 39, 0.9); padding: 20px;">
     <tr>
     <td align="center">
@@ -229,7 +239,7 @@ def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str,
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: rgba(17, 24, 39, 0.9); padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -249,7 +259,7 @@ def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str,
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: #111827; padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -267,17 +277,21 @@ def reset_password_email_template(reset_url: str, terms_url: str) -> tuple[str,
     </td>
     </tr>
     </table>
-
+    
     </body>
     </html>
     """
-    return subject, html_body
+)
 
-def account_deletion_email_template(stage_name: str, full_name: str, terms_url: str) -> tuple[str, str]:
-    """Template email cancellazione account utente con anti-clipping"""
-    unique_id = str(uuid.uuid4())[:8]
-    subject = "👋 Addio da Karaokati - Account rimosso"
-    html_body=f"""
+def reset_password_email_template(reset_url: str, terms_url: str) -> RenderedEmail:
+    """Template email reset password con anti-clipping"""
+    return _RESET_PASSWORD_EMAIL.render(
+        reset_url=reset_url, terms_url=terms_url, unique_id=_unique_id()
+    )
+
+_ACCOUNT_DELETION_EMAIL = EmailTemplate(
+    "👋 Addio da Karaokati - Account rimosso",
+    """
     <!DOCTYPE html>
     <html lang="it">
     <head>
@@ -286,7 +300,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     <title>Account Eliminato - Karaokati</title>
     </head>
     <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #111827;">
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background: linear-gradient(135deg, #9333ea, #ec4899); padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -300,7 +314,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     <div style="background-color: rgba(255,255,255,0.15); border: 1px solid rgba(255,255,255,0.3); border-radius: 50%; padding: 8px; display: flex; align-items: center; justify-content: center; width: 36px; height: 36px; margin: 0 auto 15px auto;">
         <span style="font-size: 26px; color: white;">👋</span>
     </div>
-
+        
         <h1 style="color: white; font-size: 22px; font-weight: 700; margin: 0 0 8px 0; text-align: center;">
             Arrivederci, {stage_name}!
         </h1>
@@ -310,7 +324,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background: linear-gradient(180deg, rgba(88, 28, 135, 0.3), rgba(17, 24, 39, 0.9)); padding: 40px 20px;">
     <tr>
     <td align="center">
@@ -321,7 +335,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
             <p style="color: #d1d5db; font-size: 15px; line-height: 1.6; margin: 0 0 25px 0;">
                 Il tuo account DJ <strong style="color: #c084fc;">{stage_name}</strong> è stato eliminato definitivamente dal nostro sistema.
             </p>
-            
+    
     <div style="background-color: rgba(239, 68, 68, 0.25); border: 1px solid rgba(239, 68, 68, 0.5); border-radius: 12px; padding: 20px; margin: 25px 0;">
         <p style="color: #fee2e2; font-size: 14px; margin: 0 0 8px 0; font-weight: 600;">
             📋 Dati eliminati
@@ -342,7 +356,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: rgba(17, 24, 39, 0.9); padding: 20px;">
     <tr>
     <td align="center">
@@ -350,7 +364,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: rgba(17, 24, 39, 0.9); padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -367,7 +381,7 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     </td>
     </tr>
     </table>
-
+    
     <table width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color: #111827; padding: 25px 20px;">
     <tr>
     <td align="center">
@@ -385,16 +399,24 @@ def account_deletion_email_template(stage_name: str, full_name: str, terms_url:
     </td>
     </tr>
     </table>
-
+    
     </body>
     </html>
     """
-    return subject, html_body
+)
 
-def admin_registration_notification_template(dj_email: str, stage_name: str, full_name: str, verification_token: str, verification_url: str) -> tuple[str, str]:
-    """Template notifica admin registrazione"""
-    subject = "Nuova Registrazione - Karaokati"
-    html_body = f"""
+def account_deletion_email_template(stage_name: str, full_name: str, terms_url: str) -> RenderedEmail:
+    """Template email cancellazione account utente con anti-clipping"""
+    return _ACCOUNT_DELETION_EMAIL.render(
+        stage_name=stage_name,
+        full_name=full_name,
+        terms_url=terms_url,
+        unique_id=_unique_id()
+    )
+
+_ADMIN_REGISTRATION_NOTIFICATION = EmailTemplate(
+    "Nuova Registrazione - Karaokati",
+    """
     <!DOCTYPE html>
     <html lang="it">
     <head>
@@ -445,7 +467,7 @@ def admin_registration_notification_template(dj_email: str, stage_name: str, ful
                             <td style="padding: 12px 20px; border-bottom: 1px solid rgba(147, 51, 234, 0.3); color: #d1d5db; font-family: monospace; font-size: 11px; line-height: 1.4; word-break: break-all;">{verification_token}</td>
                             </tr>
                             <td style="padding: 12px 20px; color: #c084fc; font-weight: 600;">Timestamp:</td>
-                            <td style="padding: 12px 20px; color: #d1d5db;">{datetime.utcnow().strftime('%d/%m/%Y %H:%M:%S')} UTC</td>
+                            <td style="padding: 12px 20px; color: #d1d5db;">{timestamp} UTC</td>
                             </tr>
                         </table>
                         <!-- URL Box -->
@@ -494,12 +516,22 @@ def admin_registration_notification_template(dj_email: str, stage_name: str, ful
     </body>
     </html>
     """
-    return subject, html_body
+)
 
-def admin_password_reset_notification_template(dj_email: str, stage_name: str, reset_token: str, reset_url: str) -> tuple[str, str]:
-    """Template notifica admin reset password"""
-    subject = "Reset Password - Karaokati"
-    html_body = f"""
+def admin_registration_notification_template(dj_email: str, stage_name: str, full_name: str, verification_token: str, verification_url: str) -> RenderedEmail:
+    """Template notifica admin registrazione"""
+    return _ADMIN_REGISTRATION_NOTIFICATION.render(
+        dj_email=dj_email,
+        stage_name=stage_name,
+        full_name=full_name,
+        verification_token=verification_token,
+        verification_url=verification_url,
+        timestamp=datetime.utcnow().strftime('%d/%m/%Y %H:%M:%S')
+    )
+
+_ADMIN_PASSWORD_RESET_NOTIFICATION = EmailTemplate(
+    "Reset Password - Karaokati",
+    """
     <!DOCTYPE html>
     <html lang="it">
     <head>
@@ -547,7 +579,7 @@ def admin_password_reset_notification_template(dj_email: str, stage_name: str, r
                             </tr>
                             <tr>
                             <td style="padding: 12px 20px; color: #c084fc; font-weight: 600;">Timestamp:</td>
-                            <td style="padding: 12px 20px; color: #d1d5db;">{datetime.utcnow().strftime('%d/%m/%Y %H:%M:%S')} UTC</td>
+                            <td style="padding: 12px 20px; color: #d1d5db;">{timestamp} UTC</td>
                             </tr>
                         </table>
                         <!-- URL Box -->
@@ -596,12 +628,21 @@ def admin_password_reset_notification_template(dj_email: str, stage_name: str, r
     </body>
     </html>
     """
-    return subject, html_body
+)
 
-def admin_account_deletion_notification_template(dj_email: str, stage_name: str, full_name: str) -> tuple[str, str]:
-    """Template notifica admin cancellazione account"""
-    subject = "Account Eliminato - Karaokati"
-    html_body = f"""
+def admin_password_reset_notification_template(dj_email: str, stage_name: str, reset_token: str, reset_url: str) -> RenderedEmail:
+    """Template notifica admin reset password"""
+    return _ADMIN_PASSWORD_RESET_NOTIFICATION.render(
+        dj_email=dj_email,
+        stage_name=stage_name,
+        reset_token=reset_token,
+        reset_url=reset_url,
+        timestamp=datetime.utcnow().strftime('%d/%m/%Y %H:%M:%S')
+    )
+
+_ADMIN_ACCOUNT_DELETION_NOTIFICATION = EmailTemplate(
+    "Account Eliminato - Karaokati",
+    """
     <!DOCTYPE html>
     <html lang="it">
     <head>
@@ -640,7 +681,7 @@ def admin_account_deletion_notification_template(dj_email: str, stage_name: str,
                         </tr>
                         <tr>
                             <td style="padding: 12px 20px; color: #fca5a5; font-weight: 600;">Data Eliminazione:</td>
-                            <td style="padding: 12px 20px; color: #d1d5db;">{datetime.now().strftime('%d/%m/%Y %H:%M')}</td>
+                            <td style="padding: 12px 20px; color: #d1d5db;">{timestamp}</td>
                         </tr>
                         </table>
                     </td>
@@ -662,4 +703,108 @@ def admin_account_deletion_notification_template(dj_email: str, stage_name: str,
     </body>
     </html>
     """
-    return subject, html_body
\ No newline at end of file
+)
+
+def admin_account_deletion_notification_template(dj_email: str, stage_name: str, full_name: str) -> RenderedEmail:
+    """Template notifica admin cancellazione account"""
+    return _ADMIN_ACCOUNT_DELETION_NOTIFICATION.render(
+        dj_email=dj_email,
+        stage_name=stage_name,
+        full_name=full_name,
+        timestamp=datetime.now().strftime('%d/%m/%Y %H:%M')
+    )
+
+# ==================== DIGEST ADMIN (app/core/admin_digest.py) ====================
+
+_ADMIN_DIGEST_ROW = EmailTemplate(
+    "",
+    """
+    <tr>
+        <td style="padding: 10px 12px; border-bottom: 1px solid rgba(147, 51, 234, 0.3); color: #9ca3af; white-space: nowrap;">{time}</td>
+        <td style="padding: 10px 12px; border-bottom: 1px solid rgba(147, 51, 234, 0.3); color: #c084fc; font-weight: 600;">{event}</td>
+        <td style="padding: 10px 12px; border-bottom: 1px solid rgba(147, 51, 234, 0.3); color: #d1d5db;">{stage_name} {full_name}</td>
+        <td style="padding: 10px 12px; border-bottom: 1px solid rgba(147, 51, 234, 0.3); color: #d1d5db;">{dj_email}</td>
+        <td style="padding: 10px 12px; border-bottom: 1px solid rgba(147, 51, 234, 0.3); color: #d1d5db; font-size: 11px; word-break: break-all;">{link}</td>
+    </tr>
+    """
+)
+
+_ADMIN_DIGEST = EmailTemplate(
+    "Riepilogo Admin - Karaokati",
+    """
+    <!DOCTYPE html>
+    <html lang="it">
+    <head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Riepilogo Admin - Karaokati</title>
+    </head>
+    <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #111827;">
+    <table role="presentation" width="100%" cellspacing="0" cellpadding="0" style="background-color: #111827; padding: 40px 20px;">
+        <tr>
+        <td align="center">
+            <table role="presentation" width="800" cellspacing="0" cellpadding="0" style="max-width: 800px; width: 100%; background: linear-gradient(180deg, rgba(88, 28, 135, 0.3), rgba(17, 24, 39, 0.9)); border: 1px solid rgba(147, 51, 234, 0.3); border-radius: 24px;">
+            <tr>
+                <td style="background: linear-gradient(135deg, #9333ea, #ec4899); padding: 30px; text-align: center; border-radius: 24px 24px 0 0;">
+                <h1 style="color: white; margin: 0; font-size: 24px;">📋 Riepilogo Admin</h1>
+                <p style="color: rgba(255,255,255,0.9); font-size: 14px; margin: 8px 0 0 0;">{summary}</p>
+                </td>
+            </tr>
+            <tr>
+                <td style="padding: 20px;">
+                <table style="width: 100%; border-collapse: collapse; font-size: 13px;">
+                {rows}
+                </table>
+                <p style="color: #9ca3af; font-size: 13px; margin: 15px 0 0 0;">{omitted}</p>
+                </td>
+            </tr>
+            <tr>
+                <td style="padding: 25px 30px; text-align: center; border-top: 1px solid rgba(147, 51, 234, 0.2);">
+                <p style="color: #6b7280; font-size: 12px; margin: 0;">
+                Notifica automatica dal sistema Karaokati Admin
+                </p>
+                </td>
+            </tr>
+            </table>
+        </td>
+        </tr>
+    </table>
+    </body>
+    </html>
+    """
+)
+
+ADMIN_EVENT_LABELS = {
+    "registration": "🆕 Registrazione",
+    "password_reset": "🔒 Reset password",
+    "account_deletion": "🗑️ Account eliminato",
+}
+
+def admin_digest_template(events: list, max_rows: int = 200) -> RenderedEmail:
+    """
+    Riepilogo di più notifiche admin (AdminEvent) in un'unica email.
+    Oltre max_rows righe la tabella si ferma e il resto viene solo contato.
+    """
+    rows = Fragment.join(
+        _ADMIN_DIGEST_ROW.render(
+            time=event.at.strftime('%d/%m %H:%M:%S'),
+            event=ADMIN_EVENT_LABELS.get(event.kind, event.kind),
+            stage_name=event.stage_name,
+            full_name=event.full_name,
+            dj_email=event.dj_email,
+            link=event.link or "—"
+        )
+        for event in events[:max_rows]
+    )
+    counts = {}
+    for event in events:
+        label = ADMIN_EVENT_LABELS.get(event.kind, event.kind)
+        counts[label] = counts.get(label, 0) + 1
+    
+    omitted = len(events) - max_rows
+    email = _ADMIN_DIGEST.render(
+        summary=" · ".join(f"{label}: {count}" for label, count in counts.items()),
+        rows=rows,
+        omitted=f"... e altri {omitted} eventi" if omitted > 0 else ""
+    )
+    return email._replace(subject=f"Riepilogo Admin - {len(events)} notifiche - Karaokati")
\ No newline at end of file
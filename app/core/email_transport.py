@@ -0,0 +1,342 @@
+"""
+Trasporto email verso l'API Resend: un client HTTP per worker con pool di
+connessioni (keep-alive, HTTP/2 se è installato h2) invece di una nuova
+connessione TLS per ogni email.
+
+send_email (email_service.py) mette il messaggio in coda e ritorna subito:
+un thread del worker svuota la coda e, se ci sono più messaggi in attesa, li
+invia con una sola richiesta all'endpoint batch. Una risposta lenta del
+provider occupa quel thread, mai un worker delle richieste.
+
+    submit(EmailMessage(to, subject, html, text), on_failure=callback)  # True = accettata
+
+"Accettata" non vuol dire consegnata: se il messaggio alla fine non parte,
+on_failure(message) viene chiamato una volta, dal thread di invio (il digest
+admin lo usa per rimettere in coda gli eventi).
+
+- timeout: EMAIL_CONNECT_TIMEOUT_SECONDS per la connessione, EMAIL_TIMEOUT_SECONDS per lettura/scrittura
+- errori transitori (rete, timeout, 429, 5xx): il thread ritenta lo stesso
+  invio con backoff, fino a EMAIL_MAX_ATTEMPTS tentativi
+- circuit breaker: dopo EMAIL_BREAKER_FAILURES errori consecutivi nessuna
+  richiesta al provider per EMAIL_BREAKER_RESET_SECONDS (il thread aspetta,
+  le email restano in coda), poi un invio di prova decide se richiudere
+- batch rifiutato (4xx, es. un indirizzo non valido): i messaggi ripartono uno
+  alla volta su /emails, così si scarta solo quello rifiutato
+- errori del messaggio (4xx), tentativi esauriti, coda piena (EMAIL_QUEUE_MAX):
+  email scartata e on_failure; la richiesta non aspetta mai. La metrica
+  karaokati_emails_total conta ogni messaggio una volta, con l'esito finale
+- thread non avviato (script, EMAIL_BACKGROUND_SEND=False): invio sincrono, senza ritentativi
+
+La coda è per worker e in memoria: allo shutdown il thread la svuota prima di
+chiudere il client.
+"""
+import asyncio
+import importlib.util
+import logging
+import queue
+import threading
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+import httpx
+
+from app.core import clock, health
+from app.core.config import settings
+from app.core.metrics import EMAILS_SENT
+
+logger = logging.getLogger(__name__)
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+class EmailMessage(NamedTuple):
+    to: str
+    subject: str
+    html: str
+    text: str | None = None
+    
+    def payload(self, sender: str) -> dict:
+        payload = {"from": sender, "to": [self.to], "subject": self.subject, "html": self.html}
+        if self.text:
+            payload["text"] = self.text
+        return payload
+
+
+class _Outgoing(NamedTuple):
+    message: EmailMessage
+    on_failure: Callable[[EmailMessage], None] | None = None
+
+
+class EmailTransportError(Exception):
+    """Invio fallito. transient=False per gli errori del messaggio (4xx): non aprono il circuito"""
+    
+    def __init__(self, message: str, transient: bool = True):
+        super().__init__(message)
+        self.transient = transient
+
+
+class CircuitBreaker:
+    """closed → open dopo N errori consecutivi → un tentativo dopo reset_seconds (half-open)"""
+    
+    def __init__(self, max_failures: int, reset_seconds: float):
+        self.max_failures = max_failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if clock.utcnow() - self.opened_at >= timedelta(seconds=self.reset_seconds):
+            return "half_open"
+        return "open"
+    
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "half_open":
+                # Un solo invio di prova: gli altri restano fuori per un'altra finestra
+                self.opened_at = clock.utcnow()
+                return True
+            return state == "closed"
+    
+    def retry_in(self) -> float:
+        """Secondi prima dell'invio di prova (0 se il circuito non è aperto)"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            elapsed = (clock.utcnow() - self.opened_at).total_seconds()
+            return max(self.reset_seconds - elapsed, 0.0)
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.opened_at = clock.utcnow()
+
+
+class ResendTransport:
+    """Client HTTP verso Resend, condiviso da tutto il worker (httpx.Client è thread-safe)"""
+    
+    def __init__(self, base_url: str, api_key: str):
+        self._client = httpx.Client(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=httpx.Timeout(settings.EMAIL_TIMEOUT_SECONDS, connect=settings.EMAIL_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=4, keepalive_expiry=60),
+            http2=_HTTP2,
+        )
+    
+    def send(self, messages: list[EmailMessage], sender: str) -> list[str | None]:
+        """Un messaggio: POST /emails; più messaggi: una sola POST /emails/batch. Ritorna gli id"""
+        payloads = [message.payload(sender) for message in messages]
+        try:
+            if len(payloads) == 1:
+                response = self._client.post("/emails", json=payloads[0])
+            else:
+                response = self._client.post("/emails/batch", json=payloads)
+        except httpx.HTTPError as e:
+            raise EmailTransportError(f"{type(e).__name__}: {e}") from e
+        
+        if response.status_code >= 300:
+            transient = response.status_code == 429 or response.status_code >= 500
+            raise EmailTransportError(f"HTTP {response.status_code}: {response.text[:200]}", transient)
+        
+        body = response.json()
+        if len(payloads) == 1:
+            return [body.get("id")]
+        return [item.get("id") for item in body.get("data", [])]
+    
+    def close(self):
+        self._client.close()
+
+
+breaker = CircuitBreaker(settings.EMAIL_BREAKER_FAILURES, settings.EMAIL_BREAKER_RESET_SECONDS)
+
+_transport: ResendTransport | None = None
+_transport_lock = threading.Lock()
+
+_outbox: queue.Queue = queue.Queue(maxsize=settings.EMAIL_QUEUE_MAX)
+_WAKE = object()
+_stopping = threading.Event()
+_worker: threading.Thread | None = None
+
+
+def get_transport() -> ResendTransport:
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = ResendTransport(settings.RESEND_API_URL, settings.RESEND_API_KEY)
+    return _transport
+
+def close_transport():
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+            _transport = None
+
+
+# Esiti di _attempt da ritentare e etichetta della metrica quando il messaggio viene scartato
+_RETRY = ("transient", "circuit_open")
+_FAILURE_LABEL = {"transient": "error", "rejected": "error", "circuit_open": "circuit_open"}
+
+def _attempt(messages: list[EmailMessage]) -> list[str]:
+    """Un tentativo di invio, esito per messaggio: ok, transient, circuit_open o rejected"""
+    if not breaker.allow():
+        logger.warning("Email non inviate: provider non disponibile (circuito aperto)", extra={"emails": len(messages)})
+        return ["circuit_open"] * len(messages)
+    
+    sender = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
+    try:
+        ids = get_transport().send(messages, sender)
+    except EmailTransportError as e:
+        if e.transient:
+            breaker.record_failure()
+            logger.error("Errore invio email", extra={"to": [m.to for m in messages], "error": str(e)})
+            return ["transient"] * len(messages)
+        if len(messages) > 1:
+            # Batch rifiutato per colpa di un messaggio: uno alla volta, si scarta solo quello
+            logger.warning("Batch email rifiutato, invio uno alla volta", extra={"emails": len(messages), "error": str(e)})
+            return [outcome for message in messages for outcome in _attempt([message])]
+        logger.error("Email rifiutata dal provider", extra={"to": messages[0].to, "error": str(e)})
+        return ["rejected"]
+    
+    breaker.record_success()
+    for message, email_id in zip(messages, ids):
+        logger.info("Email inviata", extra={"to": message.to, "email_id": email_id})
+    EMAILS_SENT.labels("ok").inc(len(messages))
+    return ["ok"] * len(messages)
+
+def deliver(messages: list[EmailMessage]) -> bool:
+    """Invio bloccante di uno o più messaggi, un solo tentativo (fallback sincrono, benchmark)"""
+    outcomes = _attempt(messages)
+    for outcome in outcomes:
+        if outcome != "ok":
+            EMAILS_SENT.labels(_FAILURE_LABEL[outcome]).inc()
+    return all(outcome == "ok" for outcome in outcomes)
+
+def _failed(items: list[_Outgoing], label: str):
+    EMAILS_SENT.labels(label).inc(len(items))
+    for item in items:
+        if item.on_failure is not None:
+            try:
+                item.on_failure(item.message)
+            except Exception:
+                logger.exception("Errore nel callback di email non inviata")
+
+def submit(message: EmailMessage, on_failure: Callable[[EmailMessage], None] | None = None) -> bool:
+    """
+    Accoda il messaggio per il thread di invio (o lo invia subito se il thread non c'è).
+    on_failure(message) viene chiamato una volta se il messaggio non viene consegnato.
+    """
+    item = _Outgoing(message, on_failure)
+    if _worker is None:
+        outcome, = _attempt([message])
+        if outcome == "ok":
+            return True
+        _failed([item], _FAILURE_LABEL[outcome])
+        return False
+    
+    try:
+        _outbox.put_nowait(item)
+    except queue.Full:
+        logger.error("Coda email piena, email scartata", extra={"to": message.to})
+        _failed([item], "dropped")
+        return False
+    return True
+
+def pending() -> int:
+    return _outbox.qsize()
+
+
+# ==================== THREAD DI INVIO ====================
+
+def _next_batch() -> list[_Outgoing]:
+    """Primo messaggio con attesa breve (heartbeat), poi quelli già in coda fino a EMAIL_BATCH_SIZE"""
+    batch = []
+    try:
+        item = _outbox.get(timeout=1)
+        while True:
+            if item is not _WAKE:
+                batch.append(item)
+            if len(batch) >= settings.EMAIL_BATCH_SIZE:
+                break
+            item = _outbox.get_nowait()
+    except queue.Empty:
+        pass
+    return batch
+
+def _wait(seconds: float):
+    """Attesa tra i tentativi, interrotta dallo shutdown, con heartbeat ogni secondo"""
+    deadline = clock.utcnow() + timedelta(seconds=seconds)
+    while not _stopping.is_set() and clock.utcnow() < deadline:
+        health.heartbeat("email_worker")
+        _stopping.wait(min(1.0, (deadline - clock.utcnow()).total_seconds()))
+
+def _send(batch: list[_Outgoing]):
+    """Invia il batch ritentando gli errori transitori; alla fine on_failure per i messaggi non consegnati"""
+    for attempt in range(1, settings.EMAIL_MAX_ATTEMPTS + 1):
+        outcomes = list(zip(batch, _attempt([item.message for item in batch])))
+        rejected = [item for item, outcome in outcomes if outcome == "rejected"]
+        if rejected:
+            _failed(rejected, "error")
+        
+        retry = [(item, outcome) for item, outcome in outcomes if outcome in _RETRY]
+        batch = [item for item, _ in retry]
+        if not batch or attempt == settings.EMAIL_MAX_ATTEMPTS or _stopping.is_set():
+            break
+        # Circuito aperto: fino all'invio di prova; altrimenti backoff esponenziale
+        _wait(breaker.retry_in() or min(2 ** (attempt - 1), settings.EMAIL_BREAKER_RESET_SECONDS))
+    
+    if batch:
+        logger.error("Email scartate dopo i tentativi", extra={"to": [item.message.to for item in batch], "attempts": attempt})
+        for label in {_FAILURE_LABEL[outcome] for _, outcome in retry}:
+            _failed([item for item, outcome in retry if _FAILURE_LABEL[outcome] == label], label)
+
+def _run():
+    while not (_stopping.is_set() and _outbox.empty()):
+        health.heartbeat("email_worker")
+        batch = _next_batch()
+        if batch:
+            try:
+                _send(batch)
+            except Exception:
+                logger.exception("Errore nel thread di invio email")
+
+def start():
+    """Avvia il thread di invio (lifespan). No-op con EMAIL_BACKGROUND_SEND=False"""
+    global _worker
+    if not settings.EMAIL_BACKGROUND_SEND or _worker is not None:
+        return
+    
+    health.register_queue("email", pending, max_backlog=settings.EMAIL_QUEUE_MAX * 8 // 10)
+    health.register_heartbeat("email_worker", max_age_seconds=settings.EMAIL_TIMEOUT_SECONDS * 3)
+    _stopping.clear()
+    _worker = threading.Thread(target=_run, name="email-sender", daemon=True)
+    _worker.start()
+
+async def stop():
+    """Svuota la coda, ferma il thread e chiude il client (shutdown del worker)"""
+    global _worker
+    if _worker is not None:
+        _stopping.set()
+        try:
+            _outbox.put_nowait(_WAKE)
+        except queue.Full:
+            pass  # il thread è occupato a inviare: vedrà lo stop al prossimo giro
+        await asyncio.to_thread(_worker.join, settings.EMAIL_TIMEOUT_SECONDS * 2)
+        if _worker.is_alive():
+            logger.warning("Thread email non terminato, email in coda perse", extra={"emails": pending()})
+        _worker = None
+        health.unregister("email")
+        health.unregister("email_worker")
+    close_transport()
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Risposte condizionali (ETag / If-None-Match) per gli endpoint interrogati in polling.
+
+L'ETag è costruito dai soli contatori di versione (app/crud/versions.py): se il
+client ha già la versione corrente l'handler risponde 304 senza caricare né
+serializzare le righe.
+
+    etag = make_etag("bookings", venue.id, venue.bookings_version)
+    if (cached := not_modified(request, etag)):
+        return cached
+    ...
+    return ORJSONResponse(rows, headers=etag_headers(etag))
+"""
+from fastapi import Request, Response
+
+# private: risposte per utente (JWT / cookie); no-cache: il browser rivalida sempre con If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """ETag debole dalle parti di versione: W/"bookings-12-7" """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def _opaque(tag: str) -> str:
+    # Confronto debole (RFC 9110 §8.8.3.2): il prefisso W/ non conta
+    return tag[2:] if tag.startswith("W/") else tag
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """Ritorna una 304 se If-None-Match contiene l'ETag corrente, altrimenti None"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    
+    tags = [tag.strip() for tag in header.split(",")]
+    if "*" in tags or _opaque(etag) in (_opaque(tag) for tag in tags):
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Liveness e readiness.
+
+- /livez: il processo risponde (nessuna dipendenza esterna).
+- /readyz: ping al DB attraverso il pool (con timeout), saturazione del pool,
+  backlog delle code in memoria (es. email) e heartbeat dei task in background.
+
+Il risultato della readiness è in cache per HEALTH_CACHE_SECONDS e le probe
+concorrenti condividono lo stesso controllo: il traffico delle probe non
+aggiunge carico reale al database.
+
+Code e task in background si registrano qui:
+    
+    register_queue("email", lambda: outbox.qsize(), max_backlog=500)
+    register_heartbeat("email_worker", max_age_seconds=30)
+    heartbeat("email_worker")  # a ogni giro del loop
+"""
+import asyncio
+import time
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db_pool import pool_stats
+
+_queues: dict[str, tuple[Callable[[], int], int]] = {}
+_heartbeats: dict[str, float] = {}
+_heartbeat_max_age: dict[str, float] = {}
+
+_cached: tuple[float, dict] | None = None
+_lock: asyncio.Lock | None = None
+
+
+# ==================== REGISTRO ====================
+
+def register_queue(name: str, backlog: Callable[[], int], max_backlog: int):
+    """Coda da monitorare: oltre max_backlog elementi l'istanza non è pronta"""
+    _queues[name] = (backlog, max_backlog)
+
+def register_heartbeat(name: str, max_age_seconds: float):
+    """Task in background che deve chiamare heartbeat(name) almeno ogni max_age_seconds"""
+    _heartbeat_max_age[name] = max_age_seconds
+    _heartbeats[name] = time.monotonic()
+
+def unregister(name: str):
+    _queues.pop(name, None)
+    _heartbeats.pop(name, None)
+    _heartbeat_max_age.pop(name, None)
+
+def heartbeat(name: str):
+    _heartbeats[name] = time.monotonic()
+
+def queue_backlogs() -> dict[str, int]:
+    return {name: backlog() for name, (backlog, _) in _queues.items()}
+
+
+# ==================== CONTROLLI ====================
+
+async def _check_database() -> dict:
+    # Import locale: app.database importa la configurazione del pool
+    from app.database import async_engine
+    
+    start = time.perf_counter()
+    try:
+        async def ping():
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        
+        await asyncio.wait_for(ping(), timeout=settings.HEALTH_DB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"timeout dopo {settings.HEALTH_DB_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        return {"ok": False, "error": type(e).__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+def _check_pools() -> dict:
+    result = {}
+    for name, stats in pool_stats().items():
+        capacity = stats["pool_size"] + max(0, stats["max_overflow"])
+        saturation = stats["in_use"] / capacity if capacity and stats["max_overflow"] >= 0 else 0.0
+        result[name] = {
+            "ok": saturation < settings.HEALTH_POOL_SATURATION,
+            "in_use": stats["in_use"],
+            "capacity": capacity,
+            "saturation": round(saturation, 2),
+        }
+    return result
+
+def _check_queues() -> dict:
+    result = {}
+    for name, (backlog, max_backlog) in _queues.items():
+        size = backlog()
+        result[name] = {"ok": size <= max_backlog, "backlog": size, "max_backlog": max_backlog}
+    return result
+
+def _check_heartbeats() -> dict:
+    now = time.monotonic()
+    result = {}
+    for name, max_age in _heartbeat_max_age.items():
+        age = now - _heartbeats.get(name, 0.0)
+        result[name] = {"ok": age <= max_age, "age_seconds": round(age, 1), "max_age_seconds": max_age}
+    return result
+
+async def _run_checks() -> dict:
+    checks = {
+        "database": await _check_database(),
+        "pools": _check_pools(),
+        "queues": _check_queues(),
+        "heartbeats": _check_heartbeats(),
+    }
+    ready = checks["database"]["ok"] and all(
+        item["ok"] for group in ("pools", "queues", "heartbeats") for item in checks[group].values()
+    )
+    return {"ready": ready, "checks": checks}
+
+async def readiness() -> dict:
+    """Esito della readiness, ricalcolato al massimo una volta ogni HEALTH_CACHE_SECONDS"""
+    global _cached, _lock
+    
+    if _cached and time.monotonic() - _cached[0] < settings.HEALTH_CACHE_SECONDS:
+        return _cached[1]
+    
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        # Un'altra probe può aver appena aggiornato la cache
+        if _cached and time.monotonic() - _cached[0] < settings.HEALTH_CACHE_SECONDS:
+            return _cached[1]
+        result = await _run_checks()
+        _cached = (time.monotonic(), result)
+        return result
@@ -0,0 +1,220 @@
+"""
+Logging strutturato e non bloccante.
+
+- Le richieste (e il resto del codice) scrivono solo su una coda in memoria
+  (QueueHandler); un thread listener formatta e scrive su stdout.
+- Formato JSON in produzione (LOG_FORMAT=json), testo leggibile in sviluppo.
+- Ogni riga porta il contesto della richiesta: request_id, route, dj_id, venue_id.
+- Access log con campionamento per le route ad alto volume (polling, catalogo,
+  probe): errori e richieste lente vengono sempre registrati.
+    
+    logger = logging.getLogger(__name__)
+    bind_log_context(dj_id=dj.id)
+    logger.info("Prenotazione creata", extra={"booking_id": booking.id})
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+from app.core.routing import route_template
+
+# Contesto della richiesta corrente: dict mutabile, così i valori impostati
+# negli endpoint sync (threadpool, contesto copiato) restano visibili al middleware
+_log_context: ContextVar[dict | None] = ContextVar("log_context", default=None)
+
+# Attributi standard di LogRecord: tutto il resto arriva da extra={...}
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "context"}
+
+access_logger = logging.getLogger("app.access")
+
+_listener: QueueListener | None = None
+
+
+def bind_log_context(**values):
+    """Aggiunge campi (dj_id, venue_id, ...) al contesto di log della richiesta corrente"""
+    context = _log_context.get()
+    if context is not None:
+        context.update({key: value for key, value in values.items() if value is not None})
+
+
+class _ContextFilter(logging.Filter):
+    """Copia il contesto nel record nel thread chiamante (il listener non vede le ContextVar)"""
+    
+    def filter(self, record):
+        context = _log_context.get()
+        if not context:
+            record.context = {}
+            return True
+        fields = {key: value for key, value in context.items() if not key.startswith("_")}
+        # Route disponibile solo dopo il routing: letta dallo scope ASGI
+        if "route" not in fields:
+            route = route_template(context["_scope"])
+            if route:
+                fields["route"] = route
+        record.context = fields
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    """Come QueueHandler, ma tiene il traceback separato dal messaggio (campo exc_info nel JSON)"""
+    
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    def format(self, record):
+        line = super().format(record)
+        fields = dict(getattr(record, "context", {}))
+        fields.update({
+            key: value for key, value in vars(record).items()
+            if key not in _RESERVED and not key.startswith("_")
+        })
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+# ==================== SETUP ====================
+
+def _start_listener(log_queue: queue.SimpleQueue, handler: logging.Handler):
+    global _listener
+    _listener = QueueListener(log_queue, handler, respect_handler_level=False)
+    _listener.start()
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+def setup_logging():
+    """Configura il root logger: QueueHandler → listener in background → stdout"""
+    if _listener is not None:
+        return
+    
+    log_format = settings.LOG_FORMAT or ("json" if settings.ENVIRONMENT == "production" else "text")
+    
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+    
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+    
+    _start_listener(log_queue, handler)
+    atexit.register(_stop_listener)
+    # Il thread del listener non sopravvive al fork (gunicorn preload_app):
+    # ogni worker ne avvia uno proprio sulla stessa coda
+    os.register_at_fork(after_in_child=lambda: _start_listener(log_queue, handler))
+
+
+# ==================== ACCESS LOG ====================
+
+class AccessLogMiddleware:
+    """
+    Middleware ASGI (il più esterno): request id (X-Request-ID), contesto di log
+    e una riga di access log per richiesta, campionata sulle route ad alto volume.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self.high_volume_routes = {
+            route.strip() for route in settings.LOG_HIGH_VOLUME_ROUTES.split(",") if route.strip()
+        }
+    
+    def _sample_rate(self, route: str | None, status_code: int, latency_ms: float) -> float:
+        if status_code >= 500 or latency_ms >= settings.LOG_SLOW_REQUEST_MS:
+            return 1.0
+        if route in self.high_volume_routes:
+            return settings.LOG_HIGH_VOLUME_SAMPLE_RATE
+        return settings.LOG_ACCESS_SAMPLE_RATE
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        
+        context = {"request_id": request_id, "_scope": scope}
+        token = _log_context.set(context)
+        status_code = 500
+        start = time.perf_counter()
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            route = route_template(scope)
+            context["route"] = route or scope["path"]
+            rate = self._sample_rate(route, status_code, latency_ms)
+            if rate >= 1.0 or random.random() < rate:
+                extra = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "latency_ms": round(latency_ms, 1),
+                }
+                queries = scope.get("query_stats")
+                if queries is not None:
+                    extra["db_queries"] = queries.count
+                    extra["db_ms"] = round(queries.seconds * 1000, 1)
+                if rate < 1.0:
+                    extra["sample_rate"] = rate
+                access_logger.info("%s %s %s", scope["method"], context["route"], status_code, extra=extra)
+            _log_context.reset(token)
@@ -0,0 +1,134 @@
+"""
+Throttle del login: finestra scorrevole sui login falliti, per email e per IP.
+
+Il controllo avviene PRIMA della query sul DJ e di bcrypt: un burst di
+credential stuffing viene respinto con 429 senza consumare la CPU che serve
+alle prenotazioni.
+
+    retry_after = check(email, ip)  # secondi di attesa, None = può provare
+    record_failure(email, ip)       # password sbagliata o email inesistente
+    record_success(email)           # azzera il contatore dell'email (non dell'IP)
+
+- LOGIN_MAX_FAILURES_PER_EMAIL / LOGIN_MAX_FAILURES_PER_IP falliti in
+  LOGIN_THROTTLE_WINDOW_SECONDS → bloccato finché il più vecchio non esce dalla finestra
+- LOGIN_THROTTLE_STORE=memory: per worker (limite effettivo × worker), chiavi
+  limitate a LOGIN_THROTTLE_MAX_KEYS
+- LOGIN_THROTTLE_STORE=database: tabella login_attempts condivisa tra worker e istanze
+"""
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+
+from app.core import clock
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import LoginAttempt
+
+
+class MemoryStore:
+    """Timestamp dei fallimenti per chiave, in memoria del worker"""
+    
+    def __init__(self):
+        self._attempts: OrderedDict[str, deque] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def recent(self, key: str, since: datetime) -> tuple[int, datetime | None]:
+        """(fallimenti dopo since, il più vecchio tra questi)"""
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if not attempts:
+                return 0, None
+            while attempts and attempts[0] <= since:
+                attempts.popleft()
+            return len(attempts), (attempts[0] if attempts else None)
+    
+    def add(self, key: str, at: datetime):
+        with self._lock:
+            self._attempts.setdefault(key, deque()).append(at)
+            self._attempts.move_to_end(key)
+            # Oltre il limite si scartano le chiavi meno recenti (memoria limitata sotto attacco)
+            while len(self._attempts) > settings.LOGIN_THROTTLE_MAX_KEYS:
+                self._attempts.popitem(last=False)
+    
+    def reset(self, key: str):
+        with self._lock:
+            self._attempts.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._attempts.clear()
+
+
+class DatabaseStore:
+    """Fallimenti nella tabella login_attempts: stessi limiti per tutti i worker"""
+    
+    def recent(self, key: str, since: datetime) -> tuple[int, datetime | None]:
+        with SessionLocal() as db:
+            return tuple(db.execute(
+                select(func.count(), func.min(LoginAttempt.attempted_at))
+                .where(LoginAttempt.key == key, LoginAttempt.attempted_at > since)
+            ).one())
+    
+    def add(self, key: str, at: datetime):
+        with SessionLocal() as db:
+            # I tentativi fuori finestra non servono più a nessuna chiave
+            db.execute(delete(LoginAttempt).where(LoginAttempt.attempted_at <= at - _window()))
+            db.add(LoginAttempt(key=key, attempted_at=at))
+            db.commit()
+    
+    def reset(self, key: str):
+        with SessionLocal() as db:
+            db.execute(delete(LoginAttempt).where(LoginAttempt.key == key))
+            db.commit()
+
+
+_memory = MemoryStore()
+_database = DatabaseStore()
+
+
+def _store():
+    return _database if settings.LOGIN_THROTTLE_STORE == "database" else _memory
+
+def _window() -> timedelta:
+    return timedelta(seconds=settings.LOGIN_THROTTLE_WINDOW_SECONDS)
+
+def _keys(email: str, ip: str | None) -> list[tuple[str, int]]:
+    keys = [(f"email:{email.strip().lower()}", settings.LOGIN_MAX_FAILURES_PER_EMAIL)]
+    if ip:
+        keys.append((f"ip:{ip}", settings.LOGIN_MAX_FAILURES_PER_IP))
+    return keys
+
+
+def check(email: str, ip: str | None) -> int | None:
+    """Secondi da attendere se email o IP hanno superato il limite, altrimenti None"""
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return None
+    
+    now = clock.utcnow()
+    store = _store()
+    retry_after = None
+    for key, limit in _keys(email, ip):
+        failures, oldest = store.recent(key, now - _window())
+        if failures >= limit:
+            wait = int((oldest + _window() - now).total_seconds()) + 1
+            retry_after = max(retry_after or 0, wait)
+    return retry_after
+
+def record_failure(email: str, ip: str | None):
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return
+    
+    now = clock.utcnow()
+    store = _store()
+    for key, _ in _keys(email, ip):
+        store.add(key, now)
+
+def record_success(email: str):
+    if settings.LOGIN_THROTTLE_ENABLED:
+        _store().reset(_keys(email, None)[0][0])
+
+def clear():
+    """Svuota lo store in memoria (test)"""
+    _memory.clear()
\ No newline at end of file
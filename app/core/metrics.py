@@ -0,0 +1,127 @@
+"""
+Metriche Prometheus (/metrics).
+
+- Middleware ASGI puro: richieste, latenza per template di route
+  (/api/v1/songs/public/{qr_code_id}, non l'URL reale), richieste in corso,
+  query SQL e tempo DB per richiesta (app/core/query_tracker.py).
+- Al momento dello scrape: stato dei pool DB e backlog delle code registrate
+  in app/core/health.py (es. email).
+
+Con più worker gunicorn impostare PROMETHEUS_MULTIPROC_DIR (directory vuota,
+scrivibile): le metriche dei worker vengono aggregate (vedi gunicorn.conf.py).
+Pool e code sono letti dal worker che riceve lo scrape; per gli altri worker
+resta il valore del loro ultimo scrape.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+
+from app.core.db_pool import pool_stats
+from app.core.health import queue_backlogs
+from app.core.query_tracker import current_query_stats
+from app.core.routing import route_template
+
+HTTP_REQUESTS = Counter(
+    "karaokati_http_requests_total", "Richieste HTTP", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "karaokati_http_request_duration_seconds", "Latenza delle richieste HTTP", ["method", "route"]
+)
+HTTP_IN_PROGRESS = Gauge(
+    "karaokati_http_requests_in_progress", "Richieste HTTP in corso", multiprocess_mode="livesum"
+)
+DB_QUERIES = Histogram(
+    "karaokati_db_queries_per_request", "Query SQL per richiesta", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+DB_TIME = Histogram(
+    "karaokati_db_time_per_request_seconds", "Tempo speso nel DB per richiesta", ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+EMAILS_SENT = Counter(
+    "karaokati_emails_total", "Email inviate", ["result"]
+)
+QUEUE_BACKLOG = Gauge(
+    "karaokati_queue_backlog", "Elementi in attesa nelle code in memoria", ["queue"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_IN_USE = Gauge(
+    "karaokati_db_pool_connections_in_use", "Connessioni del pool in uso", ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "karaokati_db_pool_overflow", "Connessioni del pool oltre pool_size", ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Gauge(
+    "karaokati_db_pool_checkouts", "Checkout dal pool dall'avvio del worker", ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_SLOW_CHECKOUTS = Gauge(
+    "karaokati_db_pool_slow_checkouts", "Checkout oltre DB_SLOW_CHECKOUT_MS", ["engine"],
+    multiprocess_mode="livesum"
+)
+
+# Richieste senza route (404, static): un'unica etichetta per non esplodere la cardinalità
+UNMATCHED_ROUTE = "unmatched"
+
+
+class PrometheusMiddleware:
+    """Middleware ASGI: niente BaseHTTPMiddleware, nessun overhead sul body delle risposte"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            route = route_template(scope, UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            # Contesto aperto da QueryCountMiddleware (esterno)
+            queries = current_query_stats()
+            if queries is not None:
+                DB_QUERIES.labels(route).observe(queries.count)
+                DB_TIME.labels(route).observe(queries.seconds)
+
+
+def _collect_runtime_gauges():
+    """Valori letti al momento dello scrape (pool DB, code registrate)"""
+    for name, stats in pool_stats().items():
+        DB_POOL_IN_USE.labels(name).set(stats["in_use"])
+        DB_POOL_OVERFLOW.labels(name).set(stats["overflow"])
+        DB_POOL_CHECKOUTS.labels(name).set(stats["checkouts"])
+        DB_POOL_SLOW_CHECKOUTS.labels(name).set(stats["slow_checkouts"])
+    
+    for name, backlog in queue_backlogs().items():
+        QUEUE_BACKLOG.labels(name).set(backlog)
+
+def render_metrics() -> bytes:
+    _collect_runtime_gauges()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
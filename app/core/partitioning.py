@@ -0,0 +1,279 @@
+"""
+Partizionamento mensile (RANGE su created_at) di bookings e sessions + retention.
+
+Su PostgreSQL le due tabelle diventano tabelle partizionate con una partizione
+per mese (es. bookings_p2025_10) più una partizione DEFAULT di sicurezza.
+La retention elimina le partizioni più vecchie di DATA_RETENTION_MONTHS con un
+DROP TABLE invece di DELETE riga per riga.
+
+Su SQLite (test/sviluppo) il partizionamento non esiste: la retention ricade su
+un DELETE per created_at, con lo stesso risultato logico.
+
+Note PostgreSQL:
+- La primary key delle tabelle partizionate deve includere la chiave di partizione,
+  quindi diventa (id, created_at). Lato ORM l'identità resta su id.
+- Una foreign key verso una tabella partizionata deve includere created_at:
+  bookings.session_id non ha più il vincolo FK verso sessions (la relazione ORM resta).
+- Le righe di un mese senza partizione finiscono nella DEFAULT, e PostgreSQL
+  rifiuta CREATE TABLE ... PARTITION OF se la DEFAULT contiene righe del nuovo
+  intervallo. ensure_partitions in quel caso stacca la DEFAULT, crea il mese,
+  ci sposta le righe e riattacca la DEFAULT, nella stessa transazione (lock
+  esclusivo sulla tabella per la durata dello spostamento).
+
+Uso da riga di comando:
+    python -m app.core.partitioning migrate   # converte le tabelle esistenti
+    python -m app.core.partitioning maintain  # crea i mesi futuri + applica retention
+
+La manutenzione fa DDL (DETACH/ATTACH, DROP TABLE): gira da qui o da
+GET /sessions/cleanup, che richiede l'header X-Maintenance-Token (MAINTENANCE_TOKEN).
+"""
+import re
+import sys
+from datetime import datetime, date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from app.core.config import settings
+
+# Ordine importante: bookings referenzia sessions, va convertita per prima
+PARTITIONED_TABLES = ("bookings", "sessions")
+PARTITION_KEY = "created_at"
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+# Chiave arbitraria per pg_advisory_xact_lock (evita conversioni concorrenti tra worker)
+_MIGRATION_LOCK_ID = 726_001
+
+
+# ==================== HELPER DATE ====================
+
+def _month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def _partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+# ==================== INTROSPEZIONE ====================
+
+def _supports_partitioning(bind: Engine | Connection) -> bool:
+    return bind.dialect.name == "postgresql"
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    """True se la tabella è già partizionata (sempre False fuori da PostgreSQL)"""
+    if not _supports_partitioning(conn):
+        return False
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar()
+    return relkind == "p"
+
+def list_partitions(conn: Connection, table: str) -> list[str]:
+    """Nomi delle partizioni mensili di una tabella (esclusa la DEFAULT)"""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table}
+    ).scalars().all()
+    return sorted(name for name in rows if _PARTITION_SUFFIX.search(name))
+
+
+# ==================== DDL ====================
+
+def _create_month_partition(conn: Connection, table: str, month: date):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(table, month)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    ))
+
+def _add_month_partition(conn: Connection, table: str, month: date):
+    """Crea la partizione del mese spostandoci le righe già finite nella DEFAULT"""
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": _partition_name(table, month)}).scalar():
+        return
+    
+    default = f"{table}_default"
+    bounds = {"start": month, "end": _add_months(month, 1)}
+    in_range = f"{PARTITION_KEY} >= :start AND {PARTITION_KEY} < :end"
+    stranded = conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"), bounds).scalar()
+    if not stranded:
+        _create_month_partition(conn, table, month)
+        return
+    
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    _create_month_partition(conn, table, month)
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {table} SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+
+def _convert_table(conn: Connection, table_name: str):
+    """Converte una tabella esistente (creata da create_all) in tabella partizionata"""
+    from app.database import Base
+
+    table = Base.metadata.tables[table_name]
+    legacy = f"{table_name}_unpartitioned"
+    pk_columns = [c.name for c in table.primary_key.columns]
+
+    conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+    conn.execute(text(
+        f"UPDATE {legacy} SET {PARTITION_KEY} = (now() AT TIME ZONE 'utc') "
+        f"WHERE {PARTITION_KEY} IS NULL"
+    ))
+    conn.execute(text(
+        f"CREATE TABLE {table_name} (LIKE {legacy} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({PARTITION_KEY})"
+    ))
+
+    # Partizioni: dal mese del record più vecchio fino ai mesi futuri
+    oldest = conn.execute(text(f"SELECT min({PARTITION_KEY}) FROM {legacy}")).scalar()
+    month = _month_start(oldest or datetime.utcnow())
+    last = _add_months(_month_start(datetime.utcnow()), settings.PARTITION_PREMAKE_MONTHS)
+    while month <= last:
+        _create_month_partition(conn, table_name, month)
+        month = _add_months(month, 1)
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT"))
+
+    conn.execute(text(f"INSERT INTO {table_name} SELECT * FROM {legacy}"))
+
+    # Le sequence (id SERIAL) devono seguire la nuova tabella prima del DROP
+    for column in table.primary_key.columns:
+        sequence = conn.execute(
+            text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": legacy, "column": column.name}
+        ).scalar()
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table_name}.{column.name}"))
+
+    conn.execute(text(f"DROP TABLE {legacy}"))
+
+    # PK dopo il DROP per riusare il nome originale ({tabella}_pkey)
+    conn.execute(text(
+        f"ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_pkey "
+        f"PRIMARY KEY ({', '.join(pk_columns + [PARTITION_KEY])})"
+    ))
+
+    # Ricrea indici e FK dai metadata (tranne FK verso tabelle partizionate)
+    for index in table.indexes:
+        conn.execute(CreateIndex(index))
+    for fk in table.foreign_key_constraints:
+        if fk.referred_table.name in PARTITIONED_TABLES:
+            continue
+        conn.execute(AddConstraint(fk))
+
+def migrate_to_partitions(engine: Engine) -> list[str]:
+    """
+    Converte bookings e sessions in tabelle partizionate (idempotente).
+
+    Returns:
+        list[str]: Tabelle convertite in questa esecuzione
+    """
+    if not _supports_partitioning(engine):
+        return []
+
+    converted = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MIGRATION_LOCK_ID})
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                _convert_table(conn, table)
+                converted.append(table)
+    return converted
+
+def ensure_partitions(engine: Engine, months_ahead: int | None = None):
+    """Crea in anticipo le partizioni del mese corrente e dei prossimi mesi"""
+    if not _supports_partitioning(engine):
+        return
+    months_ahead = settings.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+
+    current = _month_start(datetime.utcnow())
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                continue
+            for offset in range(months_ahead + 1):
+                _add_month_partition(conn, table, _add_months(current, offset))
+
+
+# ==================== RETENTION ====================
+
+def retention_cutoff(retention_months: int | None = None) -> date:
+    """Primo giorno del mese più vecchio da conservare"""
+    months = settings.DATA_RETENTION_MONTHS if retention_months is None else retention_months
+    return _add_months(_month_start(datetime.utcnow()), -months)
+
+def apply_retention(conn: Connection, retention_months: int | None = None) -> dict:
+    """
+    Elimina i dati più vecchi della finestra di retention.
+
+    - PostgreSQL partizionato: DROP delle partizioni mensili interamente scadute
+    - Altri database (SQLite nei test): DELETE su created_at
+
+    Returns:
+        dict: {"dropped_partitions": [...], "deleted_rows": {tabella: n}, "venue_ids": [...]}
+        venue_ids: locali con prenotazioni o sessioni eliminate (ETag da invalidare)
+    """
+    cutoff = retention_cutoff(retention_months)
+    result = {"dropped_partitions": [], "deleted_rows": {}}
+    venue_ids = set()
+
+    for table in PARTITIONED_TABLES:
+        if is_partitioned(conn, table):
+            for partition in list_partitions(conn, table):
+                year, month = _PARTITION_SUFFIX.search(partition).groups()
+                if _add_months(date(int(year), int(month), 1), 1) <= cutoff:
+                    venue_ids.update(conn.execute(text(f"SELECT DISTINCT venue_id FROM {partition}")).scalars())
+                    conn.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+                    result["dropped_partitions"].append(partition)
+        else:
+            deleted = conn.execute(
+                text(f"DELETE FROM {table} WHERE {PARTITION_KEY} < :cutoff RETURNING venue_id"),
+                {"cutoff": datetime.combine(cutoff, datetime.min.time())}
+            ).scalars().all()
+            venue_ids.update(deleted)
+            result["deleted_rows"][table] = len(deleted)
+
+    result["venue_ids"] = sorted(venue_ids)
+    return result
+
+
+# ==================== CLI ====================
+
+def main(argv: list[str]) -> int:
+    from app.crud.versions import bump_bookings_version
+    from app.database import engine
+    from app.models.venue import Venue
+
+    command = argv[0] if argv else "maintain"
+
+    if command == "migrate":
+        converted = migrate_to_partitions(engine)
+        print(f"Tabelle convertite: {', '.join(converted) or 'nessuna'}")
+    elif command == "maintain":
+        ensure_partitions(engine)
+        with engine.begin() as conn:
+            result = apply_retention(conn)
+            # Prenotazioni eliminate: invalida gli ETag delle liste dei locali coinvolti (app/core/etag.py)
+            if result["venue_ids"]:
+                conn.execute(bump_bookings_version(Venue.id.in_(result["venue_ids"])))
+        print(f"Partizioni eliminate: {', '.join(result['dropped_partitions']) or 'nessuna'}")
+        for table, deleted in result["deleted_rows"].items():
+            print(f"{table}: {deleted} righe eliminate")
+    else:
+        print("Uso: python -m app.core.partitioning [migrate|maintain]")
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
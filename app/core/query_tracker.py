@@ -0,0 +1,156 @@
+"""
+Conteggio e tempo delle query SQL per richiesta, con rilevamento N+1.
+
+Gli eventi before/after_cursor_execute sono registrati una volta sulla classe
+Engine (coprono engine sync e async). Le query vengono attribuite alla
+richiesta corrente tramite una ContextVar: il contesto è condiviso con il
+threadpool degli endpoint sync e con i greenlet di SQLAlchemy async.
+
+QueryCountMiddleware apre il contesto per ogni richiesta (e lo espone in scope["query_stats"]):
+- header Server-Timing fuori produzione (db;dur=...;desc="N query"),
+- log se la richiesta supera QUERY_BUDGET_PER_REQUEST query,
+- log N+1 se lo stesso statement è eseguito QUERY_REPEAT_THRESHOLD volte o più.
+
+Nei test:
+    
+    with assert_max_queries(3):
+        client.post("/api/v1/bookings/user", ...)
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.routing import route_template
+
+logger = logging.getLogger("app.db.queries")
+
+
+class QueryStats:
+    """Query eseguite nel contesto corrente"""
+    __slots__ = ("count", "seconds", "statements")
+    
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+    
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement eseguiti almeno threshold volte (candidati N+1)"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+# Osservatori delle richieste completate: (route, stats). Usati da assert_max_queries
+_observers: list[Callable[[str, QueryStats], None]] = []
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._query_start = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "_query_start", None)
+    if stats is None or start is None:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - start
+    stats.statements[statement] += 1
+
+
+# ==================== MIDDLEWARE ====================
+
+def _report(route: str, method: str, stats: QueryStats):
+    if stats.count > settings.QUERY_BUDGET_PER_REQUEST:
+        logger.warning(
+            "%s %s: %d query (budget %d), %.1f ms nel DB",
+            method, route, stats.count, settings.QUERY_BUDGET_PER_REQUEST, stats.seconds * 1000
+        )
+    for statement, n in stats.repeated(settings.QUERY_REPEAT_THRESHOLD):
+        logger.warning("Possibile N+1 in %s %s: %d× %s", method, route, n, " ".join(statement.split())[:200])
+    
+    for observer in _observers:
+        observer(route, stats)
+
+
+class QueryCountMiddleware:
+    """Middleware ASGI: conta e cronometra le query SQL di ogni richiesta"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.server_timing = settings.ENVIRONMENT != "production"
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        with track_queries() as stats:
+            scope["query_stats"] = stats
+            
+            async def send_wrapper(message):
+                if self.server_timing and message["type"] == "http.response.start":
+                    timing = (
+                        f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} query", '
+                        f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _report(route_template(scope, scope["path"]), scope["method"], stats)
+
+
+# ==================== TEST ====================
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Fallisce se una richiesta completata nel blocco (o il codice eseguito
+    direttamente nel blocco) esegue più di max_queries query SQL.
+    """
+    seen: list[tuple[str, QueryStats]] = []
+    
+    def observer(route: str, stats: QueryStats):
+        seen.append((route, stats))
+    
+    _observers.append(observer)
+    try:
+        with track_queries() as direct:
+            yield direct
+    finally:
+        _observers.remove(observer)
+    
+    if direct.count:
+        seen.append(("<blocco>", direct))
+    for route, stats in seen:
+        if stats.count > max_queries:
+            statements = "\n".join(f"  {n}× {' '.join(s.split())[:200]}" for s, n in stats.statements.most_common())
+            raise AssertionError(f"{route}: {stats.count} query (massimo {max_queries})\n{statements}")
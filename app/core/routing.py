@@ -0,0 +1,13 @@
+"""
+Template della route di una richiesta ASGI, per metriche, log e budget delle query.
+
+    route_template(scope)  # "/api/v1/songs/public/{qr_code_id}", non l'URL reale
+
+Lo scope ha la route solo dopo il routing di Starlette: prima, e per le
+richieste senza route (404, static), ritorna default.
+"""
+
+
+def route_template(scope, default: str | None = None) -> str | None:
+    route = scope.get("route")
+    return getattr(route, "path", default) if route is not None else default
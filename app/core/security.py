@@ -1,9 +1,17 @@
 import bcrypt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import jwt, random, string
 
 from app.core.config import settings
 
+# Hash (costo bcrypt di default, 12) di una password che nessuno conosce: il login con
+# email inesistente lo verifica comunque, così costa quanto un login con password sbagliata
+DUMMY_PASSWORD_HASH = "$2b$12$dhmtFOfTruYU8hPIxpZnr.IcUYWwIeHbYyM2iNaWuWpXAWiipLbLy"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se la password in chiaro corrisponde all'hash"""
     return bcrypt.checkpw(
@@ -26,6 +34,44 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# 🔐 Token già verificati: digest SHA-256 del token → (claims, exp). LRU limitata a TOKEN_CLAIMS_CACHE_SIZE
+_claims_cache: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+_claims_lock = threading.Lock()
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifica il JWT (firma HS256 + exp) e ritorna i claims, da NON modificare.
+    
+    La console del DJ rimanda lo stesso token a ogni richiesta: dopo la prima
+    verifica i claims arrivano dalla cache (niente HMAC né parsing JSON) fino
+    a exp; scaduto, il token torna a jwt.decode che solleva ExpiredSignatureError.
+    Gli errori jwt (token non valido/scaduto) passano al chiamante.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _claims_cache.get(key)
+    if cached is not None:
+        if time.time() < cached[1]:
+            with _claims_lock:
+                if key in _claims_cache:
+                    _claims_cache.move_to_end(key)
+            return cached[0]
+        with _claims_lock:
+            _claims_cache.pop(key, None)
+    
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    
+    # Solo token con scadenza: senza exp non ci sarebbe un momento per riverificarli
+    if settings.TOKEN_CLAIMS_CACHE_SIZE > 0 and isinstance(payload.get("exp"), (int, float)):
+        with _claims_lock:
+            _claims_cache[key] = (payload, payload["exp"])
+            while len(_claims_cache) > settings.TOKEN_CLAIMS_CACHE_SIZE:
+                _claims_cache.popitem(last=False)
+    return payload
+
+def clear_token_cache():
+    with _claims_lock:
+        _claims_cache.clear()
+
 def generate_qr_code_id(stage_name: str) -> str:
     """Genera un QR code ID unico per il DJ con suffisso randomico di 8 caratteri"""
     
@@ -0,0 +1,55 @@
+"""
+Revoca dei JWT lato server senza query in più.
+
+Ogni DJ ha un token_version, copiato nel claim "tv" del token al login.
+Logout, cambio/reset password ed eliminazione account lo incrementano
+(bump_token_version, app/crud/versions.py): i token emessi prima non valgono
+più, su tutti i dispositivi del DJ.
+
+Il controllo è in due passi, entrambi O(1):
+- cache in memoria dj_id → token_version del worker: un token già noto come
+  revocato viene respinto subito dopo la decodifica, prima del database
+- la riga del DJ che le dipendenze di auth leggono comunque (token_version
+  nella proiezione CurrentDJ) resta la fonte di verità: copre le revoche fatte
+  da altri worker e aggiorna la cache
+    
+    if token_versions.is_revoked(dj_id, claims_tv): ...   # prima della query
+    token_versions.remember(dj_id, row.token_version)     # dopo la query
+
+I token senza claim "tv" (emessi prima della revoca) valgono come versione 0.
+Con più worker la cache di un worker si aggiorna alla prima richiesta del DJ
+che legge la riga: nel frattempo il controllo sulla riga basta da solo.
+"""
+import threading
+from collections import OrderedDict
+
+from app.core.config import settings
+
+_versions: OrderedDict[int, int] = OrderedDict()
+_lock = threading.Lock()
+
+
+def is_revoked(dj_id: int, token_version: int) -> bool:
+    """True se la cache conosce già una versione più recente di quella del token"""
+    current = _versions.get(dj_id)
+    return current is not None and token_version < current
+
+def remember(dj_id: int, version: int):
+    """Versione letta dal database o appena scritta"""
+    if _versions.get(dj_id) == version:
+        return  # caso comune a ogni richiesta: nessun lock
+    with _lock:
+        _versions[dj_id] = version
+        _versions.move_to_end(dj_id)
+        # Oltre il limite si scartano le voci aggiornate meno di recente (la riga del DJ resta il controllo)
+        while len(_versions) > settings.TOKEN_VERSION_CACHE_SIZE:
+            _versions.popitem(last=False)
+
+def forget(dj_id: int):
+    """Account eliminato: la riga non c'è più (401) e l'id può essere riusato (SQLite)"""
+    with _lock:
+        _versions.pop(dj_id, None)
+
+def clear():
+    with _lock:
+        _versions.clear()
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Letture a proiezione per gli endpoint in sola lettura.
+
+Le query selezionano solo le colonne che servono e ritornano NamedTuple
+leggere: niente entità ORM, identity map né attributi strumentati (e niente
+password_hash o token caricati per sbaglio). Per modificare un record si
+carica l'entità ORM come prima.
+
+    dj = await get_public_dj(db, qr_code_id)   # PublicDJ(id, stage_name, qr_code_id)
+    venue = await get_active_venue(db, dj.id)  # VenueInfo(id, name, address, bookings_version) | None
+"""
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking
+from app.models.dj import DJ
+from app.models.song import Song
+from app.models.venue import Venue
+
+
+class CurrentDJ(NamedTuple):
+    """DJ autenticato (dipendenza get_current_dj): i campi di DJResponse"""
+    id: int
+    full_name: str
+    stage_name: str
+    email: str
+    phone: str | None
+    qr_code_id: str
+    email_verified: bool
+    max_bookings_per_user: int
+    version: int  # ETag di /auth/me e della lista locali
+    token_version: int  # revoca dei JWT (app/core/token_versions.py)
+
+class BookingRules(NamedTuple):
+    """Impostazioni del DJ lette a ogni prenotazione"""
+    max_bookings_per_user: int  # 999 = nessun limite
+    catalog_version: int  # validità del catalogo in cache (app/core/catalog_cache.py)
+
+class PublicDJ(NamedTuple):
+    id: int
+    stage_name: str
+    qr_code_id: str
+
+class VenueInfo(NamedTuple):
+    id: int
+    name: str
+    address: str | None
+    bookings_version: int
+
+class VenueStatus(NamedTuple):
+    id: int
+    name: str
+    address: str | None
+    active: bool
+
+class SongRef(NamedTuple):
+    id: int
+    file_name: str
+
+class UserBooking(NamedTuple):
+    id: int
+    user_name: str
+    song: str
+    song_id: int | None
+    key: str
+    status: str
+    created_at: datetime
+
+
+_CURRENT_DJ = select(
+    DJ.id, DJ.full_name, DJ.stage_name, DJ.email, DJ.phone,
+    DJ.qr_code_id, DJ.email_verified, DJ.max_bookings_per_user, DJ.version, DJ.token_version
+)
+_PUBLIC_DJ = select(DJ.id, DJ.stage_name, DJ.qr_code_id)
+_VENUE_INFO = select(Venue.id, Venue.name, Venue.address, Venue.bookings_version)
+_VENUE_STATUS = select(Venue.id, Venue.name, Venue.address, Venue.active)
+_SONG_REF = select(Song.id, Song.file_name)
+_USER_BOOKING = select(
+    Booking.id, Booking.user_name, Booking.song, Booking.song_id, Booking.key, Booking.status, Booking.created_at
+)
+
+
+def _one(model, row):
+    return model._make(row) if row is not None else None
+
+
+# ==================== DJ ====================
+
+def get_current_dj_row(db: Session, dj_id: int) -> CurrentDJ | None:
+    return _one(CurrentDJ, db.execute(_CURRENT_DJ.where(DJ.id == dj_id)).first())
+
+async def get_current_dj_row_async(db: AsyncSession, dj_id: int) -> CurrentDJ | None:
+    return _one(CurrentDJ, (await db.execute(_CURRENT_DJ.where(DJ.id == dj_id))).first())
+
+async def get_public_dj(db: AsyncSession, qr_code_id: str) -> PublicDJ | None:
+    return _one(PublicDJ, (await db.execute(_PUBLIC_DJ.where(DJ.qr_code_id == qr_code_id))).first())
+
+async def get_public_dj_by_id(db: AsyncSession, dj_id: int) -> PublicDJ | None:
+    return _one(PublicDJ, (await db.execute(_PUBLIC_DJ.where(DJ.id == dj_id))).first())
+
+async def get_max_bookings_per_user(db: AsyncSession, dj_id: int) -> int:
+    """Limite prenotazioni per sessione del DJ (999 = nessun limite)"""
+    max_bookings = await db.scalar(select(DJ.max_bookings_per_user).where(DJ.id == dj_id))
+    return max_bookings if max_bookings is not None else 999
+
+async def get_booking_rules(db: AsyncSession, dj_id: int) -> BookingRules:
+    """Limite prenotazioni e versione del catalogo in una sola query"""
+    row = (await db.execute(select(DJ.max_bookings_per_user, DJ.catalog_version).where(DJ.id == dj_id))).first()
+    return _one(BookingRules, row) or BookingRules(999, 0)
+
+
+# ==================== LOCALI ====================
+
+async def get_active_venue(db: AsyncSession, dj_id: int) -> VenueInfo | None:
+    row = (await db.execute(_VENUE_INFO.where(Venue.dj_id == dj_id, Venue.active == True).limit(1))).first()
+    return _one(VenueInfo, row)
+
+async def get_venue_status(db: AsyncSession, venue_id: int) -> VenueStatus | None:
+    return _one(VenueStatus, (await db.execute(_VENUE_STATUS.where(Venue.id == venue_id))).first())
+
+
+# ==================== CATALOGO ====================
+
+async def search_song_names(db: AsyncSession, dj_id: int, search: str | None, limit: int) -> list[str]:
+    query = select(Song.file_name).where(Song.dj_id == dj_id)
+    if search:
+        query = query.where(Song.file_name.ilike(f"%{search}%"))
+    return list((await db.scalars(query.limit(limit))).all())
+
+async def search_songs(db: AsyncSession, dj_id: int, search: str | None, limit: int) -> list[SongRef]:
+    """Come search_song_names, con l'id da passare alla prenotazione"""
+    query = _SONG_REF.where(Song.dj_id == dj_id)
+    if search:
+        query = query.where(Song.file_name.ilike(f"%{search}%"))
+    return [SongRef._make(row) for row in (await db.execute(query.limit(limit))).all()]
+
+async def get_catalog(db: AsyncSession, dj_id: int, limit: int) -> list[SongRef]:
+    """Canzoni del catalogo senza ordinamento, per app/core/catalog_cache.py"""
+    return [SongRef._make(row) for row in (await db.execute(_SONG_REF.where(Song.dj_id == dj_id).limit(limit))).all()]
+
+async def find_song(db: AsyncSession, dj_id: int, song_id: int | None = None, file_name: str | None = None) -> SongRef | None:
+    """Canzone del catalogo per id o per titolo (indice uq_songs_dj_file_name)"""
+    query = _SONG_REF.where(Song.dj_id == dj_id)
+    query = query.where(Song.id == song_id) if song_id is not None else query.where(Song.file_name == file_name)
+    return _one(SongRef, (await db.execute(query.limit(1))).first())
+
+async def count_songs(db: AsyncSession, dj_id: int) -> int:
+    return await db.scalar(select(func.count(Song.id)).where(Song.dj_id == dj_id))
+
+
+# ==================== PRENOTAZIONI ====================
+
+async def get_session_bookings(db: AsyncSession, session, venue_id: int) -> list[UserBooking]:
+    """
+    Prenotazioni della sessione nel locale attivo, più recenti prima.
+    created_at >= inizio sessione: permette il partition pruning su bookings.
+    """
+    rows = (await db.execute(_USER_BOOKING.where(
+        Booking.session_id == session.id,
+        Booking.venue_id == venue_id,
+        Booking.created_at >= session.created_at
+    ).order_by(Booking.created_at.desc()))).all()
+    return [UserBooking._make(row) for row in rows]
\ No newline at end of file
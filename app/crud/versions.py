@@ -0,0 +1,55 @@
+"""
+Contatori di versione per le risposte condizionali (ETag, app/core/etag.py).
+
+Ogni scrittura incrementa il contatore nella stessa transazione, con un
+UPDATE set-based (niente entità da caricare):
+    
+    await db.execute(bump_bookings_version(Venue.id == venue_id))
+    db.execute(bump_dj_version(current_dj.id))
+
+- Venue.bookings_version: prenotazioni del locale (lista DJ e "le mie prenotazioni")
+- DJ.version: profilo (/auth/me) e lista locali
+- DJ.token_version: revoca dei JWT (app/core/token_versions.py), con RETURNING
+  della nuova versione per aggiornare la cache del worker
+- DJ.catalog_version: canzoni del catalogo (app/core/catalog_cache.py)
+"""
+from sqlalchemy import update
+
+from app.models.dj import DJ
+from app.models.venue import Venue
+
+
+def bump_bookings_version(*venue_filters):
+    """Incrementa bookings_version dei locali filtrati (tutti se nessun filtro)"""
+    return (
+        update(Venue)
+        .where(*venue_filters)
+        .values(bookings_version=Venue.bookings_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def bump_dj_version(dj_id: int):
+    return (
+        update(DJ)
+        .where(DJ.id == dj_id)
+        .values(version=DJ.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def bump_token_version(dj_id: int):
+    """Revoca i JWT emessi finora per il DJ: .scalar_one() è la nuova versione"""
+    return (
+        update(DJ)
+        .where(DJ.id == dj_id)
+        .values(token_version=DJ.token_version + 1)
+        .returning(DJ.token_version)
+        .execution_options(synchronize_session=False)
+    )
+
+def bump_catalog_version(dj_id: int):
+    return (
+        update(DJ)
+        .where(DJ.id == dj_id)
+        .values(catalog_version=DJ.catalog_version + 1)
+        .execution_options(synchronize_session=False)
+    )
\ No newline at end of file
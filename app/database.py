@@ -1,20 +1,74 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import (
+    InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine, pool_sizing
+)
+
+def _pool_options(url: str, poolclass) -> dict:
+    """
+    Opzioni del pool: SQLite (test/sviluppo) usa il pool di default del dialetto.
+    Niente pool_pre_ping: la liveness è gestita dal recycle per inattività (app/core/db_pool.py)
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    pool_size, max_overflow = pool_sizing()
+    return {
+        "poolclass": poolclass,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": 3600,
+    }
+
+def _async_database_url(url: str) -> str:
+    """
+    Deriva l'URL async da DATABASE_URL:
+    postgresql(+psycopg2) -> postgresql+asyncpg, sqlite -> sqlite+aiosqlite
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg non conosce sslmode (libpq): usa il parametro ssl
+        sslmode = parsed.query.get("sslmode")
+        if sslmode:
+            parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+
+    return parsed.render_as_string(hide_password=False)
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
     echo=settings.DEBUG,
     # 🆕 Production pool settings
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_recycle=3600,
+    **_pool_options(settings.DATABASE_URL, InstrumentedQueuePool),
 )
+instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ⚡ Engine async (asyncpg) per gli endpoint ad alto traffico (bookings, sessions, catalogo pubblico)
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    echo=settings.DEBUG,
+    **_pool_options(settings.DATABASE_URL, InstrumentedAsyncQueuePool),
+)
+instrument_engine(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: in async non è possibile il lazy-load dopo il commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -22,4 +76,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,41 +1,63 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import admin_digest, email_transport
 from app.core.config import settings
-from app.database import engine, Base
+from app.database import engine, async_engine
+from app.core.db_pool import pool_stats
+from app.core.health import readiness
+from app.core.metrics import CONTENT_TYPE_LATEST, PrometheusMiddleware, render_metrics
+from app.core.query_tracker import QueryCountMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.logging_config import AccessLogMiddleware, setup_logging
 from app.api.v1 import auth, venues, songs, bookings, sessions, suggestions
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
 
-# ⚡ CRITICAL: Import all models BEFORE creating tables
-from app.models import DJ, Venue, Song, Booking, Session
+# 🆕 Logging strutturato non bloccante (JSON in produzione)
+setup_logging()
 
-# 🆕 Configure logging for production
-if settings.ENVIRONMENT == "production":
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+# Tabelle e partizioni NON vengono create all'import: python -m app.migrate (vedi Dockerfile)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger("app")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup/shutdown di ogni worker.
+    Allo shutdown (SIGTERM da gunicorn) chiude le connessioni dei pool,
+    dopo che le richieste in corso sono terminate.
+    Il digest delle notifiche admin parte con il worker e allo shutdown invia
+    gli eventi ancora in coda; il thread di invio email si ferma dopo, quando
+    ha svuotato la sua coda (digest compreso).
+    """
+    logger.info("Worker %s avviato", os.getpid())
+    email_transport.start()
+    admin_digest.start()
+    yield
+    await admin_digest.stop()
+    await email_transport.stop()
+    await async_engine.dispose()
+    engine.dispose()
+    logger.info("Worker %s terminato, pool DB chiusi", os.getpid())
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
-# 🔧 Mount static files only if directory exists
-static_dir = "static"
-if os.path.exists(static_dir) and os.path.isdir(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
-else:
-    # Create static directory if it doesn't exist
-    os.makedirs(static_dir, exist_ok=True)
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+# 🔧 Static files: la directory viene creata da app.migrate, non all'import
+app.mount("/static", StaticFiles(directory=settings.STATIC_DIR, check_dir=False), name="static")
+
+# 🗜️ Compressione brotli/gzip (il più interno: comprime il corpo finale dell'endpoint)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
 
 # CORS
 app.add_middleware(
@@ -46,6 +68,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 📊 Metriche Prometheus (ultimo aggiunto = più esterno: misura anche CORS)
+if settings.METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
+
+# 🔍 Query SQL per richiesta (Server-Timing, budget, N+1)
+app.add_middleware(QueryCountMiddleware)
+
+# 📝 Access log + request id: il più esterno, il contesto vale anche per i log dei middleware interni
+app.add_middleware(AccessLogMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["Authentication"])
 app.include_router(venues.router, prefix=f"{settings.API_V1_PREFIX}/venues", tags=["Venues"])
@@ -64,10 +96,32 @@ def root():
     }
 
 @app.get("/health")
-def health_check():
+async def health_check():
+    """Stato generale (compatibilità keep-alive): sempre 200, database dalla readiness in cache"""
+    ready = await readiness()
     return {
         "status": "healthy", 
         "version": settings.VERSION,
         "environment": settings.ENVIRONMENT,
-        "database": "connected"
-    }
\ No newline at end of file
+        "database": "connected" if ready["checks"]["database"]["ok"] else "unavailable",
+        "database_pool": pool_stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Metriche in formato Prometheus"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/livez")
+async def liveness_probe():
+    """Liveness: il processo risponde, nessuna dipendenza esterna"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_probe():
+    """Readiness: DB, pool, code e task in background. 503 se l'istanza non deve ricevere traffico"""
+    result = await readiness()
+    return JSONResponse(
+        status_code=200 if result["ready"] else 503,
+        content={"status": "ready" if result["ready"] else "not_ready", **result["checks"]}
+    )
\ No newline at end of file
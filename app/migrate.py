@@ -0,0 +1,167 @@
+"""
+Gestione dello schema, separata dall'avvio dell'app.
+
+L'import di app.main non apre connessioni al database: tabelle, partizioni e
+directory statica vanno preparate PRIMA di avviare i worker (Dockerfile):
+    
+    python -m app.migrate && gunicorn app.main:app -c gunicorn.conf.py
+
+Ogni passo è idempotente: si può rilanciare a ogni deploy. La migrazione non
+elimina mai dati: se un indice UNIQUE non si può creare per righe duplicate
+l'indice viene saltato con un warning, e la pulizia è un comando esplicito:
+
+    python -m app.migrate dedupe-songs   # titoli duplicati nel catalogo dei DJ
+"""
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import inspect, text
+
+from app.core.config import settings
+from app.core.partitioning import ensure_partitions, migrate_to_partitions
+from app.crud.versions import bump_catalog_version
+from app.database import Base
+
+logger = logging.getLogger(__name__)
+
+# Colonne aggiunte dopo la creazione delle tabelle (create_all non altera tabelle esistenti)
+ADDED_COLUMNS = {
+    "venues": {"bookings_version": "INTEGER NOT NULL DEFAULT 0"},
+    "bookings": {"song_id": "INTEGER REFERENCES songs(id) ON DELETE SET NULL"},
+    "djs": {
+        "version": "INTEGER NOT NULL DEFAULT 0",
+        "token_version": "INTEGER NOT NULL DEFAULT 0",
+        "catalog_version": "INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+# Valori delle colonne appena aggiunte per le righe esistenti, nella stessa transazione dell'ALTER TABLE
+BACKFILLS = {
+    # Canzone del catalogo del DJ con lo stesso titolo (MIN: la copia che dedupe_songs tiene)
+    "bookings.song_id": (
+        "UPDATE bookings SET song_id = ("
+        "SELECT MIN(songs.id) FROM songs JOIN venues ON venues.dj_id = songs.dj_id "
+        "WHERE venues.id = bookings.venue_id AND songs.file_name = bookings.song)"
+    ),
+}
+
+# Righe in più per DJ che impediscono uq_songs_dj_file_name: (dj_id, duplicati)
+DUPLICATE_SONGS = (
+    "SELECT dj_id, COUNT(*) - COUNT(DISTINCT file_name) FROM songs "
+    "GROUP BY dj_id HAVING COUNT(*) > COUNT(DISTINCT file_name)"
+)
+
+# Indici dei modelli aggiunti dopo la creazione delle tabelle, con l'eventuale controllo
+# dei duplicati (un indice UNIQUE fallisce se ci sono già righe duplicate)
+ADDED_INDEXES = {
+    "bookings": {"ix_bookings_song_id": None},
+    "songs": {"uq_songs_dj_file_name": DUPLICATE_SONGS},
+}
+
+
+def add_missing_columns(engine) -> list[str]:
+    """ALTER TABLE ... ADD COLUMN per le colonne di ADDED_COLUMNS che mancano, con il loro backfill"""
+    added = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    if f"{table}.{name}" in BACKFILLS:
+                        conn.execute(text(BACKFILLS[f"{table}.{name}"]))
+                    added.append(f"{table}.{name}")
+    return added
+
+
+def add_missing_indexes(engine) -> list[str]:
+    """CREATE INDEX per gli indici di ADDED_INDEXES che mancano (saltati se ci sono duplicati)"""
+    added = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table, indexes in ADDED_INDEXES.items():
+            existing = {index["name"] for index in inspector.get_indexes(table)}
+            for index in Base.metadata.tables[table].indexes:
+                if index.name in indexes and index.name not in existing:
+                    duplicates = conn.execute(text(indexes[index.name])).all() if indexes[index.name] else []
+                    if duplicates:
+                        logger.warning(
+                            "Indice %s non creato: righe duplicate in %s (dj_id, duplicati): %s. "
+                            "Lanciare python -m app.migrate dedupe-songs",
+                            index.name, table, [tuple(row) for row in duplicates]
+                        )
+                        continue
+                    index.create(conn)
+                    added.append(index.name)
+    return added
+
+
+def dedupe_songs(engine) -> dict[int, int]:
+    """
+    Elimina i titoli duplicati dal catalogo di ogni DJ, tenendo la canzone con l'id più basso.
+    Le prenotazioni collegate a un duplicato passano alla canzone tenuta. Comando esplicito,
+    mai eseguito da migrate.
+    
+    Returns:
+        dict[int, int]: Canzoni eliminate per DJ
+    """
+    with engine.begin() as conn:
+        removed = {dj_id: count for dj_id, count in conn.execute(text(DUPLICATE_SONGS)).all()}
+        if not removed:
+            return {}
+        
+        conn.execute(text(
+            "UPDATE bookings SET song_id = ("
+            "SELECT MIN(kept.id) FROM songs AS duplicate JOIN songs AS kept "
+            "ON kept.dj_id = duplicate.dj_id AND kept.file_name = duplicate.file_name "
+            "WHERE duplicate.id = bookings.song_id) "
+            "WHERE song_id IS NOT NULL"
+        ))
+        conn.execute(text("DELETE FROM songs WHERE id NOT IN (SELECT MIN(id) FROM songs GROUP BY dj_id, file_name)"))
+        # Cataloghi in memoria nei worker (app/core/catalog_cache.py)
+        for dj_id in removed:
+            conn.execute(bump_catalog_version(dj_id))
+    
+    for dj_id, count in removed.items():
+        logger.warning("Canzoni duplicate eliminate", extra={"dj_id": dj_id, "deleted": count})
+    return removed
+
+
+def migrate(engine) -> None:
+    """Crea tabelle e colonne mancanti, partizioni (solo PostgreSQL) e directory statica"""
+    # ⚡ CRITICAL: Import all models BEFORE creating tables
+    import app.models  # noqa: F401
+    
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+    
+    # Partizionamento mensile bookings/sessions (solo PostgreSQL, no-op su SQLite)
+    migrate_to_partitions(engine)
+    ensure_partitions(engine)
+    
+    os.makedirs(settings.STATIC_DIR, exist_ok=True)
+
+
+def main(argv: list[str]) -> int:
+    from app.database import engine
+    
+    start = time.perf_counter()
+    if argv[:1] == ["dedupe-songs"]:
+        removed = dedupe_songs(engine)
+        for dj_id, count in removed.items():
+            print(f"DJ {dj_id}: {count} canzoni duplicate eliminate")
+        print(f"Canzoni duplicate eliminate: {sum(removed.values())}")
+    elif argv:
+        print("Uso: python -m app.migrate [dedupe-songs]")
+        return 2
+    migrate(engine)
+    engine.dispose()
+    print(f"✅ Schema aggiornato in {time.perf_counter() - start:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -3,5 +3,6 @@ from app.models.venue import Venue
 from app.models.song import Song
 from app.models.booking import Booking
 from app.models.session import Session
+from app.models.login_attempt import LoginAttempt
 
-__all__ = ["DJ", "Venue", "Song", "Booking", "Session"]
\ No newline at end of file
+__all__ = ["DJ", "Venue", "Song", "Booking", "Session", "LoginAttempt"]
\ No newline at end of file
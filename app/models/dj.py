@@ -14,6 +14,12 @@ class DJ(Base):
     password_hash = Column(String(255), nullable=False)
     qr_code_id = Column(String(50), unique=True, nullable=False, index=True)
     max_bookings_per_user = Column(Integer, default=999, nullable=False)
+    # ETag di /auth/me e della lista locali: +1 a ogni modifica del profilo o dei locali
+    version = Column(Integer, default=0, server_default="0", nullable=False)
+    # Revoca dei JWT: incrementato da logout/cambio password (app/core/token_versions.py)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    # Catalogo in cache per la verifica delle prenotazioni: incrementato da ogni scrittura sulle canzoni (app/core/catalog_cache.py)
+    catalog_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     email_verified = Column(Boolean, default=False, nullable=False)
     email_verification_token = Column(String(255), nullable=True)
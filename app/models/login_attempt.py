@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+from app.core import clock
+
+class LoginAttempt(Base):
+    """Login fallito, per il throttle condiviso tra worker (LOGIN_THROTTLE_STORE=database)"""
+    __tablename__ = "login_attempts"
+    
+    id = Column(Integer, primary_key=True)
+    key = Column(String(200), nullable=False, index=True)  # "email:..." | "ip:..."
+    attempted_at = Column(DateTime, default=clock.utcnow, nullable=False, index=True)
\ No newline at end of file
@@ -1,19 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Uuid
 from sqlalchemy.orm import relationship
-from datetime import datetime, timedelta
+from datetime import timedelta
 import uuid
 from app.database import Base
+from app.core import clock
+from app.core.config import settings
 
 class Session(Base):
     __tablename__ = "sessions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     dj_id = Column(Integer, ForeignKey("djs.id", ondelete="CASCADE"), nullable=False)
     venue_id = Column(Integer, ForeignKey("venues.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=clock.utcnow)
     expires_at = Column(DateTime, nullable=False)
-    last_activity = Column(DateTime, default=datetime.utcnow)
+    last_activity = Column(DateTime, default=clock.utcnow)
     user_agent = Column(Text, nullable=True)
     ip_address = Column(String(45), nullable=True)
     booking_count = Column(Integer, default=0)
@@ -23,13 +24,21 @@ class Session(Base):
     venue = relationship("Venue", back_populates="sessions")
     bookings = relationship("Booking", back_populates="session")
     
+    @classmethod
+    def created_within_lifetime(cls):
+        """
+        Filtro su created_at che limita la query alle sessioni ancora potenzialmente valide.
+        Sulle tabelle partizionate permette il partition pruning (solo le partizioni recenti).
+        """
+        return cls.created_at >= clock.utcnow() - timedelta(hours=settings.SESSION_DURATION_HOURS)
+    
     @property
     def is_expired(self):
-        return datetime.utcnow() > self.expires_at
+        return clock.utcnow() > self.expires_at
     
     @property
     def remaining_minutes(self):
         if self.is_expired:
             return 0
-        delta = self.expires_at - datetime.utcnow()
+        delta = self.expires_at - clock.utcnow()
         return int(delta.total_seconds() / 60)
\ No newline at end of file
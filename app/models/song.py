@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Song(Base):
     __tablename__ = "songs"
+    __table_args__ = (
+        # Un titolo per DJ: la verifica della canzone in prenotazione è una ricerca sull'indice
+        Index("uq_songs_dj_file_name", "dj_id", "file_name", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     file_name = Column(String(300), nullable=False)
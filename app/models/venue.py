@@ -13,6 +13,8 @@ class Venue(Base):
     notes = Column(Text, nullable=True)
     active = Column(Boolean, default=False, index=True)
     dj_id = Column(Integer, ForeignKey("djs.id", ondelete="CASCADE"), nullable=False)
+    # ETag della lista prenotazioni: +1 a ogni scrittura sulle prenotazioni del locale
+    bookings_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
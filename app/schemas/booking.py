@@ -5,7 +5,8 @@ import uuid
 
 class BookingCreate(BaseModel):
     user_name: str
-    song: str
+    song: Optional[str] = None  # titolo (anche fuori catalogo) oppure song_id
+    song_id: Optional[int] = None
     key: Optional[str] = "0"
     venue_id: int
 
@@ -13,6 +14,7 @@ class BookingResponse(BaseModel):
     id: int
     user_name: str
     song: str
+    song_id: Optional[int] = None
     key: str
     status: str
     venue_id: int
@@ -26,6 +28,7 @@ class BookingWithVenue(BaseModel):
     id: int
     user_name: str
     song: str
+    song_id: Optional[int] = None
     key: str
     status: str
     venue_name: str
@@ -18,4 +18,5 @@ class SongListResponse(BaseModel):
     songs: List[SongResponse]
     total: int
     pages: int
-    current_page: int
\ No newline at end of file
+    current_page: int
+    limited: bool = False  # ricerca oltre 1000 risultati: total è troncato
\ No newline at end of file
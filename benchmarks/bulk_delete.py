@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cancellazione massiva prenotazioni + riparazione contatori sessioni.
+
+Confronta l'implementazione precedente (una SELECT Session + update Python per ogni
+sessione) con quella set-based (un solo UPDATE ... FROM + DELETE) usata da
+delete_venue_bookings e delete_all_bookings.
+
+Uso:
+    python -m benchmarks.bulk_delete                       # SQLite temporaneo
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bulk_delete
+    python -m benchmarks.bulk_delete --sessions 500 --bookings 3 --rounds 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Il database va configurato prima di importare app.*
+_tmp_db = os.path.join(tempfile.gettempdir(), f"karaokati_bench_{uuid.uuid4().hex[:8]}.db")
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{_tmp_db}")
+os.environ.setdefault("DEBUG", "False")
+
+from sqlalchemy import event, func, select
+
+from app.database import Base, SessionLocal, engine
+from app.models import DJ, Venue, Session, Booking
+from app.api.v1.bookings import release_session_slots, reset_session_slots
+
+
+# =============================================================================
+# IMPLEMENTAZIONI A CONFRONTO
+# =============================================================================
+
+def legacy_delete_venue_bookings(db, venue_id: int) -> int:
+    """Implementazione precedente: una query per ogni sessione coinvolta"""
+    sessions_to_update = db.query(Session.id, func.count(Booking.id).label('count')).join(
+        Booking, Session.id == Booking.session_id
+    ).filter(
+        Booking.venue_id == venue_id,
+        Booking.session_id.isnot(None)
+    ).group_by(Session.id).all()
+    
+    for session_id, booking_count in sessions_to_update:
+        session = db.query(Session).filter(Session.id == session_id).first()
+        if session:
+            session.booking_count = max(0, session.booking_count - booking_count)
+    
+    deleted_count = db.query(Booking).filter(Booking.venue_id == venue_id).delete()
+    db.commit()
+    return deleted_count
+
+def setbased_delete_venue_bookings(db, venue_id: int) -> int:
+    """Implementazione attuale: UPDATE ... FROM (GROUP BY) + DELETE"""
+    db.execute(release_session_slots(Booking.venue_id == venue_id))
+    deleted_count = db.query(Booking).filter(
+        Booking.venue_id == venue_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted_count
+
+def legacy_delete_all_bookings(db, dj_id: int) -> int:
+    venue_ids = select(Venue.id).where(Venue.dj_id == dj_id)
+    sessions_to_reset = db.query(Session).join(
+        Booking, Session.id == Booking.session_id
+    ).filter(
+        Booking.venue_id.in_(venue_ids),
+        Booking.session_id.isnot(None)
+    ).distinct().all()
+    for session in sessions_to_reset:
+        session.booking_count = 0
+    deleted_count = db.query(Booking).filter(
+        Booking.venue_id.in_(venue_ids)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted_count
+
+def setbased_delete_all_bookings(db, dj_id: int) -> int:
+    venue_ids = select(Venue.id).where(Venue.dj_id == dj_id)
+    db.execute(reset_session_slots(Booking.venue_id.in_(venue_ids)))
+    deleted_count = db.query(Booking).filter(
+        Booking.venue_id.in_(venue_ids)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted_count
+
+
+# =============================================================================
+# SETUP DATI
+# =============================================================================
+
+def seed(n_sessions: int, bookings_per_session: int) -> tuple[int, int]:
+    """Crea DJ + venue + n sessioni con prenotazioni. Ritorna (dj_id, venue_id)"""
+    db = SessionLocal()
+    try:
+        dj = DJ(
+            full_name="Bench DJ",
+            stage_name="Bench",
+            email=f"bench_{uuid.uuid4().hex[:8]}@karaokati.com",
+            password_hash="x",
+            qr_code_id=f"BENCH-{uuid.uuid4().hex[:12]}",
+            email_verified=True
+        )
+        db.add(dj)
+        db.flush()
+        venue = Venue(name="Bench Venue", dj_id=dj.id, active=True)
+        db.add(venue)
+        db.flush()
+        
+        now = datetime.utcnow()
+        sessions = [
+            {
+                "id": uuid.uuid4(),
+                "dj_id": dj.id,
+                "venue_id": venue.id,
+                "created_at": now,
+                "expires_at": now + timedelta(hours=6),
+                "booking_count": bookings_per_session + 1,
+            }
+            for _ in range(n_sessions)
+        ]
+        db.execute(Session.__table__.insert(), sessions)
+        db.execute(Booking.__table__.insert(), [
+            {
+                "user_name": f"singer {i}",
+                "song": "Bench Song.mp3",
+                "key": "0",
+                "status": "pending",
+                "venue_id": venue.id,
+                "session_id": s["id"],
+                "created_at": now,
+            }
+            for s in sessions
+            for i in range(bookings_per_session)
+        ])
+        db.commit()
+        return dj.id, venue.id
+    finally:
+        db.close()
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+    
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def run_case(name: str, impl, target: str, args) -> dict:
+    timings = []
+    statements = []
+    for _ in range(args.rounds):
+        dj_id, venue_id = seed(args.sessions, args.bookings)
+        counter = StatementCounter()
+        event.listen(engine, "before_cursor_execute", counter)
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            deleted = impl(db, venue_id if target == "venue" else dj_id)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+            event.remove(engine, "before_cursor_execute", counter)
+        statements.append(counter.count)
+        assert deleted == args.sessions * args.bookings, f"{name}: {deleted} eliminate"
+        # venue: resta lo slot "extra" di ogni sessione; all: contatori azzerati
+        check = SessionLocal()
+        try:
+            leftover = check.query(func.sum(Session.booking_count)).filter(
+                Session.venue_id == venue_id
+            ).scalar()
+        finally:
+            check.close()
+        expected = args.sessions if target == "venue" else 0
+        assert leftover == expected, f"{name}: contatori sessioni non coerenti"
+    
+    return {
+        "name": name,
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "statements": statements[0],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300, help="Sessioni coinvolte")
+    parser.add_argument("--bookings", type=int, default=3, help="Prenotazioni per sessione")
+    parser.add_argument("--rounds", type=int, default=5, help="Ripetizioni per caso")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Sessioni: {args.sessions}, prenotazioni/sessione: {args.bookings}, round: {args.rounds}\n")
+    
+    results = [
+        run_case("delete_venue_bookings (legacy)", legacy_delete_venue_bookings, "venue", args),
+        run_case("delete_venue_bookings (set-based)", setbased_delete_venue_bookings, "venue", args),
+        run_case("delete_all_bookings (legacy)", legacy_delete_all_bookings, "dj", args),
+        run_case("delete_all_bookings (set-based)", setbased_delete_all_bookings, "dj", args),
+    ]
+    
+    print(f"{'Caso':<38} {'mediana ms':>11} {'min ms':>9} {'query':>7}")
+    print("-" * 68)
+    for r in results:
+        print(f"{r['name']:<38} {r['median_ms']:>11.2f} {r['min_ms']:>9.2f} {r['statements']:>7}")
+    
+    engine.dispose()
+    if os.path.exists(_tmp_db):
+        os.remove(_tmp_db)
+
+if __name__ == "__main__":
+    main()
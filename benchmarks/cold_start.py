@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start, dall'avvio del processo al primo 200 su /health.
+
+Misura separatamente la migrazione (python -m app.migrate) e l'avvio del server
+(stesso comando del Dockerfile), ripetendo N volte:
+    
+    DATABASE_URL=postgresql://... python -m benchmarks.cold_start --runs 5
+    DATABASE_URL=postgresql://... python -m benchmarks.cold_start --server uvicorn
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+SERVERS = {
+    "gunicorn": [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+    "uvicorn": [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", "{port}"],
+}
+
+
+def run_migrate(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "app.migrate"], env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_to_first_200(command: list[str], env: dict, port: int, timeout: float = 60.0) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"Il server è terminato con codice {process.returncode}")
+            time.sleep(0.01)
+        raise RuntimeError(f"Nessun 200 su /health dopo {timeout:.0f}s")
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=sorted(SERVERS), default="gunicorn")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    
+    env = dict(os.environ, PORT=str(args.port), DEBUG="False")
+    command = [part.format(port=args.port) for part in SERVERS[args.server]]
+    
+    migrate_times, startup_times = [], []
+    for _ in range(args.runs):
+        migrate_times.append(run_migrate(env))
+        startup_times.append(time_to_first_200(command, env, args.port))
+    
+    print(f"Server: {args.server}  run: {args.runs}\n")
+    print(f"{'fase':<28} {'mediana ms':>11} {'min ms':>8} {'max ms':>8}")
+    print("-" * 58)
+    for name, values in (
+        ("python -m app.migrate", migrate_times),
+        ("avvio → primo 200 /health", startup_times),
+    ):
+        print(
+            f"{name:<28} {statistics.median(values) * 1000:>11.0f} "
+            f"{min(values) * 1000:>8.0f} {max(values) * 1000:>8.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: richieste/secondo con N cantanti concorrenti (default 500).
+
+Ogni cantante ha la sua sessione (cookie) e ripete in loop il flusso tipico della
+serata: validate sessione, ricerca nel catalogo pubblico, lista "my-bookings" e,
+ogni tanto, una nuova prenotazione.
+
+Serve un server avviato sullo STESSO database indicato da DATABASE_URL
+(il DJ di test viene creato direttamente sul DB):
+    
+    DATABASE_URL=postgresql://... uvicorn app.main:app --port 8000
+    DATABASE_URL=postgresql://... python -m benchmarks.concurrency --singers 500 --duration 20
+
+Per confrontare sync vs async basta lanciarlo contro due commit diversi.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+os.environ.setdefault("DEBUG", "False")
+
+SONGS = [f"Artista {i:04d} - Canzone Karaoke {i:04d}.mp3" for i in range(2000)]
+SEARCH_TERMS = ["art", "canz", "karaoke 01", "artista 1", "0042", "canzone karaoke 19"]
+
+
+def seed_dj(n_songs: int) -> str:
+    """Crea DJ verificato + venue attivo + catalogo. Ritorna il qr_code_id"""
+    from app.database import SessionLocal, engine
+    from app.migrate import migrate
+    from app.models import DJ, Venue, Song
+    
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        qr_code_id = f"BENCH-{uuid.uuid4().hex[:12].upper()}"
+        dj = DJ(
+            full_name="Bench DJ",
+            stage_name="Bench",
+            email=f"bench_{uuid.uuid4().hex[:8]}@karaokati.com",
+            password_hash="x",
+            qr_code_id=qr_code_id,
+            email_verified=True,
+            max_bookings_per_user=999
+        )
+        db.add(dj)
+        db.flush()
+        db.add(Venue(name="Bench Venue", dj_id=dj.id, active=True))
+        db.execute(Song.__table__.insert(), [
+            {"file_name": name, "dj_id": dj.id} for name in SONGS[:n_songs]
+        ])
+        db.commit()
+        return qr_code_id
+    finally:
+        db.close()
+        engine.dispose()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+    
+    def record(self, name: str, elapsed: float, ok: bool):
+        self.latencies[name].append(elapsed)
+        if not ok:
+            self.errors[name] += 1
+
+
+async def timed(client: httpx.AsyncClient, stats: Stats, name: str, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    stats.record(name, time.perf_counter() - start, ok)
+
+
+async def singer(client: httpx.AsyncClient, stats: Stats, qr_code_id: str, cookie: str, deadline: float):
+    headers = {"Cookie": f"session_id={cookie}"}
+    rng = random.Random(cookie)
+    while time.perf_counter() < deadline:
+        await timed(client, stats, "GET /sessions/validate", "GET", "/sessions/validate", headers=headers)
+        await timed(
+            client, stats, "GET /songs/public/{qr_code_id}", "GET", f"/songs/public/{qr_code_id}",
+            params={"search": rng.choice(SEARCH_TERMS), "limit": 20}, headers=headers
+        )
+        await timed(client, stats, "GET /bookings/user/my-bookings", "GET", "/bookings/user/my-bookings", headers=headers)
+        if rng.random() < 0.1:
+            await timed(
+                client, stats, "POST /bookings/user", "POST", "/bookings/user",
+                params={"user_name": "Bench", "song": rng.choice(SONGS[:100])}, headers=headers
+            )
+
+
+async def drive(base_url: str, qr_code_id: str, singers: int, duration: float) -> tuple[Stats, float]:
+    """Crea una sessione per cantante e li fa girare fino alla scadenza. Ritorna (stats, secondi)"""
+    limits = httpx.Limits(max_connections=singers, max_keepalive_connections=singers)
+    timeout = httpx.Timeout(60.0)
+    
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        # Crea una sessione per cantante (concorrenza limitata)
+        semaphore = asyncio.Semaphore(50)
+        
+        async def create_session():
+            async with semaphore:
+                response = await client.post(f"/sessions/create/{qr_code_id}")
+                response.raise_for_status()
+                return response.json()["session_id"]
+        
+        cookies = await asyncio.gather(*(create_session() for _ in range(singers)))
+        
+        stats = Stats()
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(singer(client, stats, qr_code_id, c, deadline) for c in cookies))
+        return stats, time.perf_counter() - start
+
+
+def report(stats: Stats, elapsed: float):
+    total = sum(len(v) for v in stats.latencies.values())
+    print(f"Richieste totali: {total}  RPS: {total / elapsed:.1f}\n")
+    print(f"{'Endpoint':<36} {'n':>7} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print("-" * 78)
+    for name, values in sorted(stats.latencies.items()):
+        values.sort()
+        q = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+        print(
+            f"{name:<36} {len(values):>7} {stats.errors[name]:>5} "
+            f"{q[49] * 1000:>8.1f} {q[94] * 1000:>8.1f} {q[98] * 1000:>8.1f}"
+        )
+
+
+async def run(args):
+    qr_code_id = seed_dj(args.songs)
+    stats, elapsed = await drive(args.base_url, qr_code_id, args.singers, args.duration)
+    print(f"Server: {args.base_url}  cantanti: {args.singers}  durata: {elapsed:.1f}s")
+    report(stats, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--singers", type=int, default=500, help="Cantanti concorrenti")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durata in secondi")
+    parser.add_argument("--songs", type=int, default=2000, help="Canzoni nel catalogo del DJ")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Load test: una serata karaoke simulata contro un server locale.
+
+Fasi (stessi cantanti, in parallelo):
+1. QR storm: i cantanti arrivano nei primi --arrival secondi
+   (qr-flow → create sessione → validate).
+2. Ogni cantante cerca una canzone digitando (una richiesta al catalogo per
+   tasto), la prenota con probabilità --book-rate e poi controlla "my-bookings"
+   ogni --poll-interval secondi.
+3. Il DJ fa polling della lista prenotazioni e accetta quelle in attesa.
+
+Riporta p50/p95/p99 per endpoint; --save salva i risultati in JSON e
+--baseline li confronta con un run precedente (es. un altro commit):
+    
+    # server già avviato sullo stesso DATABASE_URL
+    DATABASE_URL=postgresql://... python -m benchmarks.karaoke_night --singers 300
+    
+    # avvia da solo migrate + uvicorn (SQLite o Postgres locale)
+    DATABASE_URL=sqlite:///./night.db python -m benchmarks.karaoke_night --start-server --save night.json
+    DATABASE_URL=sqlite:///./night.db python -m benchmarks.karaoke_night --start-server --baseline night.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmarks.concurrency import SONGS, Stats, timed
+from benchmarks.workers import stop_server, wait_healthy
+
+os.environ.setdefault("DEBUG", "False")
+
+DJ_PASSWORD = "karaoke-night"
+
+
+def seed_night(n_songs: int) -> dict:
+    """DJ verificato (con password) + venue attivo + catalogo"""
+    from app.core.security import get_password_hash
+    from app.database import SessionLocal, engine
+    from app.migrate import migrate
+    from app.models import DJ, Venue, Song
+    
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        email = f"night_{uuid.uuid4().hex[:8]}@karaokati.com"
+        dj = DJ(
+            full_name="Night DJ",
+            stage_name="Night",
+            email=email,
+            password_hash=get_password_hash(DJ_PASSWORD),
+            qr_code_id=f"NIGHT-{uuid.uuid4().hex[:12].upper()}",
+            email_verified=True,
+            max_bookings_per_user=999
+        )
+        db.add(dj)
+        db.flush()
+        venue = Venue(name="Night Venue", dj_id=dj.id, active=True)
+        db.add(venue)
+        db.execute(Song.__table__.insert(), [
+            {"file_name": name, "dj_id": dj.id} for name in SONGS[:n_songs]
+        ])
+        db.commit()
+        return {"email": email, "qr_code_id": dj.qr_code_id, "venue_id": venue.id}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+async def singer(client: httpx.AsyncClient, stats: Stats, night: dict, args, index: int, deadline: float):
+    rng = random.Random(index)
+    qr_code_id = night["qr_code_id"]
+    
+    # 1. QR storm: arrivo distribuito nei primi secondi
+    await asyncio.sleep(rng.uniform(0, args.arrival))
+    await timed(client, stats, "GET /sessions/qr-flow/{qr_code_id}", "GET", f"/sessions/qr-flow/{qr_code_id}")
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"/sessions/create/{qr_code_id}")
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    stats.record("POST /sessions/create/{qr_code_id}", time.perf_counter() - start, ok)
+    if not ok:
+        return
+    headers = {"Cookie": f"session_id={response.json()['session_id']}"}
+    await timed(client, stats, "GET /sessions/validate", "GET", "/sessions/validate", headers=headers)
+    
+    while time.perf_counter() < deadline:
+        # 2. Ricerca "per tasto": una richiesta per ogni carattere digitato
+        song = rng.choice(SONGS[:args.songs])
+        term = song.split(" - ")[1].lower()[:rng.randint(3, 10)]
+        for length in range(1, len(term) + 1):
+            await timed(
+                client, stats, "GET /songs/public/{qr_code_id}", "GET", f"/songs/public/{qr_code_id}",
+                params={"search": term[:length], "limit": 20}, headers=headers
+            )
+            await asyncio.sleep(args.keystroke_delay)
+        
+        if rng.random() < args.book_rate:
+            await timed(
+                client, stats, "POST /bookings/user", "POST", "/bookings/user",
+                params={"user_name": f"Cantante {index}", "song": song}, headers=headers
+            )
+        
+        # Polling della propria lista prima della prossima ricerca
+        for _ in range(rng.randint(1, 4)):
+            if time.perf_counter() >= deadline:
+                break
+            await asyncio.sleep(args.poll_interval)
+            await timed(client, stats, "GET /bookings/user/my-bookings", "GET", "/bookings/user/my-bookings", headers=headers)
+
+
+async def dj(client: httpx.AsyncClient, stats: Stats, night: dict, args, deadline: float):
+    response = await client.post("/auth/login", json={"email": night["email"], "password": DJ_PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get("/bookings", params={"venue_id": night["venue_id"]}, headers=headers)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        stats.record("GET /bookings", time.perf_counter() - start, ok)
+        
+        if ok:
+            pending = [b["id"] for b in response.json() if b["status"] == "pending"]
+            for booking_id in pending[:args.accept_per_poll]:
+                await timed(client, stats, "POST /bookings/{booking_id}/accept", "POST", f"/bookings/{booking_id}/accept", headers=headers)
+        
+        await asyncio.sleep(args.dj_poll_interval)
+
+
+def summarize(stats: Stats, elapsed: float) -> dict:
+    endpoints = {}
+    for name, values in sorted(stats.latencies.items()):
+        values.sort()
+        q = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+        endpoints[name] = {
+            "n": len(values),
+            "errors": stats.errors[name],
+            "p50_ms": round(q[49] * 1000, 1),
+            "p95_ms": round(q[94] * 1000, 1),
+            "p99_ms": round(q[98] * 1000, 1),
+        }
+    total = sum(e["n"] for e in endpoints.values())
+    return {"elapsed_s": round(elapsed, 1), "requests": total, "rps": round(total / elapsed, 1), "endpoints": endpoints}
+
+def print_summary(summary: dict, baseline: dict | None):
+    print(f"Richieste totali: {summary['requests']}  RPS: {summary['rps']}"
+          + (f"  (baseline {baseline['rps']})" if baseline else "") + "\n")
+    print(f"{'Endpoint':<38} {'n':>7} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print("-" * 80)
+    for name, e in summary["endpoints"].items():
+        print(f"{name:<38} {e['n']:>7} {e['errors']:>5} {e['p50_ms']:>8} {e['p95_ms']:>8} {e['p99_ms']:>8}")
+        base = (baseline or {}).get("endpoints", {}).get(name)
+        if base:
+            print(f"{'  baseline':<38} {base['n']:>7} {base['errors']:>5} {base['p50_ms']:>8} {base['p95_ms']:>8} {base['p99_ms']:>8}")
+
+
+async def run(args, night: dict) -> dict:
+    limits = httpx.Limits(max_connections=args.singers + 10, max_keepalive_connections=args.singers + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=httpx.Timeout(60.0)) as client:
+        stats = Stats()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            dj(client, stats, night, args, deadline),
+            *(singer(client, stats, night, args, i, deadline) for i in range(args.singers))
+        )
+        return summarize(stats, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--start-server", action="store_true", help="Avvia uvicorn su --port con DATABASE_URL")
+    parser.add_argument("--port", type=int, default=8777)
+    parser.add_argument("--singers", type=int, default=200, help="Cantanti nella serata")
+    parser.add_argument("--duration", type=float, default=60.0, help="Durata della serata in secondi")
+    parser.add_argument("--arrival", type=float, default=10.0, help="Secondi del QR storm iniziale")
+    parser.add_argument("--songs", type=int, default=2000, help="Canzoni nel catalogo del DJ")
+    parser.add_argument("--keystroke-delay", type=float, default=0.15)
+    parser.add_argument("--book-rate", type=float, default=0.3)
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Polling my-bookings (s)")
+    parser.add_argument("--dj-poll-interval", type=float, default=2.0, help="Polling DJ (s)")
+    parser.add_argument("--accept-per-poll", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Salva i risultati in JSON")
+    parser.add_argument("--baseline", help="Confronta con un JSON salvato con --save")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    
+    night = seed_night(args.songs)
+    server = None
+    if args.start_server:
+        args.base_url = f"http://127.0.0.1:{args.port}/api/v1"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            env=dict(os.environ, DEBUG="False"),
+            stdout=subprocess.DEVNULL,
+        )
+        wait_healthy(args.port)
+    
+    try:
+        summary = asyncio.run(run(args, night))
+    finally:
+        if server is not None:
+            stop_server(server)
+    
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(f"Server: {args.base_url}  cantanti: {args.singers}  durata: {summary['elapsed_s']}s\n")
+    print_summary(summary, baseline)
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"args": vars(args), **summary}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
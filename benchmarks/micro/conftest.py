@@ -0,0 +1,29 @@
+"""
+Micro-benchmark (pytest-benchmark) dei percorsi caldi, senza server né database:
+decode del token, scadenza sessione, template email, handler degli endpoint
+chiamati con una AsyncSession finta (stubs.py) + serializzazione della risposta
+come la fa FastAPI.
+
+Baseline salvate in benchmarks/micro/.baselines (per macchina/interprete):
+    
+    # nuova baseline (es. sul commit di partenza)
+    python -m pytest benchmarks/micro --benchmark-save=baseline
+    
+    # confronto in review: fallisce se la media peggiora oltre il 25%
+    python -m pytest benchmarks/micro --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+import os
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='karaokati-bench-')}/bench.db")
+os.environ["DEBUG"] = "False"
+os.environ.setdefault("FRONTEND_URL", "http://localhost:5173")
+
+BASELINES = Path(__file__).parent / ".baselines"
+
+
+def pytest_configure(config):
+    # Default di pytest-benchmark (./.benchmarks) → baseline versionate accanto ai benchmark
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{BASELINES}"
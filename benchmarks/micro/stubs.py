@@ -0,0 +1,103 @@
+"""Helper dei micro-benchmark: DB finto e serializzazione delle risposte come FastAPI"""
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import Response
+from fastapi.routing import serialize_response
+
+
+def run(coro):
+    """
+    Esegue una coroutine che non si sospende mai (DB finto): niente event loop,
+    il benchmark misura solo il codice dell'handler.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("La coroutine si è sospesa: serve un event loop")
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+    
+    def all(self):
+        return self.value
+    
+    def first(self):
+        return self.value
+    
+    def scalars(self):
+        return self
+
+
+class StubAsyncSession:
+    """
+    AsyncSession finta: ogni chiamata a scalar/scalars/execute/get ritorna il
+    prossimo risultato preparato, senza costruire né eseguire SQL.
+    """
+    
+    def __init__(self, *results):
+        self._results = iter(results)
+    
+    async def scalar(self, statement):
+        return next(self._results)
+    
+    async def scalars(self, statement):
+        return _Result(next(self._results))
+    
+    async def execute(self, statement):
+        return _Result(next(self._results))
+    
+    async def get(self, model, ident):
+        return next(self._results)
+    
+    def add(self, instance):
+        pass
+    
+    async def commit(self):
+        pass
+    
+    async def refresh(self, instance):
+        pass
+
+
+class _StubQuery:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def filter(self, *criteria):
+        return self
+    
+    order_by = offset = limit = filter
+    
+    def count(self):
+        return len(self.rows)
+    
+    def all(self):
+        return self.rows
+
+
+class StubSession:
+    """Session sync finta per gli handler con db.query(...): ogni query ritorna le stesse righe"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def query(self, *entities):
+        return _StubQuery(self.rows)
+
+
+def response_body(app, method: str, path: str, content) -> bytes:
+    """Serializza il risultato di un handler come FastAPI (response_model + response_class)"""
+    if isinstance(content, Response):
+        return content.body
+    route = next(
+        route for route in app.routes
+        if getattr(route, "path", None) == path and method in getattr(route, "methods", ())
+    )
+    value = run(serialize_response(field=route.response_field, response_content=content, is_coroutine=True))
+    response_class = route.response_class
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+    return response_class(value).body
\ No newline at end of file
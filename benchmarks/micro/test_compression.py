@@ -0,0 +1,65 @@
+"""
+Compressione delle risposte tipiche: CPU per richiesta (tempo del benchmark) e
+byte sul filo (extra_info: raw_bytes, wire_bytes, ratio) per livello/qualità.
+
+    python -m pytest benchmarks/micro/test_compression.py --benchmark-group-by=param:payload
+"""
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+from app.core.compression import compress
+from benchmarks.concurrency import SONGS
+
+NOW = datetime(2025, 11, 15, 21, 30)
+
+
+def bookings(n: int) -> bytes:
+    return orjson.dumps([
+        {
+            "id": i, "user_name": f"Cantante {i}", "song": SONGS[i % len(SONGS)], "key": "0",
+            "status": ("pending", "accepted", "rejected")[i % 3], "venue_name": "Venue Bench",
+            "session_id": None, "created_at": NOW - timedelta(seconds=i)
+        }
+        for i in range(n)
+    ])
+
+def catalog_page(n: int) -> bytes:
+    return orjson.dumps({
+        "songs": [{"id": i, "file_name": name} for i, name in enumerate(SONGS[:n])],
+        "total": len(SONGS), "pages": 2, "current_page": 1, "limited": False
+    })
+
+def public_catalog(n: int) -> bytes:
+    return orjson.dumps({"songs": SONGS[:n], "total": len(SONGS), "dj_name": "DJ Bench"})
+
+
+PAYLOADS = {
+    "bookings-50": bookings(50),
+    "bookings-1000": bookings(1000),
+    "catalog-1000": catalog_page(1000),
+    "public-catalog-50": public_catalog(50),
+}
+
+# (codifica, livello gzip, qualità brotli): default dell'app = gzip-1 e br-4
+LEVELS = {
+    "gzip-1": ("gzip", 1, None),
+    "gzip-6": ("gzip", 6, None),
+    "gzip-9": ("gzip", 9, None),
+    "br-1": ("br", None, 1),
+    "br-4": ("br", None, 4),
+    "br-6": ("br", None, 6),
+}
+
+
+@pytest.mark.parametrize("level", LEVELS)
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_compress(benchmark, payload, level):
+    body = PAYLOADS[payload]
+    encoding, gzip_level, brotli_quality = LEVELS[level]
+    
+    wire = benchmark(compress, body, encoding, gzip_level, brotli_quality)
+    
+    benchmark.extra_info.update(raw_bytes=len(body), wire_bytes=len(wire), ratio=round(len(body) / len(wire), 1))
+    assert len(wire) < len(body)
\ No newline at end of file
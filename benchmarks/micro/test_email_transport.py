@@ -0,0 +1,52 @@
+"""
+Invio di 10 email al finto provider locale (tests/fake_email_api.py): client
+nuovo per email (come il vecchio SDK) vs client con pool vs una richiesta batch.
+
+In locale manca l'handshake TLS, che verso il provider reale è il costo più
+grande di una connessione nuova: qui la differenza è un limite inferiore.
+
+    python -m pytest benchmarks/micro/test_email_transport.py
+"""
+import httpx
+import pytest
+
+from app.core.email_transport import EmailMessage, ResendTransport
+from tests.fake_email_api import FakeEmailAPI
+
+SENDER = "Karaokati <admin@karaokati.com>"
+MESSAGES = [EmailMessage(f"dj{i}@karaokati.com", "Verifica il tuo account", "<p>Ciao</p>" * 50, "Ciao\n") for i in range(10)]
+
+
+@pytest.fixture(scope="module")
+def email_api():
+    api = FakeEmailAPI()
+    api.start()
+    yield api
+    api.stop()
+
+
+def test_new_connection_per_email(benchmark, email_api):
+    def send_all():
+        for message in MESSAGES:
+            with httpx.Client(base_url=email_api.url) as client:
+                client.post("/emails", json=message.payload(SENDER)).raise_for_status()
+    
+    benchmark(send_all)
+
+def test_pooled_client(benchmark, email_api):
+    transport = ResendTransport(email_api.url, "re_bench")
+    
+    def send_all():
+        for message in MESSAGES:
+            transport.send([message], SENDER)
+    
+    benchmark(send_all)
+    transport.close()
+
+def test_batch_request(benchmark, email_api):
+    transport = ResendTransport(email_api.url, "re_bench")
+    
+    ids = benchmark(transport.send, MESSAGES, SENDER)
+    
+    assert len(ids) == len(MESSAGES)
+    transport.close()
\ No newline at end of file
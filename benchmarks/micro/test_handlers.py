@@ -0,0 +1,110 @@
+"""
+Handler degli endpoint ad alto traffico con DB finto: costruzione delle query,
+delle liste di risposta e serializzazione JSON (response_model compreso).
+"""
+from datetime import datetime, timedelta
+import uuid
+
+import pytest
+from fastapi import Request, Response
+
+from app.api.v1.bookings import get_bookings, get_user_bookings
+from app.api.v1.songs import get_public_catalog, get_songs
+from app.main import app
+from app.models import DJ, Booking, Session, Venue
+from benchmarks.concurrency import SONGS
+from benchmarks.micro.stubs import StubAsyncSession, StubSession, response_body, run
+
+NOW = datetime(2025, 11, 15, 21, 30)
+
+# Richiesta senza If-None-Match: percorso completo (righe + serializzazione)
+REQUEST = Request({"type": "http", "method": "GET", "headers": []})
+
+
+@pytest.fixture(scope="module")
+def night():
+    dj = DJ(id=1, stage_name="DJ Bench", qr_code_id="BENCH-2025-ABCDEFGH", max_bookings_per_user=999)
+    venue = Venue(id=1, name="Venue Bench", address="Via Roma 1", dj_id=1, active=True)
+    session = Session(
+        id=uuid.uuid4(), dj_id=1, venue_id=1, booking_count=5,
+        created_at=NOW, expires_at=NOW + timedelta(hours=6)
+    )
+    return dj, venue, session
+
+def make_bookings(n: int, session_id=None) -> list[Booking]:
+    return [
+        Booking(
+            id=i, user_name=f"Cantante {i}", song=SONGS[i % len(SONGS)], song_id=i % len(SONGS) + 1, key="0",
+            status=("pending", "accepted", "rejected")[i % 3], venue_id=1,
+            session_id=session_id or (uuid.uuid4() if i % 4 else None),
+            created_at=NOW - timedelta(seconds=i)
+        )
+        for i in range(n)
+    ]
+
+def booking_rows(bookings: list[Booking]) -> list[tuple]:
+    return [(b.id, b.user_name, b.song, b.song_id, b.key, b.status, b.session_id, b.created_at) for b in bookings]
+
+
+# ==================== PRENOTAZIONI ====================
+
+@pytest.mark.parametrize("rows", [50, 1000])
+def test_get_bookings(benchmark, night, rows):
+    dj, venue, _ = night
+    bookings = booking_rows(make_bookings(rows))
+    
+    def handler():
+        result = run(get_bookings(request=REQUEST, venue_id=venue.id, current_dj=dj, db=StubAsyncSession((venue.name, 7), bookings)))
+        return response_body(app, "GET", "/api/v1/bookings", result)
+    
+    assert benchmark(handler).count(b'"user_name"') == rows
+
+def test_get_bookings_not_modified(benchmark, night):
+    dj, venue, _ = night
+    request = Request({"type": "http", "method": "GET", "headers": [(b"if-none-match", b'W/"bookings-1-7"')]})
+    
+    def handler():
+        return run(get_bookings(request=request, venue_id=venue.id, current_dj=dj, db=StubAsyncSession((venue.name, 7))))
+    
+    assert benchmark(handler).status_code == 304
+
+def test_get_user_bookings(benchmark, night):
+    dj, venue, session = night
+    bookings = [(b.id, b.user_name, b.song, b.song_id, b.key, b.status, b.created_at) for b in make_bookings(5, session.id)]
+    venue_row = (venue.id, venue.name, venue.address, 7)
+    
+    def handler():
+        result = run(get_user_bookings(
+            request=REQUEST, response=Response(), session=session, db=StubAsyncSession(dj.max_bookings_per_user, venue_row, bookings)
+        ))
+        return response_body(app, "GET", "/api/v1/bookings/user/my-bookings", result)
+    
+    assert benchmark(handler).count(b'"can_delete"') == 5
+
+
+# ==================== CATALOGO ====================
+
+@pytest.mark.parametrize("per_page", [50, 1000])
+def test_get_songs(benchmark, night, per_page):
+    dj = night[0]
+    rows = [(i, name) for i, name in enumerate(SONGS[:per_page])]
+    
+    def handler():
+        result = get_songs(search=None, page=1, per_page=per_page, current_dj=dj, db=StubSession(rows))
+        return response_body(app, "GET", "/api/v1/songs", result)
+    
+    assert benchmark(handler).count(b'"file_name"') == per_page
+
+@pytest.mark.parametrize("search", [None, "battisti"])
+def test_public_catalog_search(benchmark, night, search):
+    dj = night[0]
+    dj_row = (dj.id, dj.stage_name, dj.qr_code_id)
+    
+    def handler():
+        result = run(get_public_catalog(
+            qr_code_id=dj.qr_code_id, search=search, limit=50, request=None,
+            db=StubAsyncSession(dj_row, SONGS[:50], len(SONGS))
+        ))
+        return response_body(app, "GET", "/api/v1/songs/public/{qr_code_id}", result)
+    
+    assert benchmark(handler).startswith(b'{"songs":')
\ No newline at end of file
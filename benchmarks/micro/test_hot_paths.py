@@ -0,0 +1,92 @@
+"""Funzioni pure sul percorso delle richieste: token, sessione, template email"""
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import decode_dj_token, get_current_dj_async
+from app.core import clock, email_templates
+from app.core.config import settings
+from app.core.security import clear_token_cache, create_access_token
+from app.models import Session
+from benchmarks.micro.stubs import StubAsyncSession, run
+
+
+@pytest.fixture(scope="module")
+def token():
+    return create_access_token({"dj_id": 42})
+
+
+# ==================== AUTH ====================
+
+@pytest.fixture(params=["cached", "uncached"])
+def claims_cache(request, monkeypatch):
+    """Cache dei claims JWT accesa (default) o spenta (firma verificata a ogni richiesta)"""
+    clear_token_cache()
+    if request.param == "uncached":
+        monkeypatch.setattr(settings, "TOKEN_CLAIMS_CACHE_SIZE", 0)
+    yield request.param
+    clear_token_cache()
+
+def test_decode_dj_token(benchmark, token, claims_cache):
+    assert benchmark(decode_dj_token, token).dj_id == 42
+
+def test_get_current_dj_async(benchmark, token, claims_cache):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    row = (42, "Mario Rossi", "DJ Bench", "dj@karaokati.com", None, "BENCH-2025-ABCDEFGH", True, 3, 0, 0)
+    
+    def current_dj():
+        return run(get_current_dj_async(credentials, StubAsyncSession(row)))
+    
+    assert benchmark(current_dj).id == 42
+
+
+# ==================== SESSIONE ====================
+
+@pytest.fixture
+def session():
+    return Session(expires_at=clock.utcnow() + timedelta(hours=6), booking_count=0)
+
+def test_session_is_expired(benchmark, session):
+    assert benchmark(lambda: session.is_expired) is False
+
+def test_session_remaining_minutes(benchmark, session):
+    assert 0 < benchmark(lambda: session.remaining_minutes) <= 360
+
+
+# ==================== TEMPLATE EMAIL ====================
+
+TEMPLATES = {
+    "verification": (email_templates.verification_email_template, (
+        "https://www.karaokati.com/verify-email/abc123", "https://www.karaokati.com/terms"
+    )),
+    "reset_password": (email_templates.reset_password_email_template, (
+        "https://www.karaokati.com/reset-password/abc123", "https://www.karaokati.com/terms"
+    )),
+    "account_deletion": (email_templates.account_deletion_email_template, (
+        "DJ Bench", "Mario Rossi", "https://www.karaokati.com/terms"
+    )),
+    "admin_registration": (email_templates.admin_registration_notification_template, (
+        "dj@karaokati.com", "DJ Bench", "Mario Rossi", "abc123", "https://www.karaokati.com/verify-email/abc123"
+    )),
+    "admin_password_reset": (email_templates.admin_password_reset_notification_template, (
+        "dj@karaokati.com", "DJ Bench", "abc123", "https://www.karaokati.com/reset-password/abc123"
+    )),
+    "admin_account_deletion": (email_templates.admin_account_deletion_notification_template, (
+        "dj@karaokati.com", "DJ Bench", "Mario Rossi"
+    )),
+}
+
+@pytest.mark.parametrize("name", TEMPLATES)
+def test_email_template(benchmark, name):
+    template, args = TEMPLATES[name]
+    subject, html_body, text_body = benchmark(template, *args)
+    assert subject and "<html" in html_body and text_body
+    
+    # Memoria per email: picco allocato da un render + byte spediti
+    tracemalloc.start()
+    template(*args)
+    benchmark.extra_info["allocated_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    benchmark.extra_info.update(html_bytes=len(html_body.encode()), text_bytes=len(text_body.encode()))
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Entità ORM contro proiezioni (app/crud/projections.py) su un SQLite in memoria:
+tempo di lettura e memoria allocata (tracemalloc, in extra_info del report).
+"""
+import tracemalloc
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.pool import StaticPool
+
+from app.crud.projections import CurrentDJ, get_current_dj_row
+from app.database import Base
+from app.models import DJ, Booking, Venue
+from benchmarks.concurrency import SONGS
+
+BOOKINGS = 1000
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with OrmSession(engine) as db:
+        dj = DJ(
+            full_name="Mario Rossi", stage_name="DJ Bench", email="bench@karaokati.com",
+            password_hash="x", qr_code_id="BENCH-2025-ABCDEFGH", email_verified=True
+        )
+        db.add(dj)
+        db.flush()
+        venue = Venue(name="Venue Bench", dj_id=dj.id, active=True)
+        db.add(venue)
+        db.flush()
+        db.add_all(
+            Booking(user_name=f"Cantante {i}", song=SONGS[i % len(SONGS)], key="0", venue_id=venue.id)
+            for i in range(BOOKINGS)
+        )
+        db.commit()
+        yield db
+    engine.dispose()
+
+
+def allocated(load) -> int:
+    """Picco di memoria allocata (byte) durante una lettura"""
+    tracemalloc.start()
+    try:
+        load()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# ==================== DJ CORRENTE ====================
+
+def load_dj_entity(db):
+    dj = db.get(DJ, 1)
+    db.expunge_all()
+    return dj
+
+def test_current_dj_entity(benchmark, db):
+    benchmark.extra_info["allocated_bytes"] = allocated(lambda: load_dj_entity(db))
+    assert benchmark(load_dj_entity, db).stage_name == "DJ Bench"
+
+def test_current_dj_projection(benchmark, db):
+    benchmark.extra_info["allocated_bytes"] = allocated(lambda: get_current_dj_row(db, 1))
+    assert isinstance(benchmark(get_current_dj_row, db, 1), CurrentDJ)
+
+
+# ==================== LISTA PRENOTAZIONI ====================
+
+def load_bookings_entity(db):
+    bookings = db.scalars(select(Booking)).all()
+    db.expunge_all()
+    return [(b.id, b.user_name, b.song, b.key, b.status, b.created_at) for b in bookings]
+
+def load_bookings_projection(db):
+    return db.execute(select(
+        Booking.id, Booking.user_name, Booking.song, Booking.key, Booking.status, Booking.created_at
+    )).all()
+
+@pytest.mark.parametrize("load", [load_bookings_entity, load_bookings_projection], ids=["entity", "projection"])
+def test_bookings(benchmark, db, load):
+    benchmark.extra_info["allocated_bytes"] = allocated(lambda: load(db))
+    assert len(benchmark(load, db)) == BOOKINGS
+
+def test_projection_allocates_less(db):
+    assert allocated(lambda: load_bookings_projection(db)) < allocated(lambda: load_bookings_entity(db))
+    assert allocated(lambda: get_current_dj_row(db, 1)) < allocated(lambda: load_dj_entity(db))
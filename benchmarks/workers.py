@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scaling da 1 a N worker gunicorn (gunicorn.conf.py).
+
+Per ogni numero di worker avvia gunicorn sulla porta indicata, attende /health
+e lancia il carico di benchmarks/concurrency.py (stesso DATABASE_URL):
+    
+    DATABASE_URL=postgresql://... python -m benchmarks.workers --max-workers 4 --singers 200
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.concurrency import drive, seed_dj
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), DEBUG="False")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_healthy(port: int, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server non pronto sulla porta {port} dopo {timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--singers", type=int, default=200, help="Cantanti concorrenti")
+    parser.add_argument("--duration", type=float, default=15.0, help="Durata per configurazione in secondi")
+    parser.add_argument("--songs", type=int, default=2000, help="Canzoni nel catalogo del DJ")
+    args = parser.parse_args()
+    
+    qr_code_id = seed_dj(args.songs)
+    base_url = f"http://127.0.0.1:{args.port}/api/v1"
+    
+    counts = sorted({2 ** i for i in range(args.max_workers.bit_length()) if 2 ** i <= args.max_workers} | {args.max_workers})
+    results = []
+    for workers in counts:
+        process = start_server(workers, args.port)
+        try:
+            wait_healthy(args.port)
+            stats, elapsed = asyncio.run(drive(base_url, qr_code_id, args.singers, args.duration))
+        finally:
+            stop_server(process)
+        
+        total = sum(len(v) for v in stats.latencies.values())
+        errors = sum(stats.errors.values())
+        results.append((workers, total / elapsed, errors))
+    
+    base_rps = results[0][1]
+    print(f"Cantanti: {args.singers}  durata: {args.duration:.0f}s per configurazione\n")
+    print(f"{'worker':>7} {'RPS':>9} {'speedup':>8} {'err':>6}")
+    print("-" * 34)
+    for n, rps, errors in results:
+        print(f"{n:>7} {rps:>9.1f} {rps / base_rps:>7.2f}x {errors:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Configurazione gunicorn per la produzione (worker uvicorn).
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+- Worker = WEB_CONCURRENCY oppure core disponibili al container.
+- preload_app: l'app viene importata una volta nel master e i worker la
+  condividono copy-on-write; le connessioni del pool ereditate dal master
+  vengono scartate in post_fork (ogni worker apre le proprie).
+- Shutdown graceful: SIGTERM → i worker finiscono le richieste in corso
+  (graceful_timeout) ed eseguono lo shutdown del lifespan (dispose engine).
+"""
+import os
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+workers = int(os.getenv("WEB_CONCURRENCY") or _available_cores())
+# Letto da settings (app/core/config.py) per dimensionare il pool per worker:
+# va impostato prima che preload_app importi l'applicazione
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# Metriche Prometheus multiprocess (app/core/metrics.py): la directory condivisa
+# riparte vuota a ogni avvio, prima che preload_app crei le metriche nel master
+_multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _multiproc_dir:
+    os.makedirs(_multiproc_dir, exist_ok=True)
+    for _name in os.listdir(_multiproc_dir):
+        os.remove(os.path.join(_multiproc_dir, _name))
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# IP del client dietro il proxy di Railway: X-Forwarded-For è letto dall'app
+# (TRUSTED_PROXY_HOPS, client_ip in app/api/deps.py). Non "*": con "*" uvicorn
+# userebbe la voce più a sinistra dell'header, che il client può falsificare
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Ricicla periodicamente i worker (con jitter per non riavviarli tutti insieme)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    """
+    Il worker non deve riusare le connessioni aperte dal master prima del fork.
+    Solo l'engine sync: il master non usa mai l'engine async (nessuna connessione
+    da scartare) e ricreare il suo pool fuori dal loop perde il lock asyncio del
+    first-connect di SQLAlchemy, bloccando il worker alle prime connessioni concorrenti.
+    """
+    from app.database import engine
+    
+    engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,163 @@
+"""
+Fixture della suite: app in-process (TestClient), nessun server in ascolto.
+
+- Database: un file SQLite per worker pytest-xdist (pytest -n auto), schema
+  creato una volta da app.migrate. TEST_DATABASE_URL per usare PostgreSQL
+  (in quel caso senza -n: i worker condividerebbero lo stesso database).
+- Isolamento: gli endpoint usano sia l'engine sync sia quello async, che non
+  possono condividere una transazione; dopo ogni test le tabelle vengono
+  svuotate (DELETE, pochi ms su SQLite).
+- Email: nessun invio reale, i messaggi finiscono nella fixture outbox.
+- Orologio: la fixture clock sposta in avanti il tempo visto dall'app
+  (scadenza sessioni) senza time.sleep.
+"""
+import os
+import tempfile
+import uuid
+
+_worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or (
+    f"sqlite:///{tempfile.mkdtemp(prefix='karaokati-tests-')}/{_worker}.db"
+)
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DEBUG"] = "False"
+os.environ.setdefault("FRONTEND_URL", "http://localhost:5173")
+os.environ.setdefault("STATIC_DIR", tempfile.mkdtemp(prefix="karaokati-static-"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import clock as app_clock
+from app.core import admin_digest, catalog_cache, email_service, health, login_throttle, token_versions
+from app.core.security import clear_token_cache, create_access_token, get_password_hash
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.migrate import migrate
+from app.models import DJ, Song, Venue
+
+API = "/api/v1"
+PASSWORD = "password123"
+
+# bcrypt è lento di proposito: un solo hash per tutta la suite
+_PASSWORD_HASH = get_password_hash(PASSWORD)
+
+SONGS = [
+    "Domenico Modugno - Volare - Nel Blu Dipinto di Blu.mp3",
+    "Lucio Battisti - Emozioni.mp3",
+    "Vasco Rossi - Albachiara.mp3",
+    "Laura Pausini - La Solitudine.mp3",
+    "Eros Ramazzotti - Più Bella Cosa.mp3",
+]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    migrate(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _isolation():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    app_clock.reset()
+    admin_digest.clear()
+    login_throttle.clear()
+    token_versions.clear()
+    catalog_cache.clear()
+    clear_token_cache()
+    health._cached = None
+
+
+@pytest.fixture(autouse=True)
+def outbox(monkeypatch):
+    """Email "inviate" durante il test: (destinatario, oggetto)"""
+    sent = []
+    
+    def fake_send(to_email: str, subject: str, html_body: str, text_body: str | None = None, on_failure=None):
+        sent.append((to_email, subject))
+        return True
+    
+    monkeypatch.setattr(email_service, "send_email", fake_send)
+    return sent
+
+
+@pytest.fixture
+def clock():
+    return app_clock
+
+
+@pytest.fixture
+def client():
+    # Un event loop per test: il lifespan chiude i pool alla fine
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+# ==================== DJ / LOCALE / CATALOGO ====================
+
+@pytest.fixture
+def make_dj(db):
+    """DJ verificato creato direttamente nel DB (password: PASSWORD)"""
+    def factory(email: str | None = None, **fields) -> DJ:
+        dj = DJ(
+            full_name=fields.pop("full_name", "Test DJ"),
+            stage_name=fields.pop("stage_name", "DJ Test"),
+            email=email or f"dj_{uuid.uuid4().hex[:8]}@karaokati.com",
+            password_hash=_PASSWORD_HASH,
+            qr_code_id=f"TEST-{uuid.uuid4().hex[:12].upper()}",
+            email_verified=True,
+            **fields
+        )
+        db.add(dj)
+        db.commit()
+        return dj
+    return factory
+
+@pytest.fixture
+def dj(make_dj):
+    return make_dj(max_bookings_per_user=3)
+
+def auth_headers(dj: DJ) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'dj_id': dj.id})}"}
+
+@pytest.fixture
+def auth(dj):
+    return auth_headers(dj)
+
+@pytest.fixture
+def venue(db, dj):
+    """Locale attivo del DJ con il catalogo SONGS"""
+    venue = Venue(name="Venue Test", address="Via Roma 1", capacity=100, dj_id=dj.id, active=True)
+    db.add(venue)
+    db.add_all(Song(file_name=name, dj_id=dj.id) for name in SONGS)
+    db.commit()
+    return venue
+
+
+# ==================== CANTANTI (SESSIONI) ====================
+
+@pytest.fixture
+def new_singer(client):
+    """Crea una sessione dal QR del DJ e ritorna gli header con il suo cookie"""
+    def factory(dj: DJ) -> dict:
+        response = client.post(f"{API}/sessions/create/{dj.qr_code_id}")
+        assert response.status_code == 200, response.text
+        # Cookie passato esplicitamente: ogni cantante ha il suo
+        client.cookies.clear()
+        return {"Cookie": f"session_id={response.json()['session_id']}"}
+    return factory
+
+@pytest.fixture
+def singer(new_singer, dj, venue):
+    return new_singer(dj)
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Finto provider email (API Resend) su 127.0.0.1 per i test del trasporto.
+
+Risponde a POST /emails e POST /emails/batch come Resend, in HTTP/1.1 con
+keep-alive. Registra le richieste e le connessioni TCP usate; ritardo e
+codice di risposta si cambiano durante il test:
+    
+    api.delay = 2       # provider lento
+    api.status = 503    # provider giù
+    api.rejected.add("bad@karaokati.com")  # 422 per le richieste con questo destinatario
+"""
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeEmailAPI:
+    def __init__(self):
+        self.requests: list[tuple[str, object]] = []
+        self.connections: set[tuple[str, int]] = set()
+        self.delay = 0.0
+        self.status = 200
+        self.rejected: set[str] = set()
+        self._ids = itertools.count(1)
+        self._release = threading.Event()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+    
+    @property
+    def emails(self) -> list[dict]:
+        """Email ricevute, singole e batch"""
+        return [email for path, body in self.requests for email in (body if path == "/emails/batch" else [body])]
+    
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+    
+    def stop(self):
+        self._release.set()
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def _handler(self):
+        api = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Header e corpo partono in due write: senza TCP_NODELAY il keep-alive aspetta l'ACK ritardato (~40 ms)
+            disable_nagle_algorithm = True
+            
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                api.connections.add(self.client_address)
+                if api.delay:
+                    api._release.wait(api.delay)
+                api.requests.append((self.path, body))
+                
+                status = api.status
+                if any(email["to"][0] in api.rejected for email in (body if self.path == "/emails/batch" else [body])):
+                    status = 422
+                if status != 200:
+                    payload = {"statusCode": status, "message": "errore finto"}
+                elif self.path == "/emails/batch":
+                    payload = {"data": [{"id": f"email-{next(api._ids)}"} for _ in body]}
+                else:
+                    payload = {"id": f"email-{next(api._ids)}"}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
\ No newline at end of file
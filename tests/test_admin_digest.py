@@ -0,0 +1,76 @@
+"""Notifiche admin a digest: accodate durante la richiesta, inviate in un'unica email"""
+from fastapi.testclient import TestClient
+
+from app.core import admin_digest, email_service
+from app.core.config import settings
+from app.main import app
+from tests.conftest import API, PASSWORD
+
+REGISTRATION = {
+    "full_name": "Mario Rossi",
+    "stage_name": "DJ Mario",
+    "email": "mario@karaokati.com",
+    "password": PASSWORD,
+}
+
+
+def test_user_actions_queue_admin_events(client, outbox):
+    client.post(f"{API}/auth/register", json=REGISTRATION)
+    client.post(f"{API}/auth/request-password-reset", json={"email": REGISTRATION["email"]})
+    
+    # Una sola chiamata esterna per azione: l'email all'utente
+    assert [to for to, _ in outbox] == [REGISTRATION["email"]] * 2
+    assert admin_digest.pending() == 2
+    
+    assert admin_digest.flush() == 2
+    
+    assert admin_digest.pending() == 0
+    assert outbox[-1] == (settings.EMAIL_FROM, "Riepilogo Admin - 2 notifiche - Karaokati")
+
+def test_digest_lists_events(outbox, monkeypatch):
+    bodies = []
+    monkeypatch.setattr(email_service, "send_email", lambda to, subject, html_body, text_body, on_failure: bodies.append(text_body) or True)
+    admin_digest.notify("registration", "a@karaokati.com", "DJ <A>", "Anna", link="https://karaokati.com/verify-email/x")
+    admin_digest.notify("account_deletion", "b@karaokati.com", "DJ B", "Bruno")
+    
+    admin_digest.flush()
+    
+    assert "DJ <A> Anna a@karaokati.com https://karaokati.com/verify-email/x" in bodies[0]
+    assert "🆕 Registrazione: 1 · 🗑️ Account eliminato: 1" in bodies[0]
+
+def test_digest_uses_app_clock(monkeypatch, clock):
+    bodies = []
+    monkeypatch.setattr(email_service, "send_email", lambda to, subject, html_body, text_body, on_failure: bodies.append(text_body) or True)
+    clock.advance(days=3)
+    admin_digest.notify("registration", "a@karaokati.com", "DJ A")
+    
+    admin_digest.flush()
+    
+    assert clock.utcnow().strftime("%d/%m") in bodies[0]
+
+def test_failed_digest_is_requeued(monkeypatch):
+    def undelivered(to, subject, html_body, text_body, on_failure):
+        on_failure(None)
+        return False
+    
+    monkeypatch.setattr(email_service, "send_email", undelivered)
+    admin_digest.notify("registration", "a@karaokati.com", "DJ A")
+    
+    assert admin_digest.flush() == 0
+    assert admin_digest.pending() == 1
+
+def test_shutdown_flushes_queue(outbox):
+    with TestClient(app) as client:
+        client.post(f"{API}/auth/register", json=REGISTRATION)
+        assert len(outbox) == 1
+    
+    assert len(outbox) == 2
+    assert outbox[-1][0] == settings.EMAIL_FROM
+
+def test_digest_disabled_sends_immediately(client, outbox, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_DIGEST_WINDOW_SECONDS", 0)
+    
+    client.post(f"{API}/auth/register", json=REGISTRATION)
+    
+    assert [to for to, _ in outbox] == [REGISTRATION["email"], settings.EMAIL_FROM]
+    assert admin_digest.pending() == 0
\ No newline at end of file
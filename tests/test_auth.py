@@ -0,0 +1,261 @@
+"""Registrazione, login e profilo DJ"""
+import pytest
+
+from app.api import deps
+from app.api.v1 import auth
+from app.core import security
+from app.core.config import settings
+from app.core.security import DUMMY_PASSWORD_HASH
+from app.crud.versions import bump_token_version
+from app.models import DJ
+from tests.conftest import API, PASSWORD
+
+REGISTRATION = {
+    "full_name": "Mario Rossi",
+    "stage_name": "DJ Mario",
+    "email": "mario@karaokati.com",
+    "password": PASSWORD,
+}
+
+
+def login(client, email, password=PASSWORD, **headers):
+    return client.post(f"{API}/auth/login", json={"email": email, "password": password}, headers=headers)
+
+
+# ==================== REGISTRAZIONE ====================
+
+def test_register_verify_and_login(client, db, outbox):
+    response = client.post(f"{API}/auth/register", json=REGISTRATION)
+    assert response.status_code == 201
+    assert response.json()["token"] is None
+    assert [to for to, _ in outbox][0] == REGISTRATION["email"]
+    
+    assert login(client, REGISTRATION["email"]).status_code == 400
+    
+    token = db.query(DJ).filter(DJ.email == REGISTRATION["email"]).one().email_verification_token
+    assert client.post(f"{API}/auth/verify-email/{token}").status_code == 200
+    
+    response = login(client, REGISTRATION["email"])
+    assert response.status_code == 200
+    assert response.json()["dj"]["email_verified"] is True
+
+def test_register_duplicate_verified_email(client, make_dj):
+    make_dj(REGISTRATION["email"])
+    
+    response = client.post(f"{API}/auth/register", json=REGISTRATION)
+    
+    assert response.status_code == 400
+
+def test_register_replaces_unverified_account(client, db):
+    client.post(f"{API}/auth/register", json=REGISTRATION)
+    
+    response = client.post(f"{API}/auth/register", json={**REGISTRATION, "stage_name": "DJ Mario 2"})
+    
+    assert response.status_code == 201
+    assert db.query(DJ).one().stage_name == "DJ Mario 2"
+
+def test_verify_email_invalid_token(client):
+    assert client.post(f"{API}/auth/verify-email/non-valido").status_code == 404
+
+def test_login_wrong_password(client, dj):
+    assert login(client, dj.email, "sbagliata").status_code == 401
+
+def test_login_unknown_email(client):
+    assert login(client, "nessuno@karaokati.com").status_code == 401
+
+def test_login_unknown_email_checks_dummy_hash(client, monkeypatch):
+    checked = []
+    monkeypatch.setattr(auth, "verify_password", lambda password, hashed: checked.append(hashed) or False)
+    
+    assert login(client, "nessuno@karaokati.com").status_code == 401
+    assert checked == [DUMMY_PASSWORD_HASH]
+
+@pytest.mark.parametrize("store", ["memory", "database"])
+def test_login_throttled_per_email(client, dj, clock, monkeypatch, store):
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_STORE", store)
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_PER_EMAIL", 2)
+    assert login(client, dj.email, "sbagliata").status_code == 401
+    assert login(client, dj.email.upper(), "sbagliata").status_code == 401
+    
+    # Respinto prima di bcrypt, anche con la password giusta
+    verify_password = auth.verify_password
+    monkeypatch.setattr(auth, "verify_password", None)
+    response = login(client, dj.email)
+    assert response.status_code == 429
+    assert 0 < int(response.headers["retry-after"]) <= settings.LOGIN_THROTTLE_WINDOW_SECONDS + 1
+    monkeypatch.setattr(auth, "verify_password", verify_password)
+    
+    clock.advance(seconds=settings.LOGIN_THROTTLE_WINDOW_SECONDS + 1)
+    assert login(client, dj.email).status_code == 200
+
+def test_login_throttled_per_ip(client, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_PER_IP", 2)
+    assert login(client, "uno@karaokati.com").status_code == 401
+    assert login(client, "due@karaokati.com").status_code == 401
+    
+    assert login(client, "tre@karaokati.com").status_code == 429
+
+def test_login_throttled_per_forwarded_ip(client, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_PER_IP", 2)
+    # Stesso proxy per tutti: conta l'IP che il proxy aggiunge in coda, non quello inviato dal client
+    for email in ("uno@karaokati.com", "due@karaokati.com"):
+        assert login(client, email, **{"X-Forwarded-For": f"10.0.0.{len(email)}, 203.0.113.7"}).status_code == 401
+    
+    assert login(client, "tre@karaokati.com", **{"X-Forwarded-For": "203.0.113.7"}).status_code == 429
+    assert login(client, "tre@karaokati.com", **{"X-Forwarded-For": "198.51.100.9"}).status_code == 401
+
+def test_login_success_resets_email_failures(client, dj, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_MAX_FAILURES_PER_EMAIL", 2)
+    assert login(client, dj.email, "sbagliata").status_code == 401
+    assert login(client, dj.email).status_code == 200
+    
+    assert login(client, dj.email, "sbagliata").status_code == 401
+    assert login(client, dj.email).status_code == 200
+
+
+# ==================== PROFILO ====================
+
+def test_get_profile(client, dj, auth):
+    response = client.get(f"{API}/auth/me", headers=auth)
+    
+    assert response.status_code == 200
+    assert response.json()["qr_code_id"] == dj.qr_code_id
+    assert "password_hash" not in response.json()
+
+def test_get_profile_without_auth(client):
+    assert client.get(f"{API}/auth/me").status_code == 403
+
+def test_update_profile(client, auth):
+    response = client.put(f"{API}/auth/me", json={"stage_name": "DJ Nuovo", "phone": "3331234567"}, headers=auth)
+    
+    assert response.status_code == 200
+    assert response.json()["stage_name"] == "DJ Nuovo"
+    assert response.json()["phone"] == "3331234567"
+
+def test_profile_not_modified_until_update(client, auth):
+    etag = client.get(f"{API}/auth/me", headers=auth).headers["etag"]
+    
+    assert client.get(f"{API}/auth/me", headers={**auth, "If-None-Match": etag}).status_code == 304
+    
+    client.put(f"{API}/auth/me", json={"stage_name": "DJ Nuovo"}, headers=auth)
+    
+    response = client.get(f"{API}/auth/me", headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["stage_name"] == "DJ Nuovo"
+
+def test_update_profile_duplicate_email(client, make_dj, auth):
+    other = make_dj()
+    
+    response = client.put(f"{API}/auth/me", json={"email": other.email}, headers=auth)
+    
+    assert response.status_code == 400
+
+def test_logout(client, auth):
+    assert client.post(f"{API}/auth/logout", headers=auth).status_code == 200
+    assert client.post(f"{API}/auth/logout").status_code == 403
+
+def test_logout_revokes_token(client, dj):
+    token = login(client, dj.email).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post(f"{API}/auth/logout", headers=headers).status_code == 200
+    
+    response = client.get(f"{API}/auth/me", headers=headers)
+    
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revocato"
+    new_token = login(client, dj.email).json()["token"]
+    assert client.get(f"{API}/auth/me", headers={"Authorization": f"Bearer {new_token}"}).status_code == 200
+
+def test_revoked_token_rejected_without_query(client, auth, monkeypatch):
+    client.post(f"{API}/auth/logout", headers=auth)
+    monkeypatch.setattr(deps, "get_current_dj_row", None)
+    
+    assert client.get(f"{API}/auth/me", headers=auth).status_code == 401
+
+def test_revocation_from_other_worker(client, db, dj, auth):
+    assert client.get(f"{API}/auth/me", headers=auth).status_code == 200
+    # Revoca fatta da un altro worker: la cache di questo non la conosce, la riga sì
+    db.execute(bump_token_version(dj.id))
+    db.commit()
+    
+    assert client.get(f"{API}/auth/me", headers=auth).status_code == 401
+
+
+# ==================== TOKEN ====================
+
+@pytest.fixture
+def jwt_decodes(monkeypatch):
+    """Verifiche della firma fatte da jwt.decode"""
+    calls = []
+    decode = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+    return calls
+
+def test_token_verified_once(client, auth, jwt_decodes):
+    for _ in range(3):
+        assert client.get(f"{API}/auth/me", headers=auth).status_code == 200
+    
+    assert len(jwt_decodes) == 1
+
+def test_cached_token_verified_again_after_exp(jwt_decodes, monkeypatch):
+    token = security.create_access_token({"dj_id": 1})
+    claims = security.decode_access_token(token)
+    
+    monkeypatch.setattr(security.time, "time", lambda: claims["exp"] + 1)
+    security.decode_access_token(token)
+    
+    assert len(jwt_decodes) == 2
+
+def test_invalid_token_not_cached(client, auth, jwt_decodes):
+    tampered = {"Authorization": auth["Authorization"][:-2] + "xx"}
+    
+    for _ in range(2):
+        assert client.get(f"{API}/auth/me", headers=tampered).status_code == 401
+    
+    assert len(jwt_decodes) == 2
+
+
+# ==================== PASSWORD ====================
+
+def test_change_password_and_login(client, dj, auth):
+    response = client.put(
+        f"{API}/auth/change-password", json={"current_password": PASSWORD, "new_password": "nuovapassword"}, headers=auth
+    )
+    assert response.status_code == 200
+    
+    assert login(client, dj.email).status_code == 401
+    assert login(client, dj.email, "nuovapassword").status_code == 200
+    # Token precedenti revocati, quello nella risposta vale
+    assert client.get(f"{API}/auth/me", headers=auth).status_code == 401
+    assert client.get(f"{API}/auth/me", headers={"Authorization": f"Bearer {response.json()['token']}"}).status_code == 200
+
+def test_change_password_wrong_current(client, auth):
+    response = client.put(
+        f"{API}/auth/change-password", json={"current_password": "sbagliata", "new_password": "nuovapassword"}, headers=auth
+    )
+    
+    assert response.status_code == 400
+
+def test_password_reset(client, db, dj, auth, outbox):
+    assert client.post(f"{API}/auth/request-password-reset", json={"email": dj.email}).status_code == 200
+    assert dj.email in [to for to, _ in outbox]
+    
+    db.refresh(dj)
+    response = client.post(f"{API}/auth/reset-password", json={"token": dj.password_reset_token, "new_password": "resettata1"})
+    assert response.status_code == 200
+    
+    assert login(client, dj.email, "resettata1").status_code == 200
+    assert client.get(f"{API}/auth/me", headers=auth).status_code == 401
+    assert client.post(f"{API}/auth/reset-password", json={"token": "non-valido", "new_password": "x" * 8}).status_code == 400
+
+def test_password_reset_unknown_email(client, outbox):
+    assert client.post(f"{API}/auth/request-password-reset", json={"email": "nessuno@karaokati.com"}).status_code == 200
+    assert outbox == []
+
+
+def test_delete_account(client, db, dj, auth, venue, singer):
+    response = client.delete(f"{API}/auth/delete-account", headers=auth)
+    
+    assert response.status_code == 200
+    assert db.query(DJ).count() == 0
+    assert client.get(f"{API}/auth/me", headers=auth).status_code == 401
\ No newline at end of file
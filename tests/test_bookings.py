@@ -0,0 +1,316 @@
+"""Prenotazioni: lato DJ (JWT) e lato utente (cookie di sessione)"""
+from app.core import catalog_cache
+from app.core.config import settings
+from app.core.query_tracker import assert_max_queries
+from app.crud.versions import bump_catalog_version
+from app.models import Session, Song, Venue
+from tests.conftest import API, SONGS, auth_headers
+
+
+def book(client, singer, song=SONGS[0], user_name="Alice"):
+    return client.post(f"{API}/bookings/user", params={"user_name": user_name, "song": song, "key": "0"}, headers=singer)
+
+
+# ==================== DJ ====================
+
+def test_dj_manual_booking_has_no_session(client, auth, venue):
+    response = client.post(f"{API}/bookings", json={"user_name": "Mario", "song": SONGS[0], "venue_id": venue.id}, headers=auth)
+    
+    assert response.status_code == 201
+    body = response.json()
+    assert body["session_id"] is None
+    assert body["status"] == "pending"
+
+def test_dj_manual_booking_links_catalog_song(client, auth, db, venue):
+    in_catalog = client.post(f"{API}/bookings", json={"user_name": "Mario", "song": SONGS[0], "venue_id": venue.id}, headers=auth).json()
+    free_text = client.post(f"{API}/bookings", json={"user_name": "Mario", "song": "Fuori Catalogo.mp3", "venue_id": venue.id}, headers=auth).json()
+    
+    assert in_catalog["song_id"] == db.query(Song.id).filter(Song.file_name == SONGS[0]).scalar()
+    assert free_text["song_id"] is None
+
+def test_dj_booking_on_foreign_venue(client, make_dj, venue):
+    other = auth_headers(make_dj())
+    
+    response = client.post(f"{API}/bookings", json={"user_name": "Mario", "song": SONGS[0], "venue_id": venue.id}, headers=other)
+    
+    assert response.status_code == 404
+
+def test_dj_sees_all_bookings(client, auth, venue, singer, new_singer, dj):
+    client.post(f"{API}/bookings", json={"user_name": "Mario", "song": SONGS[0], "venue_id": venue.id}, headers=auth)
+    book(client, singer, SONGS[1], "Alice")
+    book(client, new_singer(dj), SONGS[2], "Bob")
+    
+    response = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers=auth)
+    
+    assert response.status_code == 200
+    bookings = response.json()
+    assert [b["user_name"] for b in bookings] == ["Bob", "Alice", "Mario"]
+    assert sum(b["session_id"] is None for b in bookings) == 1
+    assert {b["venue_name"] for b in bookings} == {venue.name}
+    assert set(bookings[0]) == {"id", "user_name", "song", "song_id", "key", "status", "venue_name", "session_id", "created_at"}
+
+def test_dj_cannot_list_foreign_venue(client, make_dj, venue):
+    response = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers=auth_headers(make_dj()))
+    
+    assert response.status_code == 404
+
+def test_dj_bookings_not_modified_until_write(client, auth, venue, singer):
+    book(client, singer, SONGS[0])
+    first = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers=auth)
+    etag = first.headers["etag"]
+    
+    with assert_max_queries(2):
+        cached = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers={**auth, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    
+    client.post(f"{API}/bookings/{first.json()[0]['id']}/accept", headers=auth)
+    
+    changed = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers={**auth, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["status"] == "accepted"
+
+def test_venue_rename_invalidates_bookings_etag(client, auth, venue, singer):
+    book(client, singer)
+    dj_etag = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers=auth).headers["etag"]
+    user_etag = client.get(f"{API}/bookings/user/my-bookings", headers=singer).headers["etag"]
+    
+    client.put(f"{API}/venues/{venue.id}", json={"name": "Nuovo Nome"}, headers=auth)
+    
+    response = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers={**auth, "If-None-Match": dj_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["venue_name"] == "Nuovo Nome"
+    response = client.get(f"{API}/bookings/user/my-bookings", headers={**singer, "If-None-Match": user_etag})
+    assert response.status_code == 200
+    assert response.json()["venue"]["name"] == "Nuovo Nome"
+
+def test_dj_endpoints_require_auth(client, venue):
+    assert client.get(f"{API}/bookings", params={"venue_id": venue.id}).status_code == 403
+    assert client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers={"Authorization": "Bearer x"}).status_code == 401
+
+def test_dj_accept_and_reject(client, auth, venue, singer):
+    first = book(client, singer, SONGS[0]).json()["id"]
+    second = book(client, singer, SONGS[1]).json()["id"]
+    
+    assert client.post(f"{API}/bookings/{first}/accept", headers=auth).json()["status"] == "accepted"
+    assert client.post(f"{API}/bookings/{second}/reject", headers=auth).json()["status"] == "rejected"
+    
+    statuses = {b["id"]: b["status"] for b in client.get(f"{API}/bookings/user/my-bookings", headers=singer).json()["bookings"]}
+    assert statuses == {first: "accepted", second: "rejected"}
+
+def test_dj_cannot_accept_foreign_booking(client, make_dj, singer):
+    booking_id = book(client, singer).json()["id"]
+    
+    response = client.post(f"{API}/bookings/{booking_id}/accept", headers=auth_headers(make_dj()))
+    
+    assert response.status_code == 404
+
+def test_dj_delete_booking_releases_slot(client, auth, db, singer):
+    booking_id = book(client, singer).json()["id"]
+    
+    assert client.delete(f"{API}/bookings/{booking_id}", headers=auth).status_code == 200
+    
+    assert db.query(Session).one().booking_count == 0
+
+def test_dj_delete_venue_bookings(client, auth, db, venue, singer, new_singer, dj):
+    second = new_singer(dj)
+    book(client, singer, SONGS[0])
+    book(client, singer, SONGS[1])
+    book(client, second, SONGS[2])
+    
+    response = client.delete(f"{API}/bookings/venue/{venue.id}", headers=auth)
+    
+    assert response.json()["deleted"] == 3
+    assert [s.booking_count for s in db.query(Session).all()] == [0, 0]
+
+def test_dj_delete_all_bookings(client, auth, db, singer):
+    book(client, singer, SONGS[0])
+    book(client, singer, SONGS[1])
+    
+    response = client.delete(f"{API}/bookings/all", headers=auth)
+    
+    assert response.json()["deleted"] == 2
+    assert db.query(Session).one().booking_count == 0
+
+
+# ==================== UTENTE ====================
+
+def test_user_booking_linked_to_session(client, singer):
+    response = book(client, singer)
+    
+    assert response.status_code == 201
+    body = response.json()
+    assert f"session_id={body['session_id']}" == singer["Cookie"]
+    assert body["remaining_bookings"] == 2
+
+def test_user_sees_only_own_bookings(client, singer, new_singer, dj):
+    book(client, singer, SONGS[0], "Alice")
+    book(client, new_singer(dj), SONGS[1], "Bob")
+    
+    response = client.get(f"{API}/bookings/user/my-bookings", headers=singer)
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert [b["user_name"] for b in body["bookings"]] == ["Alice"]
+    assert body["bookings"][0]["can_delete"] is True
+    assert body["remaining_slots"] == 2
+
+def test_my_bookings_query_budget(client, singer):
+    for song in SONGS[:3]:
+        book(client, singer, song)
+    
+    with assert_max_queries(6):
+        response = client.get(f"{API}/bookings/user/my-bookings", headers=singer)
+    
+    assert len(response.json()["bookings"]) == 3
+
+def test_my_bookings_not_modified_until_write(client, singer, new_singer, dj):
+    book(client, singer, SONGS[0])
+    etag = client.get(f"{API}/bookings/user/my-bookings", headers=singer).headers["etag"]
+    
+    assert client.get(f"{API}/bookings/user/my-bookings", headers={**singer, "If-None-Match": etag}).status_code == 304
+    
+    # Un'altra sessione (stesso browser, nuovo QR) non riusa la lista della precedente
+    assert client.get(f"{API}/bookings/user/my-bookings", headers={**new_singer(dj), "If-None-Match": etag}).status_code == 200
+    
+    book(client, singer, SONGS[1])
+    response = client.get(f"{API}/bookings/user/my-bookings", headers={**singer, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["bookings"]) == 2
+
+def test_user_booking_rate_limit(client, singer):
+    for song in SONGS[:3]:
+        assert book(client, singer, song).status_code == 201
+    
+    response = book(client, singer, SONGS[3])
+    
+    assert response.status_code == 429
+
+def test_user_booking_rate_limit_per_session(client, singer, new_singer, dj):
+    for song in SONGS[:3]:
+        book(client, singer, song)
+    
+    assert book(client, new_singer(dj), SONGS[3]).status_code == 201
+
+def test_user_booking_without_session(client, venue):
+    response = client.post(f"{API}/bookings/user", params={"user_name": "Alice", "song": SONGS[0]})
+    
+    assert response.status_code == 401
+
+def test_user_booking_unknown_song(client, singer):
+    response = book(client, singer, "Canzone Inesistente.mp3")
+    
+    assert response.status_code == 404
+
+def test_user_booking_by_song_id(client, db, singer):
+    song_id = db.query(Song.id).filter(Song.file_name == SONGS[1]).scalar()
+    
+    response = client.post(f"{API}/bookings/user", params={"user_name": "Alice", "song_id": song_id}, headers=singer)
+    
+    assert response.status_code == 201
+    assert (response.json()["song_id"], response.json()["song"]) == (song_id, SONGS[1])
+    booking = client.get(f"{API}/bookings/user/my-bookings", headers=singer).json()["bookings"][0]
+    assert (booking["song_id"], booking["song"]) == (song_id, SONGS[1])
+
+def test_user_booking_foreign_song_id(client, db, make_dj, singer):
+    other = make_dj()
+    db.add(Song(file_name="Canzone di un altro DJ.mp3", dj_id=other.id))
+    db.commit()
+    foreign_id = db.query(Song.id).filter(Song.dj_id == other.id).scalar()
+    
+    assert client.post(f"{API}/bookings/user", params={"user_name": "Alice", "song_id": foreign_id}, headers=singer).status_code == 404
+    assert client.post(f"{API}/bookings/user", params={"user_name": "Alice"}, headers=singer).status_code == 422
+
+def test_deleted_song_keeps_booking_title(client, auth, db, venue, singer):
+    song_id = book(client, singer, SONGS[0]).json()["song_id"]
+    etag = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers=auth).headers["etag"]
+    
+    client.delete(f"{API}/songs/{song_id}", headers=auth)
+    
+    response = client.get(f"{API}/bookings", params={"venue_id": venue.id}, headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert (response.json()[0]["song"], response.json()[0]["song_id"]) == (SONGS[0], None)
+
+def test_cleared_catalog_keeps_booking_title(client, auth, venue, singer):
+    book(client, singer, SONGS[0])
+    etag = client.get(f"{API}/bookings/user/my-bookings", headers=singer).headers["etag"]
+    
+    client.delete(f"{API}/songs", headers=auth)
+    
+    response = client.get(f"{API}/bookings/user/my-bookings", headers={**singer, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert (response.json()["bookings"][0]["song"], response.json()["bookings"][0]["song_id"]) == (SONGS[0], None)
+
+def test_user_booking_checks_catalog_in_memory(client, singer):
+    book(client, singer, SONGS[0])
+    
+    # Catalogo già in memoria: nessuna query su songs
+    with assert_max_queries(8):
+        assert book(client, singer, SONGS[1]).status_code == 201
+        assert book(client, singer, "Canzone Inesistente.mp3").status_code == 404
+
+def test_catalog_cache_bounded_by_total_songs(client, db, make_dj, new_singer, singer, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_CACHE_MAX_TOTAL_SONGS", len(SONGS) + 1)
+    other = make_dj()
+    db.add(Venue(name="Altro Locale", address="Via Po 2", capacity=50, dj_id=other.id, active=True))
+    db.add_all(Song(file_name=name, dj_id=other.id) for name in SONGS)
+    db.commit()
+    
+    book(client, singer, SONGS[0])
+    assert catalog_cache.cached_songs() == len(SONGS)
+    
+    # Il secondo catalogo supera il totale: esce quello caricato prima
+    assert book(client, new_singer(other), SONGS[0]).status_code == 201
+    assert catalog_cache.cached_songs() == len(SONGS)
+
+def test_user_booking_sees_catalog_changes(client, auth, db, dj, singer):
+    assert book(client, singer, "Mina - Se Telefonando.mp3").status_code == 404
+    
+    client.post(f"{API}/songs", json={"file_name": "Mina - Se Telefonando.mp3"}, headers=auth)
+    assert book(client, singer, "Mina - Se Telefonando.mp3").status_code == 201
+    
+    # Scrittura fatta da un altro worker: la versione arriva con il limite prenotazioni
+    db.execute(Song.__table__.delete().where(Song.dj_id == dj.id, Song.file_name == SONGS[0]))
+    db.execute(bump_catalog_version(dj.id))
+    db.commit()
+    assert book(client, singer, SONGS[0]).status_code == 404
+
+def test_user_booking_venue_inactive(client, auth, venue, singer):
+    client.post(f"{API}/venues/{venue.id}/toggle", headers=auth)
+    
+    response = book(client, singer)
+    
+    assert response.status_code == 400
+
+
+def test_user_deletes_own_booking(client, db, singer):
+    booking_id = book(client, singer).json()["id"]
+    
+    response = client.delete(f"{API}/bookings/user/{booking_id}", headers=singer)
+    
+    assert response.status_code == 200
+    assert response.json()["remaining_bookings"] == 3
+    assert client.get(f"{API}/bookings/user/my-bookings", headers=singer).json()["bookings"] == []
+    assert db.query(Session).one().booking_count == 0
+
+def test_user_cannot_delete_others_booking(client, singer, new_singer, dj):
+    booking_id = book(client, singer).json()["id"]
+    
+    response = client.delete(f"{API}/bookings/user/{booking_id}", headers=new_singer(dj))
+    
+    assert response.status_code == 404
+
+def test_user_cannot_delete_with_venue_inactive(client, db, venue, singer):
+    booking_id = book(client, singer).json()["id"]
+    db.query(Venue).filter(Venue.id == venue.id).update({"active": False})
+    db.commit()
+    
+    response = client.delete(f"{API}/bookings/user/{booking_id}", headers=singer)
+    
+    assert response.status_code == 400
+
+def test_user_delete_unknown_booking(client, singer):
+    response = client.delete(f"{API}/bookings/user/999999", headers=singer)
+    
+    assert response.status_code == 404
\ No newline at end of file
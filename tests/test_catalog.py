@@ -0,0 +1,163 @@
+"""Locali e catalogo canzoni: gestione DJ e catalogo pubblico"""
+from sqlalchemy import text
+
+from app.database import engine
+from app.migrate import add_missing_indexes, dedupe_songs
+from app.models import Booking, Song
+from tests.conftest import API, SONGS, auth_headers
+
+
+# ==================== LOCALI ====================
+
+def test_create_and_list_venues(client, auth):
+    response = client.post(f"{API}/venues", json={"name": "Bravo", "address": "Via Roma 1", "capacity": 100}, headers=auth)
+    assert response.status_code == 201
+    assert response.json()["active"] is False
+    
+    client.post(f"{API}/venues", json={"name": "Alfa"}, headers=auth)
+    
+    assert [v["name"] for v in client.get(f"{API}/venues", headers=auth).json()] == ["Alfa", "Bravo"]
+
+def test_create_venue_without_auth(client):
+    assert client.post(f"{API}/venues", json={"name": "Alfa"}).status_code == 403
+
+def test_toggle_keeps_one_active_venue(client, auth):
+    first = client.post(f"{API}/venues", json={"name": "Alfa"}, headers=auth).json()["id"]
+    second = client.post(f"{API}/venues", json={"name": "Bravo"}, headers=auth).json()["id"]
+    
+    client.post(f"{API}/venues/{first}/toggle", headers=auth)
+    client.post(f"{API}/venues/{second}/toggle", headers=auth)
+    
+    venues = client.get(f"{API}/venues", headers=auth).json()
+    assert [(v["name"], v["active"]) for v in venues] == [("Bravo", True), ("Alfa", False)]
+
+def test_venues_not_modified_until_toggle(client, auth, venue):
+    etag = client.get(f"{API}/venues", headers=auth).headers["etag"]
+    
+    assert client.get(f"{API}/venues", headers={**auth, "If-None-Match": etag}).status_code == 304
+    
+    client.post(f"{API}/venues/{venue.id}/toggle", headers=auth)
+    
+    response = client.get(f"{API}/venues", headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["active"] is False
+
+def test_update_and_delete_venue(client, auth, venue):
+    response = client.put(f"{API}/venues/{venue.id}", json={"capacity": 250}, headers=auth)
+    assert response.json()["capacity"] == 250
+    
+    assert client.delete(f"{API}/venues/{venue.id}", headers=auth).status_code == 200
+    assert client.get(f"{API}/venues", headers=auth).json() == []
+
+def test_foreign_venue_not_found(client, make_dj, venue):
+    other = auth_headers(make_dj())
+    
+    assert client.put(f"{API}/venues/{venue.id}", json={"name": "X"}, headers=other).status_code == 404
+    assert client.post(f"{API}/venues/{venue.id}/toggle", headers=other).status_code == 404
+    assert client.delete(f"{API}/venues/{venue.id}", headers=other).status_code == 404
+
+
+# ==================== CATALOGO DJ ====================
+
+def test_add_and_bulk_add_songs(client, auth):
+    response = client.post(f"{API}/songs", json={"file_name": "Mina - Se Telefonando.mp3"}, headers=auth)
+    assert response.status_code == 201
+    
+    response = client.post(f"{API}/songs/bulk", json={"songs": SONGS}, headers=auth)
+    assert response.json()["count"] == len(SONGS)
+    
+    assert client.get(f"{API}/songs", headers=auth).json()["total"] == len(SONGS) + 1
+
+def test_add_song_already_in_catalog(client, auth, venue):
+    response = client.post(f"{API}/songs", json={"file_name": SONGS[0]}, headers=auth)
+    
+    assert response.status_code == 409
+    assert client.get(f"{API}/songs", headers=auth).json()["total"] == len(SONGS)
+
+def test_bulk_add_skips_duplicates(client, auth, venue):
+    response = client.post(f"{API}/songs/bulk", json={"songs": [SONGS[0], "Mina - Mille Bolle Blu.mp3", "Mina - Mille Bolle Blu.mp3"]}, headers=auth)
+    
+    assert (response.json()["count"], response.json()["skipped"]) == (1, 2)
+    assert client.get(f"{API}/songs", headers=auth).json()["total"] == len(SONGS) + 1
+
+def test_migration_keeps_duplicate_songs(db, dj, venue, caplog):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_songs_dj_file_name"))
+    try:
+        original = db.query(Song).filter_by(dj_id=dj.id, file_name=SONGS[0]).one().id
+        duplicate = Song(dj_id=dj.id, file_name=SONGS[0])
+        db.add(duplicate)
+        db.flush()
+        db.add(Booking(venue_id=venue.id, user_name="Alice", song=SONGS[0], song_id=duplicate.id))
+        db.commit()
+        
+        # All'avvio nessuna eliminazione: indice saltato con un warning
+        assert add_missing_indexes(engine) == []
+        assert "dedupe-songs" in caplog.text
+        assert db.query(Song).count() == len(SONGS) + 1
+        
+        assert dedupe_songs(engine) == {dj.id: 1}
+        db.expire_all()
+        assert db.query(Song).count() == len(SONGS)
+        assert db.query(Booking).one().song_id == original
+        assert add_missing_indexes(engine) == ["uq_songs_dj_file_name"]
+    finally:
+        # Indice sempre ricreato per gli altri test, anche se il test fallisce a metà
+        db.rollback()
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM songs"))
+        add_missing_indexes(engine)
+
+def test_search_songs(client, auth, venue):
+    response = client.get(f"{API}/songs", params={"search": "battisti"}, headers=auth)
+    
+    assert [s["file_name"] for s in response.json()["songs"]] == ["Lucio Battisti - Emozioni.mp3"]
+    assert response.json()["total"] == 1
+    assert response.json()["limited"] is False
+
+def test_songs_pagination(client, auth, venue):
+    response = client.get(f"{API}/songs", params={"page": 2, "per_page": 2}, headers=auth)
+    
+    body = response.json()
+    assert body["pages"] == 3
+    assert body["current_page"] == 2
+    assert [s["file_name"] for s in body["songs"]] == sorted(SONGS)[2:4]
+
+def test_delete_song_and_clear_catalog(client, auth, venue):
+    song_id = client.get(f"{API}/songs", headers=auth).json()["songs"][0]["id"]
+    
+    assert client.delete(f"{API}/songs/{song_id}", headers=auth).status_code == 200
+    assert client.delete(f"{API}/songs/{song_id}", headers=auth).status_code == 404
+    assert client.delete(f"{API}/songs", headers=auth).json()["deleted"] == len(SONGS) - 1
+
+
+# ==================== CATALOGO PUBBLICO ====================
+
+def test_public_catalog_search(client, dj, singer):
+    response = client.get(f"{API}/songs/public/{dj.qr_code_id}", params={"search": "volare"}, headers=singer)
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["songs"] == [SONGS[0]]
+    assert body["total"] == len(SONGS)
+    assert body["dj_name"] == dj.stage_name
+
+def test_public_catalog_with_ids(client, dj, singer):
+    response = client.get(f"{API}/songs/public/{dj.qr_code_id}", params={"search": "volare", "with_ids": True}, headers=singer)
+    
+    [song] = response.json()["songs"]
+    assert song["file_name"] == SONGS[0]
+    
+    # L'id del catalogo è quello che la prenotazione accetta
+    booking = client.post(f"{API}/bookings/user", params={"user_name": "Alice", "song_id": song["id"]}, headers=singer)
+    assert booking.json()["song"] == SONGS[0]
+
+def test_public_catalog_invalid_session(client, dj, venue):
+    response = client.get(
+        f"{API}/songs/public/{dj.qr_code_id}", headers={"Cookie": "session_id=00000000-0000-0000-0000-000000000000"}
+    )
+    
+    assert response.status_code == 401
+
+def test_public_catalog_unknown_dj(client):
+    assert client.get(f"{API}/songs/public/NON-ESISTE").status_code == 404
\ No newline at end of file
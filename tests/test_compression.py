@@ -0,0 +1,69 @@
+"""Compressione delle risposte: negoziazione, soglia, streaming e 304"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, accepted_encoding
+from app.models import Song
+from tests.conftest import API
+
+
+@pytest.fixture
+def catalog(db, dj):
+    db.add_all(Song(file_name=f"Artista {i:04d} - Canzone Karaoke {i:04d}.mp3", dj_id=dj.id) for i in range(200))
+    db.commit()
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("*", "br"),
+    ("identity", None),
+    ("", None),
+])
+def test_accepted_encoding(header, expected):
+    assert accepted_encoding(header) == expected
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_catalog_compressed(client, auth, catalog, encoding):
+    response = client.get(f"{API}/songs", params={"per_page": 200}, headers={**auth, "Accept-Encoding": encoding})
+    
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content) / 5
+    assert len(response.json()["songs"]) == 200
+
+def test_catalog_without_accept_encoding(client, auth, catalog):
+    response = client.get(f"{API}/songs", params={"per_page": 200}, headers={**auth, "Accept-Encoding": "identity"})
+    
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content)
+
+def test_small_response_not_compressed(client):
+    response = client.get("/livez", headers={"Accept-Encoding": "br"})
+    
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "alive"}
+
+def test_not_modified_not_compressed(client, auth):
+    etag = client.get(f"{API}/auth/me", headers=auth).headers["etag"]
+    
+    response = client.get(f"{API}/auth/me", headers={**auth, "If-None-Match": etag, "Accept-Encoding": "br"})
+    
+    assert response.status_code == 304
+    assert "content-encoding" not in response.headers
+
+def test_streaming_response_not_compressed():
+    streaming = FastAPI()
+    streaming.add_middleware(CompressionMiddleware, minimum_size=0)
+    
+    @streaming.get("/stream")
+    def stream():
+        return StreamingResponse((b'{"chunk": %d}\n' % i for i in range(100)), media_type="application/json")
+    
+    response = TestClient(streaming).get("/stream", headers={"Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in response.headers
+    assert response.content.count(b"chunk") == 100
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Dimensionamento del pool e recycle delle connessioni inattive"""
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import db_pool
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, instrument_engine, pool_sizing
+
+
+@pytest.mark.parametrize("workers, max_connections, reserved, pool_size, max_overflow, expected", [
+    # Budget per engine = (100 - 10) // (4 worker × 2 engine) = 11: metà nel pool, il resto overflow
+    (4, 100, 10, 0, -1, (5, 6)),
+    # Un solo worker: pool limitato a 20
+    (1, 100, 10, 0, -1, (20, 25)),
+    # Nessun budget: minimo 2 connessioni per engine
+    (8, 10, 10, 0, -1, (1, 1)),
+    # Valori espliciti
+    (4, 100, 10, 7, 0, (7, 0)),
+    (4, 100, 10, 3, -1, (3, 8)),
+])
+def test_pool_sizing(monkeypatch, workers, max_connections, reserved, pool_size, max_overflow, expected):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", workers)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", max_connections)
+    monkeypatch.setattr(settings, "DB_RESERVED_CONNECTIONS", reserved)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", pool_size)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", max_overflow)
+    
+    assert pool_sizing() == expected
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0)
+    instrument_engine(engine, "test")
+    yield engine
+    db_pool._metrics.pop("test", None)
+    engine.dispose()
+
+def test_idle_connection_recycled(pooled_engine, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_IDLE_TIMEOUT", 0.05)
+    with pooled_engine.connect() as conn:
+        first = conn.connection.dbapi_connection
+    
+    # Checkout subito dopo il checkin: stessa connessione
+    with pooled_engine.connect() as conn:
+        assert conn.connection.dbapi_connection is first
+    
+    time.sleep(0.1)
+    with pooled_engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert conn.connection.dbapi_connection is not first
+    
+    stats = db_pool.pool_stats()["test"]
+    assert (stats["connects"], stats["idle_recycles"], stats["invalidations"]) == (2, 1, 0)
+    assert stats["checkouts"] == 3
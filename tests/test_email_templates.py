@@ -0,0 +1,40 @@
+"""Template email precompilati: campi, escape HTML e versione testo"""
+from app.core import email_templates
+from app.core.email_render import EmailTemplate
+
+
+def test_render_only_fields():
+    template = EmailTemplate("Oggetto", """
+    <p>Ciao {name},</p>
+    <!-- commento -->
+    <a href="{url}">Apri</a>
+    """)
+    
+    subject, html_body, text_body = template.render(name="Mario", url="https://karaokati.com/x")
+    
+    assert subject == "Oggetto"
+    assert html_body == '<p>Ciao Mario,</p>\n<a href="https://karaokati.com/x">Apri</a>'
+    assert text_body == "Ciao Mario,\nApri (https://karaokati.com/x)\n"
+    assert template.fields == {"name", "url"}
+
+def test_user_values_escaped_in_html_only():
+    email = email_templates.account_deletion_email_template("<b>DJ</b>", "Mario & Co", "https://karaokati.com/terms")
+    
+    assert "&lt;b&gt;DJ&lt;/b&gt;" in email.html_body
+    assert "<b>DJ</b>" not in email.html_body
+    assert "Mario & Co" in email.text_body
+
+def test_text_alternative_has_links():
+    url = "https://karaokati.com/verify-email/abc123"
+    
+    email = email_templates.verification_email_template(url, "https://karaokati.com/terms")
+    
+    assert f"Verifica Email ({url})" in email.text_body
+    assert "<" not in email.text_body
+    assert "Logo principale" not in email.html_body
+
+def test_unique_ref_per_send():
+    first = email_templates.reset_password_email_template("https://x/r", "https://x/t").html_body
+    second = email_templates.reset_password_email_template("https://x/r", "https://x/t").html_body
+    
+    assert first != second
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""Trasporto email: pool HTTP, batch, invio in background, timeout e circuit breaker"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import admin_digest, email_service, email_transport
+from app.core.config import settings
+from app.core.email_service import send_email
+from app.core.email_transport import CircuitBreaker, EmailMessage
+from app.core.metrics import EMAILS_SENT
+from app.main import app
+from tests.conftest import API, PASSWORD
+from tests.fake_email_api import FakeEmailAPI
+
+
+@pytest.fixture
+def email_api(monkeypatch):
+    api = FakeEmailAPI()
+    api.start()
+    monkeypatch.setattr(settings, "RESEND_API_URL", api.url)
+    monkeypatch.setattr(settings, "RESEND_API_KEY", "re_test")
+    monkeypatch.setattr(settings, "EMAIL_TIMEOUT_SECONDS", 0.5)
+    monkeypatch.setattr(email_transport, "breaker", CircuitBreaker(max_failures=2, reset_seconds=30))
+    email_transport.close_transport()
+    yield api
+    asyncio.run(email_transport.stop())
+    api.stop()
+
+def message(i: int = 0) -> EmailMessage:
+    return EmailMessage(f"dj{i}@karaokati.com", f"Oggetto {i}", f"<p>Ciao {i}</p>", f"Ciao {i}\n")
+
+
+def test_connection_reused(email_api):
+    for i in range(3):
+        assert email_transport.deliver([message(i)])
+    
+    assert [path for path, _ in email_api.requests] == ["/emails"] * 3
+    assert len(email_api.connections) == 1
+    assert email_api.emails[0] == {
+        "from": "Karaokati <admin@karaokati.com>",
+        "to": ["dj0@karaokati.com"],
+        "subject": "Oggetto 0",
+        "html": "<p>Ciao 0</p>",
+        "text": "Ciao 0\n",
+    }
+
+def test_pending_messages_sent_as_batch(email_api):
+    email_api.delay = 0.3
+    email_transport.start()
+    
+    # Il primo invio occupa il thread: gli altri si accumulano e partono insieme
+    for i in range(5):
+        assert email_transport.submit(message(i))
+        time.sleep(0.02)
+    asyncio.run(email_transport.stop())
+    
+    assert [path for path, _ in email_api.requests] == ["/emails", "/emails/batch"]
+    assert [email["to"][0] for email in email_api.emails] == [f"dj{i}@karaokati.com" for i in range(5)]
+
+def test_slow_provider_does_not_block_request(email_api, monkeypatch):
+    # Invio reale (send_email originale) verso il finto provider lento
+    monkeypatch.setattr(email_service, "send_email", send_email)
+    monkeypatch.setattr(settings, "EMAIL_TIMEOUT_SECONDS", 5)
+    email_api.delay = 1
+    
+    with TestClient(app) as client:
+        response = client.post(f"{API}/auth/register", json={
+            "full_name": "Mario Rossi", "stage_name": "DJ Mario", "email": "mario@karaokati.com", "password": PASSWORD,
+        })
+        # Risposta arrivata mentre il provider sta ancora elaborando l'email
+        in_flight = list(email_api.requests)
+    
+    assert response.status_code == 201
+    assert in_flight == []
+    # Allo shutdown il thread svuota la coda: email all'utente e digest admin
+    assert [email["to"][0] for email in email_api.emails] == ["mario@karaokati.com", settings.EMAIL_FROM]
+
+def test_timeout_fails_fast(email_api):
+    email_api.delay = 2
+    
+    start = time.perf_counter()
+    assert not email_transport.deliver([message()])
+    
+    assert time.perf_counter() - start < 1.5
+
+def test_circuit_opens_and_recovers(email_api, clock):
+    email_api.status = 503
+    assert not email_transport.deliver([message(1)])
+    assert not email_transport.deliver([message(2)])
+    assert email_transport.breaker.state == "open"
+    
+    # Circuito aperto: nessuna richiesta al provider
+    assert not email_transport.deliver([message(3)])
+    assert len(email_api.requests) == 2
+    
+    clock.advance(seconds=31)
+    email_api.status = 200
+    assert email_transport.deliver([message(4)])
+    assert email_transport.breaker.state == "closed"
+
+def test_rejected_message_does_not_open_circuit(email_api):
+    email_api.status = 422
+    
+    for i in range(3):
+        assert not email_transport.deliver([message(i)])
+    
+    assert email_transport.breaker.state == "closed"
+    assert len(email_api.requests) == 3
+
+def test_rejected_batch_resent_one_by_one(email_api):
+    email_api.rejected.add("bad@karaokati.com")
+    bad = EmailMessage("bad@karaokati.com", "Oggetto", "<p>Ciao</p>")
+    
+    assert not email_transport.deliver([message(0), bad, message(2)])
+    
+    # Batch rifiutato, poi uno alla volta: si perde solo l'indirizzo non valido
+    assert [path for path, _ in email_api.requests] == ["/emails/batch"] + ["/emails"] * 3
+    delivered = [body["to"][0] for path, body in email_api.requests[1:] if body["to"][0] not in email_api.rejected]
+    assert delivered == ["dj0@karaokati.com", "dj2@karaokati.com"]
+    assert email_transport.breaker.state == "closed"
+
+def test_transient_failure_retried_in_background(email_api):
+    failed = []
+    email_api.status = 503
+    email_transport.start()
+    
+    assert email_transport.submit(message(), on_failure=failed.append)
+    while not email_api.requests:
+        time.sleep(0.01)
+    email_api.status = 200
+    while len(email_api.requests) < 2:
+        time.sleep(0.01)
+    asyncio.run(email_transport.stop())
+    
+    # Primo tentativo 503, il secondo (dopo il backoff) consegna
+    assert len(email_api.requests) == 2
+    assert email_api.emails[-1]["to"] == ["dj0@karaokati.com"]
+    assert failed == []
+
+def test_undelivered_digest_is_requeued(email_api, monkeypatch):
+    monkeypatch.setattr(email_service, "send_email", send_email)
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 2)
+    errors = EMAILS_SENT.labels("error")._value.get()
+    email_api.status = 503
+    email_transport.start()
+    
+    admin_digest.notify("registration", "a@karaokati.com", "DJ A")
+    assert admin_digest.flush() == 1
+    deadline = time.monotonic() + 5
+    while not admin_digest.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    asyncio.run(email_transport.stop())
+    
+    # Tentativi esauriti nel thread di invio: gli eventi tornano in coda per la finestra successiva
+    assert len(email_api.requests) == 2
+    assert admin_digest.pending() == 1
+    # Due tentativi, un solo messaggio scartato
+    assert EMAILS_SENT.labels("error")._value.get() == errors + 1
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Liveness e readiness: DB, pool, code, heartbeat e cache del risultato"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+import app.database
+from app.core import health
+from app.core.config import settings
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_CACHE_SECONDS", 0)
+
+@pytest.fixture
+def registered():
+    """Nomi registrati dal test, rimossi alla fine"""
+    names = []
+    yield names
+    for name in names:
+        health.unregister(name)
+
+
+class SlowEngine:
+    """Engine async il cui connect() non risponde prima di delay secondi"""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+    
+    @asynccontextmanager
+    async def connect(self):
+        await asyncio.sleep(self.delay)
+        yield
+
+
+def test_livez(client):
+    assert client.get("/livez").json() == {"status": "alive"}
+
+def test_readyz_healthy(client, no_cache):
+    response = client.get("/readyz")
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database"]["ok"] is True
+
+def test_readyz_database_timeout(client, no_cache, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_DB_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(app.database, "async_engine", SlowEngine(delay=1))
+    
+    start = time.perf_counter()
+    response = client.get("/readyz")
+    
+    assert time.perf_counter() - start < 0.5
+    assert response.status_code == 503
+    assert response.json()["database"] == {"ok": False, "error": "timeout dopo 0.05s"}
+
+def test_readyz_pool_saturated(client, no_cache, monkeypatch):
+    monkeypatch.setattr(health, "pool_stats", lambda: {"sync": {"pool_size": 5, "max_overflow": 5, "in_use": 9}})
+    
+    response = client.get("/readyz")
+    
+    assert response.status_code == 503
+    assert response.json()["pools"]["sync"] == {"ok": False, "in_use": 9, "capacity": 10, "saturation": 0.9}
+
+def test_readyz_queue_backlog(client, no_cache, registered):
+    registered.append("test_queue")
+    health.register_queue("test_queue", lambda: 11, max_backlog=10)
+    
+    response = client.get("/readyz")
+    
+    assert response.status_code == 503
+    assert response.json()["queues"]["test_queue"] == {"ok": False, "backlog": 11, "max_backlog": 10}
+
+def test_readyz_stale_heartbeat(client, no_cache, registered):
+    registered.append("test_task")
+    health.register_heartbeat("test_task", max_age_seconds=0.05)
+    assert client.get("/readyz").status_code == 200
+    
+    time.sleep(0.1)
+    response = client.get("/readyz")
+    
+    assert response.status_code == 503
+    assert response.json()["heartbeats"]["test_task"]["ok"] is False
+    
+    health.heartbeat("test_task")
+    assert client.get("/readyz").status_code == 200
+
+def test_readiness_cached(client, monkeypatch, registered):
+    monkeypatch.setattr(settings, "HEALTH_CACHE_SECONDS", 60)
+    assert client.get("/readyz").status_code == 200
+    
+    # Entro HEALTH_CACHE_SECONDS la probe riusa il risultato: il backlog non si vede ancora
+    registered.append("test_queue")
+    health.register_queue("test_queue", lambda: 11, max_backlog=10)
+    assert client.get("/readyz").status_code == 200
+    
+    monkeypatch.setattr(settings, "HEALTH_CACHE_SECONDS", 0)
+    assert client.get("/readyz").status_code == 503
+
+def test_concurrent_probes_share_one_check(monkeypatch):
+    calls = []
+    
+    async def run_checks():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"ready": True, "checks": {}}
+    
+    monkeypatch.setattr(health, "_run_checks", run_checks)
+    monkeypatch.setattr(health, "_lock", None)
+    
+    async def probes():
+        return await asyncio.gather(*(health.readiness() for _ in range(5)))
+    
+    assert all(result["ready"] for result in asyncio.run(probes()))
+    assert len(calls) == 1
@@ -0,0 +1,155 @@
+"""Osservabilità: metriche Prometheus, query per richiesta e log di accesso"""
+import logging
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logging_config import AccessLogMiddleware
+from app.core.query_tracker import QueryCountMiddleware
+from app.database import engine
+from tests.conftest import API
+
+PUBLIC_CATALOG_ROUTE = f"{API}/songs/public/{{qr_code_id}}"
+
+
+# ==================== METRICHE ====================
+
+def test_metrics_labelled_by_route_template(client, dj, singer):
+    client.get(f"{API}/songs/public/{dj.qr_code_id}", headers=singer)
+    
+    body = client.get("/metrics").text
+    
+    assert f'karaokati_http_requests_total{{method="GET",route="{PUBLIC_CATALOG_ROUTE}",status="200"}}' in body
+    assert f'karaokati_db_queries_per_request_count{{route="{PUBLIC_CATALOG_ROUTE}"}}' in body
+    # Mai l'URL reale: una serie per template, non per QR code
+    assert dj.qr_code_id not in body
+
+def test_metrics_unmatched_route(client):
+    client.get("/non-esiste")
+    
+    assert 'karaokati_http_requests_total{method="GET",route="unmatched",status="404"}' in client.get("/metrics").text
+
+
+# ==================== QUERY PER RICHIESTA ====================
+
+def test_server_timing_header(client, dj, singer):
+    response = client.get(f"{API}/songs/public/{dj.qr_code_id}", headers=singer)
+    
+    timing = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) query", app;dur=[\d.]+', response.headers["server-timing"])
+    assert timing is not None
+    assert int(timing.group(1)) >= 1
+
+@pytest.fixture
+def repeated_queries():
+    """App minima: /items/{item_id} esegue la stessa query tre volte"""
+    app = FastAPI()
+    app.add_middleware(QueryCountMiddleware)
+    
+    @app.get("/items/{item_id}")
+    def items(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT :item_id"), {"item_id": item_id})
+        return {}
+    
+    return TestClient(app)
+
+def test_query_budget_warning(repeated_queries, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_PER_REQUEST", 2)
+    
+    with caplog.at_level(logging.WARNING, logger="app.db.queries"):
+        repeated_queries.get("/items/7")
+    
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.db.queries"]
+    assert any(m.startswith("GET /items/{item_id}: 3 query (budget 2)") for m in messages)
+
+def test_repeated_query_warning(repeated_queries, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_REPEAT_THRESHOLD", 3)
+    
+    with caplog.at_level(logging.WARNING, logger="app.db.queries"):
+        repeated_queries.get("/items/7")
+    
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.db.queries"]
+    assert any(m.startswith("Possibile N+1 in GET /items/{item_id}: 3× SELECT") for m in messages)
+
+def test_no_warning_within_budget(repeated_queries, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.db.queries"):
+        repeated_queries.get("/items/7")
+    
+    assert not [r for r in caplog.records if r.name == "app.db.queries"]
+
+
+# ==================== LOG DI ACCESSO ====================
+
+def access_lines(caplog) -> list[logging.LogRecord]:
+    return [r for r in caplog.records if r.name == "app.access"]
+
+def test_request_id_reused(client):
+    response = client.get("/livez", headers={"X-Request-ID": "richiesta-42"})
+    
+    assert response.headers["x-request-id"] == "richiesta-42"
+
+def test_request_id_truncated(client):
+    response = client.get("/livez", headers={"X-Request-ID": "x" * 100})
+    
+    assert response.headers["x-request-id"] == "x" * 64
+
+def test_request_id_generated(client):
+    first = client.get("/livez").headers["x-request-id"]
+    second = client.get("/livez").headers["x-request-id"]
+    
+    assert re.fullmatch(r"[0-9a-f]{32}", first)
+    assert first != second
+
+def test_access_log_line(client, dj, singer, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "LOG_HIGH_VOLUME_SAMPLE_RATE", 1.0)
+    
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get(f"{API}/songs/public/{dj.qr_code_id}", headers=singer)
+    
+    record, = access_lines(caplog)
+    assert record.getMessage() == f"GET {PUBLIC_CATALOG_ROUTE} 200"
+    assert record.path == f"{API}/songs/public/{dj.qr_code_id}"
+    assert record.status == 200
+    assert record.db_queries >= 1
+    assert not hasattr(record, "sample_rate")
+
+def test_high_volume_route_sampled(client, dj, singer, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "LOG_HIGH_VOLUME_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "LOG_ACCESS_SAMPLE_RATE", 1.0)
+    
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get(f"{API}/songs/public/{dj.qr_code_id}", headers=singer)
+        client.get("/non-esiste")
+    
+    assert [r.getMessage() for r in access_lines(caplog)] == ["GET /non-esiste 404"]
+
+def test_slow_request_always_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "LOG_HIGH_VOLUME_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "LOG_SLOW_REQUEST_MS", 0)
+    
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get("/livez")
+    
+    assert [r.getMessage() for r in access_lines(caplog)] == ["GET /livez 200"]
+
+def test_server_error_always_logged(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "LOG_ACCESS_SAMPLE_RATE", 0.0)
+    
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware)
+    
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+    
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        response = TestClient(app, raise_server_exceptions=False).get("/boom")
+        TestClient(app).get("/non-esiste")
+    
+    assert response.status_code == 500
+    assert [r.getMessage() for r in access_lines(caplog)] == ["GET /boom 500"]
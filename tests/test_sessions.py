@@ -0,0 +1,272 @@
+"""Flusso QR, creazione e validazione delle sessioni utente"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.core.partitioning import (
+    _add_months, _month_start, _partition_name, apply_retention, ensure_partitions, is_partitioned, list_partitions,
+    migrate_to_partitions,
+)
+from app.database import Base, engine
+from app.models import DJ, Booking, Session, Song, Venue
+from tests.conftest import API, SONGS, auth_headers
+
+MAINTENANCE = {"X-Maintenance-Token": "cron-secret"}
+
+
+@pytest.fixture
+def maintenance_token(monkeypatch):
+    monkeypatch.setattr(settings, "MAINTENANCE_TOKEN", MAINTENANCE["X-Maintenance-Token"])
+
+
+def test_qr_flow_welcome_without_session(client, dj, venue):
+    response = client.get(f"{API}/sessions/qr-flow/{dj.qr_code_id}")
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["action"] == "welcome"
+    assert body["data"]["active_venue"]["id"] == venue.id
+
+def test_qr_flow_redirects_existing_session(client, dj, singer):
+    response = client.get(f"{API}/sessions/qr-flow/{dj.qr_code_id}", headers=singer)
+    
+    assert response.json()["action"] == "redirect"
+
+def test_qr_flow_unknown_qr(client):
+    response = client.get(f"{API}/sessions/qr-flow/NON-ESISTE")
+    
+    assert response.json() == {"action": "error", "error_type": "qr_not_found"}
+
+def test_qr_flow_without_active_venue(client, dj):
+    response = client.get(f"{API}/sessions/qr-flow/{dj.qr_code_id}")
+    
+    assert response.json() == {"action": "error", "error_type": "no_active_venue"}
+
+def test_create_session_without_active_venue(client, dj):
+    response = client.post(f"{API}/sessions/create/{dj.qr_code_id}")
+    
+    assert response.status_code == 400
+
+def test_create_session_sets_cookie(client, dj, venue):
+    response = client.post(f"{API}/sessions/create/{dj.qr_code_id}")
+    
+    assert response.status_code == 200
+    assert response.cookies["session_id"] == response.json()["session_id"]
+
+
+def test_validate_session(client, dj, venue, singer):
+    response = client.get(f"{API}/sessions/validate", headers=singer)
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["valid"] is True
+    assert body["dj"]["qr_code_id"] == dj.qr_code_id
+    assert body["active_venue"]["id"] == venue.id
+    assert 0 < body["remaining_minutes"] <= 6 * 60
+
+def test_validate_without_cookie(client):
+    response = client.get(f"{API}/sessions/validate")
+    
+    assert response.status_code == 401
+
+def test_validate_invalid_cookie(client):
+    response = client.get(f"{API}/sessions/validate", headers={"Cookie": "session_id=non-un-uuid"})
+    
+    assert response.status_code == 401
+
+def test_validate_unknown_session(client):
+    response = client.get(
+        f"{API}/sessions/validate", headers={"Cookie": "session_id=00000000-0000-0000-0000-000000000000"}
+    )
+    
+    assert response.status_code == 401
+
+
+def test_validate_ignores_sessions_beyond_lifetime(client, db, singer):
+    # created_at spostato indietro a mano (expires_at ancora valido): conta anche created_at
+    session = db.query(Session).one()
+    session.created_at = session.created_at - timedelta(hours=settings.SESSION_DURATION_HOURS + 1)
+    db.commit()
+    
+    response = client.get(f"{API}/sessions/validate", headers=singer)
+    
+    assert response.status_code == 401
+
+def test_session_expiry(client, clock, dj, singer):
+    clock.advance(hours=5, minutes=59)
+    assert client.get(f"{API}/sessions/validate", headers=singer).status_code == 200
+    
+    clock.advance(minutes=2)
+    
+    response = client.get(f"{API}/sessions/validate", headers=singer)
+    assert response.status_code == 401
+    assert "scaduta" in response.json()["detail"]
+    
+    response = client.post(f"{API}/bookings/user", params={"user_name": "Charlie", "song": SONGS[0]}, headers=singer)
+    assert response.status_code == 401
+    
+    response = client.get(f"{API}/songs/public/{dj.qr_code_id}", headers=singer)
+    assert response.status_code == 401
+    
+    # Il QR propone una nuova sessione
+    response = client.get(f"{API}/sessions/qr-flow/{dj.qr_code_id}", headers=singer)
+    assert response.json()["action"] == "welcome"
+
+def test_venue_change_invalidates_session(client, dj, auth, singer, new_singer):
+    response = client.post(f"{API}/venues", json={"name": "Venue B", "address": "Via B 123", "capacity": 150}, headers=auth)
+    venue_b = response.json()["id"]
+    assert client.post(f"{API}/venues/{venue_b}/toggle", headers=auth).json()["active"] is True
+    
+    response = client.get(f"{API}/sessions/validate", headers=singer)
+    assert response.status_code == 400
+    
+    response = client.post(f"{API}/bookings/user", params={"user_name": "Bob", "song": SONGS[0]}, headers=singer)
+    assert response.status_code == 400
+    assert "locale della tua sessione non è più attivo" in response.json()["detail"]
+    
+    # Una nuova sessione punta al Venue B
+    response = client.get(f"{API}/sessions/validate", headers=new_singer(dj))
+    assert response.status_code == 200
+    assert response.json()["active_venue"]["id"] == venue_b
+
+
+def test_cleanup_requires_maintenance_token(client, monkeypatch):
+    assert client.get(f"{API}/sessions/cleanup", headers=MAINTENANCE).status_code == 403
+    
+    monkeypatch.setattr(settings, "MAINTENANCE_TOKEN", "cron-secret")
+    assert client.get(f"{API}/sessions/cleanup").status_code == 403
+    assert client.get(f"{API}/sessions/cleanup", headers={"X-Maintenance-Token": "indovinato"}).status_code == 403
+    assert client.get(f"{API}/sessions/cleanup", headers=MAINTENANCE).status_code == 200
+
+def test_cleanup_deletes_expired_sessions(client, clock, db, singer, new_singer, dj, maintenance_token):
+    if is_partitioned(db.connection(), "sessions"):
+        pytest.skip("Sessioni partizionate: eliminate con il DROP della partizione, non dal cleanup")
+    
+    clock.advance(hours=7)
+    new_singer(dj)
+    
+    response = client.get(f"{API}/sessions/cleanup", headers=MAINTENANCE)
+    
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 1
+    assert db.query(Session).count() == 1
+
+def test_cleanup_invalidates_only_affected_venues(client, clock, db, auth, venue, singer, new_singer, make_dj, maintenance_token):
+    if is_partitioned(db.connection(), "sessions"):
+        pytest.skip("Sessioni partizionate: eliminate con il DROP della partizione, non dal cleanup")
+    other = make_dj()
+    other_venue = Venue(name="Altro Locale", dj_id=other.id, active=True)
+    db.add(other_venue)
+    db.add_all(Song(file_name=name, dj_id=other.id) for name in SONGS)
+    db.commit()
+    client.post(f"{API}/bookings/user", params={"user_name": "Alice", "song": SONGS[0]}, headers=singer)
+    
+    clock.advance(hours=7)
+    other_singer = new_singer(other)
+    client.post(f"{API}/bookings/user", params={"user_name": "Bob", "song": SONGS[0]}, headers=other_singer)
+    lists = [(auth, venue.id), (auth_headers(other), other_venue.id)]
+    etags = [client.get(f"{API}/bookings", params={"venue_id": v}, headers=h).headers["etag"] for h, v in lists]
+    
+    assert client.get(f"{API}/sessions/cleanup", headers=MAINTENANCE).json()["deleted"] == 1
+    
+    # Solo il locale con prenotazioni della sessione scaduta cambia ETag
+    statuses = [
+        client.get(f"{API}/bookings", params={"venue_id": v}, headers={**h, "If-None-Match": etag}).status_code
+        for (h, v), etag in zip(lists, etags)
+    ]
+    assert statuses == [200, 304]
+
+def test_retention_deletes_old_rows(client, db, singer, dj, venue):
+    if is_partitioned(db.connection(), "sessions"):
+        pytest.skip("Tabelle partizionate: la retention fa il DROP delle partizioni")
+    client.post(f"{API}/bookings/user", params={"user_name": "Alice", "song": SONGS[0]}, headers=singer)
+    old = datetime.utcnow() - timedelta(days=31 * (settings.DATA_RETENTION_MONTHS + 1))
+    db.add(Session(dj_id=dj.id, venue_id=venue.id, created_at=old, expires_at=old + timedelta(hours=6)))
+    db.add(Booking(venue_id=venue.id, user_name="Bob", song=SONGS[1], created_at=old))
+    db.commit()
+    
+    result = apply_retention(db.connection())
+    db.commit()
+    
+    assert result == {"dropped_partitions": [], "deleted_rows": {"bookings": 1, "sessions": 1}, "venue_ids": [venue.id]}
+    assert db.query(Session).count() == 1
+    assert [b.user_name for b in db.query(Booking)] == ["Alice"]
+
+def test_new_partition_takes_rows_from_default(db, dj, venue):
+    if not is_partitioned(db.connection(), "sessions"):
+        pytest.skip("Solo PostgreSQL partizionato")
+    month = _add_months(_month_start(datetime.utcnow()), settings.PARTITION_PREMAKE_MONTHS + 1)
+    partition = _partition_name("sessions", month)
+    db.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+    created = datetime.combine(month, datetime.min.time()) + timedelta(days=1)
+    db.add(Session(dj_id=dj.id, venue_id=venue.id, created_at=created, expires_at=created + timedelta(hours=6)))
+    db.commit()
+    
+    try:
+        # La riga del mese senza partizione è nella DEFAULT: il CREATE semplice verrebbe rifiutato
+        ensure_partitions(engine, months_ahead=settings.PARTITION_PREMAKE_MONTHS + 1)
+        
+        assert db.execute(text(f"SELECT count(*) FROM {partition}")).scalar() == 1
+        assert db.execute(text("SELECT count(*) FROM sessions_default")).scalar() == 0
+    finally:
+        db.rollback()
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+
+def test_migrate_converts_existing_tables(db):
+    if db.get_bind().dialect.name != "postgresql":
+        pytest.skip("Solo PostgreSQL")
+    # Database a parte: tabelle create da create_all (non partizionate) come in un'installazione esistente
+    name = f"karaokati_convert_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(engine.url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f"CREATE DATABASE {name}"))
+    scratch = create_engine(engine.url.set(database=name))
+    old = datetime.utcnow() - timedelta(days=62)
+    try:
+        Base.metadata.create_all(scratch)
+        with DBSession(scratch) as session:
+            dj = DJ(full_name="Test DJ", stage_name="DJ Test", email="dj@karaokati.com", password_hash="x", qr_code_id="TEST-CONVERT")
+            session.add(dj)
+            session.flush()
+            venue = Venue(name="Venue Test", dj_id=dj.id, active=True)
+            session.add(venue)
+            session.flush()
+            singer = Session(dj_id=dj.id, venue_id=venue.id, created_at=old, expires_at=old + timedelta(hours=6))
+            session.add(singer)
+            session.flush()
+            session.add(Booking(venue_id=venue.id, session_id=singer.id, user_name="Alice", song=SONGS[0], created_at=old))
+            venue_id = venue.id
+            session.commit()
+        
+        assert migrate_to_partitions(scratch) == ["bookings", "sessions"]
+        assert migrate_to_partitions(scratch) == []
+        
+        with scratch.begin() as conn:
+            for table in ("bookings", "sessions"):
+                assert is_partitioned(conn, table)
+                assert inspect(conn).get_pk_constraint(table)["constrained_columns"] == ["id", "created_at"]
+                # Dal mese della riga più vecchia: la riga è nella sua partizione, non nella DEFAULT
+                assert list_partitions(conn, table)[0] == _partition_name(table, _month_start(old))
+                assert conn.execute(text(f"SELECT count(*) FROM {_partition_name(table, _month_start(old))}")).scalar() == 1
+            # La sequence segue la nuova tabella: gli id ripartono da dove erano
+            new_id = conn.execute(text(
+                "INSERT INTO bookings (venue_id, user_name, song, created_at) "
+                "SELECT venue_id, 'Bob', song, now() FROM bookings RETURNING id"
+            )).scalar()
+            assert new_id == 2
+            
+            # Retention: DROP della partizione del mese vecchio, ETag dei soli locali coinvolti
+            result = apply_retention(conn, retention_months=1)
+            assert _partition_name("bookings", _month_start(old)) in result["dropped_partitions"]
+            assert result["venue_ids"] == [venue_id]
+            assert conn.execute(text("SELECT user_name FROM bookings")).scalars().all() == ["Bob"]
+    finally:
+        scratch.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {name}"))
+        admin.dispose()
\ No newline at end of file